@@ -4,6 +4,7 @@ from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import authenticate
 from django.core.exceptions import ValidationError
 from .models import Profile
+from .uploads import avatar_uploads
 
 User = get_user_model()
 
@@ -75,6 +76,7 @@ class ProfileEditForm(forms.ModelForm):
         self.fields['email'].required = True
         self.fields['phone'].required = True
         # All other fields are optional
+        self.current_avatar = self.instance.avatar.name
 
     def clean_phone(self):
         phone = self.cleaned_data.get('phone')
@@ -82,6 +84,17 @@ class ProfileEditForm(forms.ModelForm):
             raise forms.ValidationError("Please enter a valid phone number.")
         return phone
 
+    def save(self, commit=True):
+        """Save the profile, queueing a new avatar for background upload"""
+        avatar = self.cleaned_data.get('avatar') if commit and 'avatar' in self.changed_data else None
+        if avatar:
+            # Keep showing the current avatar until the upload finishes
+            self.instance.avatar = self.current_avatar
+        user = super().save(commit=commit)
+        if avatar:
+            avatar_uploads.submit(user, avatar)
+        return user
+
 
 class ProfileCompletionForm(forms.ModelForm):
     """Form for checking profile completion status"""
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from tampere_cricket.accounts.models import User
+from tampere_cricket.images import AVATAR_VARIANTS, NEWS_VARIANTS, refresh_derivatives
+from tampere_cricket.news.models import News
+
+
+class Command(BaseCommand):
+    help = 'Generate resized variants of avatars and highlights images that do not have them yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants even where they are up to date',
+        )
+        parser.add_argument(
+            '--only',
+            choices=['avatars', 'news'],
+            help='Process only avatars or only highlights images',
+        )
+
+    def handle(self, *args, **options):
+        targets = [
+            ('avatars', User.objects.exclude(avatar='').exclude(avatar__isnull=True), 'avatar', AVATAR_VARIANTS),
+            ('news', News.objects.exclude(featured_image='').exclude(featured_image__isnull=True), 'featured_image', NEWS_VARIANTS),
+        ]
+        
+        for label, queryset, field_name, variants in targets:
+            if options['only'] and options['only'] != label:
+                continue
+            
+            generated = 0
+            for instance in queryset.iterator():
+                if refresh_derivatives(instance, field_name, variants, force=options['force']):
+                    generated += 1
+                    self.stdout.write(f'Generated {label} variants for {getattr(instance, field_name).name}')
+            
+            self.stdout.write(
+                self.style.SUCCESS(f'Generated variants for {generated} {label}')
+            )
@@ -1,69 +1,178 @@
 """
 Management command to migrate existing avatars to Cloudinary
 """
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
 from django.core.management.base import BaseCommand
-from django.core.files.base import ContentFile
+
 from tampere_cricket.accounts.models import User
-from tampere_cricket.cloudinary_utils import upload_to_cloudinary, is_cloudinary_enabled
-import os
+from tampere_cricket.cloudinary_fake import FakeCloudinary
+from tampere_cricket.cloudinary_storage import CloudinaryClient, METADATA_TTL, metadata_cache_key, resource_metadata
+from tampere_cricket.cloudinary_utils import is_cloudinary_enabled
 
 
 class Command(BaseCommand):
-    help = 'Migrate existing avatars to Cloudinary'
-
+    help = (
+        'Migrate existing avatars to Cloudinary. Migrated users are recorded in a checkpoint '
+        'file, so an interrupted run can simply be started again. Set CLOUDINARY_UPLOAD_PREFIX '
+        'to send uploads to a local test server instead.'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of concurrent uploads (default: 4)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Users saved per database update (default: 50)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=str(settings.BASE_DIR / 'avatar_migration.checkpoint'),
+            help='File listing the ids of users already migrated',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore the checkpoint file and migrate every local avatar again',
+        )
+        parser.add_argument(
+            '--fake',
+            action='store_true',
+            help='Rehearse the run against an in-memory stand-in for Cloudinary, without saving anything',
+        )
+        parser.add_argument(
+            '--fake-latency',
+            type=float,
+            default=0.2,
+            help='Seconds each fake upload takes (default: 0.2)',
+        )
+    
     def handle(self, *args, **options):
-        if not is_cloudinary_enabled():
+        if not options['fake'] and not is_cloudinary_enabled():
             self.stdout.write(
                 self.style.ERROR('Cloudinary is not enabled. Set USE_CLOUDINARY=True')
             )
             return
-
-        users_with_avatars = User.objects.filter(avatar__isnull=False).exclude(avatar='')
         
-        self.stdout.write(f'Found {users_with_avatars.count()} users with avatars')
+        self.fake = options['fake']
+        self.client = FakeCloudinary(latency=options['fake_latency']) if self.fake else CloudinaryClient()
+        self.local_storage = FileSystemStorage(location=settings.MEDIA_ROOT)
+        workers = max(1, options['workers'])
+        batch_size = max(1, options['batch_size'])
+        checkpoint = options['checkpoint']
+        
+        if options['restart'] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        done = self.read_checkpoint(checkpoint)
+        
+        # Only avatars still on local disk need uploading
+        users = [
+            user for user in User.objects.exclude(avatar='').exclude(avatar__isnull=True)
+            .exclude(pk__in=done).only('id', 'username', 'avatar').order_by('id')
+            if self.local_storage.exists(user.avatar.name)
+        ]
+        total = len(users)
+        self.stdout.write(f'Found {total} users with local avatars ({len(done)} already migrated)')
         
         migrated_count = 0
         error_count = 0
+        pending = []
+        start = time.monotonic()
         
-        for user in users_with_avatars:
-            try:
-                # Check if avatar is already a Cloudinary URL
-                if user.avatar.url.startswith('https://res.cloudinary.com/'):
-                    self.stdout.write(f'User {user.username} already has Cloudinary avatar')
-                    continue
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            users_left = iter(users)
+            
+            while True:
+                # Keep at most two uploads per worker queued, so memory stays bounded
+                while len(in_flight) < workers * 2:
+                    user = next(users_left, None)
+                    if user is None:
+                        break
+                    in_flight.add(executor.submit(self.upload, user))
+                if not in_flight:
+                    break
                 
-                # Read the avatar file
-                if user.avatar and hasattr(user.avatar, 'read'):
-                    avatar_file = user.avatar.read()
-                    
-                    # Upload to Cloudinary
-                    public_id = upload_to_cloudinary(
-                        ContentFile(avatar_file),
-                        folder=f"avatars/{user.id}"
-                    )
-                    
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    user, public_id, error = future.result()
                     if public_id:
-                        # Update the user's avatar field with Cloudinary public_id
                         user.avatar = public_id
-                        user.save()
-                        migrated_count += 1
-                        self.stdout.write(
-                            self.style.SUCCESS(f'Migrated avatar for {user.username}')
-                        )
+                        pending.append(user)
                     else:
                         error_count += 1
                         self.stdout.write(
-                            self.style.ERROR(f'Failed to upload avatar for {user.username}')
+                            self.style.ERROR(f'Error migrating {user.username}: {error}')
                         )
-                        
-            except Exception as e:
-                error_count += 1
-                self.stdout.write(
-                    self.style.ERROR(f'Error migrating {user.username}: {str(e)}')
-                )
+                
+                if len(pending) >= batch_size:
+                    migrated_count += self.save_batch(pending, checkpoint)
+                    pending = []
+                    self.report_progress(migrated_count + error_count, total, start)
+        
+        if pending:
+            migrated_count += self.save_batch(pending, checkpoint)
+            self.report_progress(migrated_count + error_count, total, start)
         
         self.stdout.write(
             self.style.SUCCESS(
                 f'Migration complete: {migrated_count} migrated, {error_count} errors'
             )
         )
+        if self.fake:
+            self.stdout.write('Rehearsal only, no avatars were changed')
+        elif migrated_count:
+            self.stdout.write('Run generate_image_variants to rebuild the resized avatars')
+    
+    def read_checkpoint(self, path):
+        """Ids of users migrated by earlier runs"""
+        if not os.path.exists(path):
+            return set()
+        with open(path) as f:
+            return {int(line) for line in f if line.strip().isdigit()}
+    
+    def upload(self, user):
+        """Upload one avatar; runs on a worker thread. Returns (user, public_id, error)"""
+        try:
+            with self.local_storage.open(user.avatar.name, 'rb') as avatar_file:
+                result = self.client.upload(
+                    avatar_file,
+                    folder=f"avatars/{user.id}",
+                    resource_type="image"
+                )
+            # Seed the storage's metadata cache, so the first size() is free
+            if not self.fake:
+                cache.set(metadata_cache_key(result['public_id']), resource_metadata(result), METADATA_TTL)
+            return user, result['public_id'], None
+        except Exception as e:
+            return user, None, str(e)
+    
+    def save_batch(self, users, checkpoint):
+        """Save the new avatar names in one query, then record the users as done"""
+        if self.fake:
+            return len(users)
+        User.objects.bulk_update(users, ['avatar'])
+        with open(checkpoint, 'a') as f:
+            f.writelines(f'{user.id}\n' for user in users)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(users)
+    
+    def report_progress(self, processed, total, start):
+        elapsed = time.monotonic() - start
+        rate = processed / elapsed if elapsed else 0
+        eta = (total - processed) / rate if rate else 0
+        self.stdout.write(
+            f'{processed}/{total} processed, {rate:.1f} avatars/s, ETA {int(eta // 60)}m {int(eta % 60)}s'
+        )
@@ -0,0 +1,54 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from tampere_cricket.accounts.models import StagedUpload
+from tampere_cricket.accounts.uploads import RETRY_AFTER, AvatarUploadQueue
+
+
+# Staged files nobody waits on are deleted once they are this old
+ABANDONED_AFTER = timedelta(days=1)
+
+
+class Command(BaseCommand):
+    help = 'Upload staged avatars whose background upload did not finish, e.g. after a failure or a restart'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for staged avatars instead of exiting after one run',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Seconds between polls with --loop (default: 60)',
+        )
+        parser.add_argument(
+            '--retry-after',
+            type=float,
+            default=RETRY_AFTER.total_seconds(),
+            help=f'Seconds a staged avatar is left to the process that queued it (default: {RETRY_AFTER.total_seconds():.0f})',
+        )
+
+    def handle(self, *args, **options):
+        queue = AvatarUploadQueue(workers=0)
+        retry_after = timedelta(seconds=options['retry_after'])
+        try:
+            while True:
+                started = time.monotonic()
+                uploaded, failed, missing = queue.process_pending(retry_after)
+                purged = StagedUpload.purge_abandoned(ABANDONED_AFTER)
+                if uploaded or failed or missing or purged or not options['loop']:
+                    style = self.style.ERROR if failed else self.style.SUCCESS
+                    self.stdout.write(style(
+                        f'Uploaded {uploaded} avatars, {failed} failed, {missing} missing, '
+                        f'{purged} abandoned files deleted in {time.monotonic() - started:.2f}s'
+                    ))
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
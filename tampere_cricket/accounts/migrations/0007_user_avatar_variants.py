@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_update_rating_system'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the avatar'),
+        ),
+    ]
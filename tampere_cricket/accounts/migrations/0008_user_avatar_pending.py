@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_avatar_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_pending',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Staged avatar waiting for its background upload', max_length=255),
+        ),
+    ]
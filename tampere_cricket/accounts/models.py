@@ -5,6 +5,8 @@ import os
 
 class User(AbstractUser):
     avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    avatar_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the avatar")
+    avatar_pending = models.CharField(max_length=255, blank=True, default='', editable=False, help_text="Staged avatar waiting for its background upload")
     phone = models.CharField(max_length=24, blank=True, default='')
     city = models.CharField(max_length=100, default='Tampere')
     role = models.CharField(
@@ -324,4 +326,33 @@ class Profile(models.Model):
                 'matches': cumulative_matches
             })
         
-        return trend_data
\ No newline at end of file
+        return trend_data
+
+
+class StagedUpload(models.Model):
+    """
+    An uploaded file waiting for its background upload, kept in the database so
+    it survives restarts and any process can finish it, see accounts.uploads
+    """
+    name = models.CharField(max_length=255, unique=True)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Staged Upload'
+        verbose_name_plural = 'Staged Uploads'
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def purge_abandoned(cls, older_than):
+        """Delete staged files no user is waiting on any more, e.g. uploads superseded before a restart"""
+        from django.utils import timezone
+        
+        deleted, _ = cls.objects.filter(
+            created_at__lt=timezone.now() - older_than
+        ).exclude(
+            name__in=User.objects.exclude(avatar_pending='').values('avatar_pending')
+        ).delete()
+        return deleted
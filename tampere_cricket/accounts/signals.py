@@ -1,7 +1,12 @@
+import logging
+
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from .models import Profile, User
 from tampere_cricket.matches.models import MatchResult, Challenge
+from tampere_cricket.images import AVATAR_VARIANTS, refresh_derivatives
+
+logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=User)
@@ -19,6 +24,16 @@ def create_user_profile(sender, instance, created, **kwargs):
         )
 
 
+@receiver(post_save, sender=User)
+def generate_avatar_variants(sender, instance, **kwargs):
+    """Create resized copies of a newly uploaded avatar"""
+    try:
+        refresh_derivatives(instance, 'avatar', AVATAR_VARIANTS)
+    except Exception:
+        # The avatar itself is saved and shown as is; generate_image_variants retries the copies
+        logger.exception('Building avatar variants of user %s failed', instance.pk)
+
+
 @receiver(post_save, sender=MatchResult)
 def update_user_statistics(sender, instance, created, **kwargs):
     """Automatically update user statistics when match results are saved"""
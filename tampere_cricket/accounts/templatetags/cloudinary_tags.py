@@ -1,30 +1,78 @@
 """
 Template tags for Cloudinary integration
 """
+from functools import lru_cache
+
 from django import template
 from django.conf import settings
-import os
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 
 register = template.Library()
 
 
+# Preset name -> (Cloudinary transformation, local derivative used instead).
+# Sizes are CSS pixels; dpr_2.0 keeps them sharp on high density screens.
+PRESETS = {
+    'avatar_40': ('c_fill,g_face,w_40,h_40,dpr_2.0,q_auto,f_auto', 'thumb'),
+    'avatar_100': ('c_fill,g_face,w_100,h_100,dpr_2.0,q_auto,f_auto', 'card'),
+    'card': ('c_fill,g_face,w_300,h_300,dpr_2.0,q_auto,f_auto', 'hero'),
+}
+
+CLOUDINARY_HOST = 'https://res.cloudinary.com/'
+
+
+def get_upload_base():
+    """Cloudinary delivery URL prefix, or None when avatars are stored locally"""
+    cloud_name = getattr(settings, 'CLOUDINARY_CLOUD_NAME', '')
+    if getattr(settings, 'USE_CLOUDINARY', False) and cloud_name:
+        return f'{CLOUDINARY_HOST}{cloud_name}/image/upload/'
+    return None
+
+
+# Resolved once; tests that override the settings reset it below
+UPLOAD_BASE = get_upload_base()
+
+
+@receiver(setting_changed)
+def reset_upload_base(setting, **kwargs):
+    global UPLOAD_BASE
+    if setting in ('USE_CLOUDINARY', 'CLOUDINARY_CLOUD_NAME', 'MEDIA_URL'):
+        UPLOAD_BASE = get_upload_base()
+        build_url.cache_clear()
+
+
+@lru_cache(maxsize=4096)
+def build_url(name, preset='', upload_base=None, storage=None, derivative=None):
+    """URL of an image for a preset, memoised since templates render the same avatars over and over"""
+    if name.startswith(CLOUDINARY_HOST):
+        return name
+    if upload_base:
+        transformation = PRESETS[preset][0] if preset in PRESETS else ''
+        return f'{upload_base}{transformation}/{name}' if transformation else f'{upload_base}{name}'
+    if storage is not None:
+        return storage.url(derivative or name)
+    return name
+
+
 @register.filter
-def cloudinary_url(value):
+def cloudinary_url(value, preset=''):
     """
-    Convert avatar field to Cloudinary URL
+    Convert avatar field to a URL, resized for a preset such as avatar_40.
+    Cloudinary resizes on its CDN; local storage serves the matching derivative.
     """
     if not value:
         return None
     
-    # If it's already a Cloudinary URL, return as is
-    if str(value).startswith('https://res.cloudinary.com/'):
-        return str(value)
-    
-    # If Cloudinary is enabled, construct the URL
-    if os.getenv('USE_CLOUDINARY', 'False').lower() == 'true':
-        cloud_name = os.getenv('CLOUDINARY_CLOUD_NAME')
-        if cloud_name:
-            return f"https://res.cloudinary.com/{cloud_name}/image/upload/{value}"
+    name = str(value)
+    storage = getattr(value, 'storage', None)
+    if UPLOAD_BASE or storage is None:
+        return build_url(name, preset, UPLOAD_BASE)
     
-    # Fallback to original value
-    return str(value)
+    # Local storage: the pre-generated derivative of the same size, else the original
+    derivative = None
+    if preset in PRESETS:
+        variants = getattr(value.instance, f'{value.field.name}_variants', None) or {}
+        if variants.get('source') == name:
+            derivative = variants.get('variants', {}).get(PRESETS[preset][1], {}).get('jpeg')
+    return build_url(name, preset, None, storage, derivative)
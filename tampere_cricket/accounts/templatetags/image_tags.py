@@ -0,0 +1,76 @@
+"""
+Template tags for resized image derivatives
+"""
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+def get_current_variants(image, derivatives):
+    """
+    Variants built from the image as it is now. Those of a replaced image are
+    ignored until new ones are built, since their files are about to be deleted.
+    """
+    derivatives = derivatives or {}
+    if derivatives.get('source') != image.name:
+        return {}
+    return derivatives.get('variants', {})
+
+
+def get_variants(image, derivatives):
+    """Current variants sorted from smallest to largest"""
+    return sorted(get_current_variants(image, derivatives).items(), key=lambda item: item[1]['width'])
+
+
+@register.simple_tag
+def srcset(image, derivatives, fmt='webp'):
+    """
+    srcset attribute value listing every variant of an image in one format
+    """
+    if not image:
+        return ''
+    
+    # Small uploads can give several variants the same width; list each width once
+    candidates = {}
+    for _, variant in get_variants(image, derivatives):
+        if variant.get(fmt):
+            candidates.setdefault(variant['width'], image.storage.url(variant[fmt]))
+    return ', '.join(f'{url} {width}w' for width, url in candidates.items())
+
+
+@register.simple_tag
+def variant_url(image, derivatives, variant='thumb', fmt='jpeg'):
+    """
+    URL of one variant, falling back to the original upload
+    """
+    if not image:
+        return ''
+    entry = get_current_variants(image, derivatives).get(variant)
+    if entry and entry.get(fmt):
+        return image.storage.url(entry[fmt])
+    return image.url
+
+
+@register.simple_tag
+def responsive_image(image, derivatives, variant='card', sizes=None, **attrs):
+    """
+    <picture> with WebP and JPEG srcsets, sized for the given variant.
+    Images without derivatives render as a plain <img> of the original.
+    """
+    if not image:
+        return ''
+    
+    entry = get_current_variants(image, derivatives).get(variant)
+    if not entry:
+        return format_html('<img src="{}"{}>', image.url, flatatt(attrs))
+    
+    sizes = sizes or f"{entry['width']}px"
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}"{}></picture>',
+        srcset(image, derivatives, 'webp'), sizes,
+        image.storage.url(entry['jpeg']), srcset(image, derivatives, 'jpeg'), sizes,
+        entry['width'], entry['height'], flatatt(attrs)
+    )
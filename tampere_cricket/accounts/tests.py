@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import TestCase
+
+from tampere_cricket.cloudinary_fake import FakeCloudinary
+from tampere_cricket.cloudinary_storage import CloudinaryStorage
+
+from .models import StagedUpload
+from .uploads import AvatarUploadQueue
+
+User = get_user_model()
+
+
+class UnreachableCloudinary(FakeCloudinary):
+    """Fails every upload as if the network were down"""
+    
+    def upload(self, file, **options):
+        self._call('upload')
+        raise ConnectionError('Cloudinary unreachable')
+
+
+class AvatarUploadQueueTests(TestCase):
+    """AvatarUploadQueue against the in-memory Cloudinary fake, uploading inline"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='batter', password='x')
+        self.cloudinary = FakeCloudinary()
+    
+    def queue(self, cloudinary=None):
+        return AvatarUploadQueue(storage=CloudinaryStorage(client=cloudinary or self.cloudinary), workers=0)
+    
+    def stage(self, queue, data=b'avatar'):
+        """Stage an upload without letting the queue process it, as if its process died"""
+        staged_name = queue.staging_storage.save(f'{self.user.pk}/me.jpg', ContentFile(data))
+        User.objects.filter(pk=self.user.pk).update(avatar_pending=staged_name)
+        return staged_name
+    
+    def test_upload_swaps_in_the_avatar(self):
+        staged_name = self.queue().submit(self.user, ContentFile(b'avatar', name='me.jpg'))
+        
+        self.user.refresh_from_db()
+        self.assertIn(self.user.avatar.name, self.cloudinary.resources)
+        self.assertEqual(self.cloudinary.resources[self.user.avatar.name]['data'], b'avatar')
+        self.assertEqual(self.user.avatar_pending, '')
+        self.assertFalse(StagedUpload.objects.filter(name=staged_name).exists())
+    
+    def test_failed_upload_keeps_the_staged_file(self):
+        queue = self.queue(UnreachableCloudinary())
+        
+        with self.assertLogs('tampere_cricket.accounts.uploads', 'ERROR'):
+            staged_name = queue.submit(self.user, ContentFile(b'avatar', name='me.jpg'))
+        
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+        self.assertEqual(self.user.avatar_pending, staged_name)
+        self.assertTrue(queue.staging_storage.exists(staged_name))
+        self.assertEqual(queue.metrics.snapshot()['failed'], 1)
+        
+        # Cloudinary is back: the retry uploads the kept file
+        self.assertTrue(self.queue().process(self.user.pk, staged_name))
+        self.user.refresh_from_db()
+        self.assertEqual(self.cloudinary.resources[self.user.avatar.name]['data'], b'avatar')
+    
+    def test_staged_upload_is_finished_after_a_restart(self):
+        staged_name = self.stage(self.queue(), b'before restart')
+        
+        # A fresh queue, as in the process_avatar_uploads worker
+        queue = self.queue()
+        self.assertEqual(queue.process_pending(), (0, 0, 0))
+        staged = StagedUpload.objects.get(name=staged_name)
+        StagedUpload.objects.filter(pk=staged.pk).update(created_at=staged.created_at - timedelta(hours=1))
+        
+        self.assertEqual(queue.process_pending(), (1, 0, 0))
+        
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_pending, '')
+        self.assertEqual(self.cloudinary.resources[self.user.avatar.name]['data'], b'before restart')
+        self.assertFalse(StagedUpload.objects.exists())
+    
+    def test_missing_staged_file_is_cleared(self):
+        queue = self.queue()
+        staged_name = self.stage(queue)
+        queue.staging_storage.delete(staged_name)
+        
+        with self.assertLogs('tampere_cricket.accounts.uploads', 'WARNING'):
+            self.assertEqual(queue.process_pending(timedelta(0)), (0, 0, 1))
+        
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_pending, '')
+        self.assertEqual(self.cloudinary.calls['upload'], 0)
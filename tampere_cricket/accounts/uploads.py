@@ -0,0 +1,240 @@
+"""
+Background avatar uploads
+
+Profile edits stage the uploaded file in the database and return at once; a
+thread pool pushes it to the avatar storage (Cloudinary in production) and
+swaps the user's avatar to the stored name when the upload finishes. Until
+then the previous avatar, or the placeholder, keeps being shown. Uploads the
+pool never finished, because it failed or its process restarted, are picked
+up by the process_avatar_uploads worker.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.db import close_old_connections, transaction
+from django.db.models.functions import Length
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# Uploads run this many at a time; 0 uploads inline, inside the request
+UPLOAD_WORKERS = getattr(settings, 'AVATAR_UPLOAD_WORKERS', 2)
+
+# Staged uploads younger than this are left to the process that queued them
+RETRY_AFTER = timedelta(minutes=2)
+
+
+class DatabaseStagingStorage(Storage):
+    """
+    Keeps staged files in StagedUpload rows. Unlike local disk, they survive a
+    dyno restart and are visible to the worker process.
+    """
+    
+    def _open(self, name, mode='rb'):
+        from .models import StagedUpload
+        
+        try:
+            staged = StagedUpload.objects.get(name=name)
+        except StagedUpload.DoesNotExist:
+            raise FileNotFoundError(f'No staged upload named {name}')
+        return ContentFile(bytes(staged.data), name=name)
+    
+    def _save(self, name, content):
+        from .models import StagedUpload
+        
+        StagedUpload.objects.create(name=name, data=b''.join(content.chunks()))
+        return name
+    
+    def delete(self, name):
+        from .models import StagedUpload
+        StagedUpload.objects.filter(name=name).delete()
+    
+    def exists(self, name):
+        from .models import StagedUpload
+        return StagedUpload.objects.filter(name=name).exists()
+    
+    def size(self, name):
+        from .models import StagedUpload
+        return StagedUpload.objects.filter(name=name).values_list(Length('data'), flat=True).first() or 0
+    
+    def get_created_time(self, name):
+        from .models import StagedUpload
+        return StagedUpload.objects.values_list('created_at', flat=True).get(name=name)
+
+
+class UploadMetrics:
+    """Counters and latency of the uploads made by one process"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = None
+    
+    def queued(self):
+        with self._lock:
+            self.submitted += 1
+    
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+    
+    def finished(self, latency, ok):
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.last_latency = latency
+    
+    def snapshot(self):
+        """Queue depth and upload latency in seconds"""
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                'queue_depth': self.submitted - finished - self.in_flight,
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'avg_latency': round(self.total_latency / finished, 3) if finished else None,
+                'max_latency': round(self.max_latency, 3),
+                'last_latency': round(self.last_latency, 3) if self.last_latency is not None else None,
+            }
+
+
+class AvatarUploadQueue:
+    """
+    Stages avatars in the database and uploads them in the background.
+    storage defaults to the avatar field's storage; pass a CloudinaryStorage
+    wrapping a FakeCloudinary to exercise it without network access.
+    """
+    
+    def __init__(self, storage=None, staging_storage=None, workers=UPLOAD_WORKERS):
+        self._storage = storage
+        self.staging_storage = staging_storage or DatabaseStagingStorage()
+        self.workers = workers
+        self.metrics = UploadMetrics()
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    @property
+    def storage(self):
+        from .models import User
+        return self._storage or User._meta.get_field('avatar').storage
+    
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='avatar-upload')
+            return self._executor
+    
+    def submit(self, user, uploaded_file):
+        """Stage an uploaded avatar and queue its upload; returns the staged name"""
+        from .models import User
+        
+        staged_name = self.staging_storage.save(f'{user.pk}/{os.path.basename(uploaded_file.name)}', uploaded_file)
+        # A newer upload replaces any that is still waiting
+        User.objects.filter(pk=user.pk).update(avatar_pending=staged_name)
+        user.avatar_pending = staged_name
+        
+        self.metrics.queued()
+        if self.workers:
+            # Start only after the request's transaction commits, so the worker sees the pending name
+            transaction.on_commit(lambda: self.get_executor().submit(self.process, user.pk, staged_name))
+        else:
+            self.process(user.pk, staged_name)
+        return staged_name
+    
+    def process(self, user_id, staged_name):
+        """Upload one staged avatar and swap it in; returns the stored name, or None"""
+        from .models import User
+        
+        self.metrics.started()
+        start = time.monotonic()
+        ok = False
+        try:
+            user = User.objects.get(pk=user_id)
+            with self.staging_storage.open(staged_name, 'rb') as staged:
+                name = user.avatar.field.generate_filename(user, os.path.basename(staged_name))
+                stored_name = self.storage.save(name, File(staged, name=os.path.basename(staged_name)))
+            if not stored_name or not self.storage.exists(stored_name):
+                raise OSError(f'{stored_name or name} is missing from storage after its upload')
+            
+            with transaction.atomic():
+                user = User.objects.select_for_update().get(pk=user_id)
+                if user.avatar_pending != staged_name:
+                    # Superseded by a newer upload while this one was running
+                    self.storage.delete(stored_name)
+                    stored_name = None
+                else:
+                    user.avatar = stored_name
+                    user.avatar_pending = ''
+                    # Saving fires the avatar signals, so derivatives are also built off the request
+                    user.save(update_fields=['avatar', 'avatar_pending'])
+            
+            self.staging_storage.delete(staged_name)
+            ok = True
+            return stored_name
+        except Exception:
+            # The staged file is kept, process_avatar_uploads retries it
+            logger.exception('Avatar upload of %s for user %s failed', staged_name, user_id)
+            return None
+        finally:
+            latency = time.monotonic() - start
+            self.metrics.finished(latency, ok)
+            logger.info('Avatar upload of %s took %.2fs (%s)', staged_name, latency, 'ok' if ok else 'failed')
+            if self.workers:
+                close_old_connections()
+    
+    def process_pending(self, retry_after=RETRY_AFTER):
+        """
+        Upload every staged avatar left waiting for longer than retry_after.
+        Returns (uploaded, failed, missing) counts; avatars whose staged file is
+        gone are given up on.
+        """
+        from .models import User
+        
+        cutoff = timezone.now() - retry_after
+        uploaded = failed = missing = 0
+        pending = User.objects.exclude(avatar_pending='').values_list('id', 'avatar_pending')
+        for user_id, staged_name in pending.iterator():
+            if not self.staging_storage.exists(staged_name):
+                User.objects.filter(pk=user_id, avatar_pending=staged_name).update(avatar_pending='')
+                logger.warning('Staged avatar %s of user %s is missing, cleared', staged_name, user_id)
+                missing += 1
+                continue
+            if self.staging_storage.get_created_time(staged_name) > cutoff:
+                continue
+            
+            if self.process(user_id, staged_name):
+                uploaded += 1
+            else:
+                failed += 1
+        return uploaded, failed, missing
+    
+    def shutdown(self, wait=True):
+        """Finish queued uploads and stop the workers"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+avatar_uploads = AvatarUploadQueue()
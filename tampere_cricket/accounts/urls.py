@@ -5,6 +5,7 @@ urlpatterns = [
     path('signup/', views.signup, name='signup'),
     path('profile/', views.profile, name='profile'),
     path('profile/<int:user_id>/', views.profile, name='public_profile'),
+    path('profile/<int:user_id>/head-to-head/', views.head_to_head_api, name='head_to_head_api'),
     path('profile/edit/', views.profile_edit, name='profile_edit'),
     path('change-password/', views.change_password, name='change_password'),
     path('player-stats/', views.player_stats, name='player_stats'),
@@ -11,6 +11,7 @@ from django.views.decorators.http import require_http_methods
 import json
 from .models import User, Profile
 from .forms import RegistrationForm, CustomAuthenticationForm, ProfileEditForm, PasswordChangeForm
+from tampere_cricket.admin_stats.models import HeadToHead
 
 
 def signup(request):
@@ -110,6 +111,9 @@ def profile(request, user_id=None):
     # Get user's current rank (only if they've played matches)
     user_rank = user_profile.get_rank() if user_profile.matches_played > 0 else None
     
+    # Head-to-head record against the most frequent opponents
+    head_to_head = HeadToHead.objects.filter(player=profile_user).select_related('opponent')[:10]
+    
     # Check if profile is incomplete (for popup display)
     is_profile_incomplete = False
     if is_own_profile:
@@ -155,6 +159,7 @@ def profile(request, user_id=None):
         'user': profile_user,
         'profile': user_profile,
         'recent_matches': recent_matches,
+        'head_to_head': head_to_head,
         'user_rank': user_rank,
         'is_own_profile': is_own_profile,
         'is_profile_incomplete': is_profile_incomplete,
@@ -215,6 +220,41 @@ def player_stats(request):
     })
 
 
+@require_http_methods(["GET"])
+def head_to_head_api(request, user_id):
+    """API endpoint for a player's head-to-head record, optionally against one opponent"""
+    player = get_object_or_404(User, id=user_id)
+    records = HeadToHead.objects.filter(player=player).select_related('opponent')
+    
+    opponent_id = request.GET.get('opponent')
+    if opponent_id:
+        if not opponent_id.isdigit():
+            return JsonResponse({'error': 'Invalid opponent'}, status=400)
+        records = records.filter(opponent_id=opponent_id)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    
+    return JsonResponse({
+        'player': {'id': player.id, 'username': player.username},
+        'head_to_head': [
+            {
+                'opponent': {'id': record.opponent_id, 'username': record.opponent.username},
+                'matches': record.matches,
+                'wins': record.wins,
+                'losses': record.losses,
+                'draws': record.draws,
+                'runs': record.runs,
+                'wickets': record.wickets,
+                'last_played_at': record.last_played_at.isoformat() if record.last_played_at else None,
+            }
+            for record in records[:limit]
+        ],
+    })
+
+
 @require_http_methods(["POST"])
 def check_username(request):
     """Check if username is available"""
@@ -0,0 +1,100 @@
+"""
+Vectorized player analytics for the admin statistics
+"""
+import numpy as np
+from django.utils import timezone
+
+from .models import MatchStatistics, PlayerStatistics
+
+
+# A wicket is worth this many runs when combining batting and bowling
+WICKET_POINTS = 20
+
+# Weight multiplier applied per older match for the recent form rating
+FORM_DECAY = 0.8
+
+
+def load_match_arrays():
+    """Load per-match arrays for every player in one query, sorted by player then date"""
+    rows = list(MatchStatistics.objects.order_by('user_id', 'match_date', 'id').values_list(
+        'user_id', 'match_id', 'runs_scored', 'wickets_taken'
+    ))
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty, empty
+    data = np.array(rows, dtype=np.int64)
+    return data[:, 0], data[:, 1], data[:, 2], data[:, 3]
+
+
+def compute_player_ratings(user_ids, match_ids, runs, wickets):
+    """Compute consistency, contribution and form ratings for all players at once.
+    
+    Input arrays hold one entry per player per match and must be sorted by
+    player and then by match date. Returns the sorted unique player ids and
+    one rating array per metric:
+    
+    - consistency: 100 / (1 + coefficient of variation) of match points
+    - contribution: share of each match's combined points, scaled so an
+      equal share of the match scores 50
+    - form: exponentially decayed average of match points, most recent first
+    """
+    points = runs.astype(np.float64) + wickets * WICKET_POINTS
+    players, player_idx, match_counts = np.unique(user_ids, return_inverse=True, return_counts=True)
+    _, match_idx = np.unique(match_ids, return_inverse=True)
+    
+    # Consistency from per-player variance of match points
+    mean = np.bincount(player_idx, weights=points) / match_counts
+    mean_square = np.bincount(player_idx, weights=points ** 2) / match_counts
+    std = np.sqrt(np.maximum(mean_square - mean ** 2, 0.0))
+    cv = np.divide(std, mean, out=np.zeros_like(mean), where=mean > 0)
+    consistency = np.where((match_counts > 1) & (mean > 0), 100.0 / (1.0 + cv), 0.0)
+    
+    # Contribution as share of everything scored in the match
+    match_points = np.bincount(match_idx, weights=points)[match_idx]
+    participants = np.bincount(match_idx)[match_idx]
+    share = np.divide(points, match_points, out=np.zeros_like(points), where=match_points > 0)
+    contribution = np.bincount(player_idx, weights=share * participants) / match_counts * 50.0
+    
+    # Recent form weights each player's latest match 1, the one before FORM_DECAY, ...
+    group_end = np.cumsum(match_counts)[player_idx]
+    age = group_end - 1 - np.arange(len(points))
+    weights = FORM_DECAY ** age
+    form = np.bincount(player_idx, weights=weights * points) / np.bincount(player_idx, weights=weights)
+    
+    return players, np.round(consistency, 2), np.round(contribution, 2), np.round(form, 2)
+
+
+def update_player_ratings(batch_size=1000):
+    """Recompute ratings for the whole league and write them back in bulk"""
+    user_ids, match_ids, runs, wickets = load_match_arrays()
+    if not len(user_ids):
+        return 0
+    
+    players, consistency, contribution, form = compute_player_ratings(user_ids, match_ids, runs, wickets)
+    
+    existing = dict(PlayerStatistics.objects.filter(user_id__in=players.tolist()).values_list('user_id', 'id'))
+    PlayerStatistics.objects.bulk_create([
+        PlayerStatistics(user_id=user_id) for user_id in players.tolist() if user_id not in existing
+    ], batch_size=batch_size)
+    if len(existing) < len(players):
+        existing = dict(PlayerStatistics.objects.filter(user_id__in=players.tolist()).values_list('user_id', 'id'))
+    
+    now = timezone.now()
+    updates = [
+        PlayerStatistics(
+            id=existing[user_id],
+            consistency_rating=consistency_rating,
+            contribution_rating=contribution_rating,
+            recent_form_rating=form_rating,
+            last_updated=now,
+        )
+        for user_id, consistency_rating, contribution_rating, form_rating in zip(
+            players.tolist(), consistency.tolist(), contribution.tolist(), form.tolist()
+        )
+    ]
+    PlayerStatistics.objects.bulk_update(
+        updates,
+        ['consistency_rating', 'contribution_rating', 'recent_form_rating', 'last_updated'],
+        batch_size=batch_size,
+    )
+    return len(updates)
@@ -5,3 +5,6 @@ class AdminStatsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tampere_cricket.admin_stats'
     verbose_name = 'Admin Statistics'
+    
+    def ready(self):
+        import tampere_cricket.admin_stats.signals
@@ -1,187 +1,265 @@
+import time
+
 from django.core.management.base import BaseCommand
-from django.db.models import Sum, Count, Avg, Max
+from django.db import transaction
+from django.db.models import Sum, Count, Max, Min, Q
 from django.utils import timezone
-from datetime import datetime, timedelta
 
-from tampere_cricket.admin_stats.models import MatchStatistics, PlayerStatistics, GroundStatistics
-from tampere_cricket.accounts.models import User, Profile
-from tampere_cricket.matches.models import Challenge
-from tampere_cricket.grounds.models import Ground
+from tampere_cricket.admin_stats.models import (
+    MatchStatistics, PlayerStatistics, GroundStatistics, SeasonStatistics,
+    CricketRecord, HeadToHead, HeadToHeadMatch, StatisticsCheckpoint,
+)
+from tampere_cricket.admin_stats.analytics import update_player_ratings
+from tampere_cricket.matches.models import MatchResult
 
 
 class Command(BaseCommand):
-    help = 'Populate admin statistics from existing data'
+    help = 'Derive admin statistics from match results (incremental by default)'
+
+    checkpoint_name = 'match_statistics'
+    update_fields = MatchStatistics.SYNC_FIELDS + ['updated_at']
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Reprocess every match result instead of only those changed since the last run',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of match results loaded per bulk write',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write('Starting statistics population...')
         
-        # Create match statistics from existing challenges
-        self.create_match_statistics()
+        self.affected_users = set()
+        self.affected_grounds = set()
+        self.affected_pairs = set()
         
-        # Create player statistics
-        self.create_player_statistics()
+        changed = self.load_match_statistics(options['full'], options['batch_size'])
         
-        # Create ground statistics
-        self.create_ground_statistics()
+        if changed:
+            # Bulk writes bypass the MatchStatistics signals, so refresh the
+            # rollups built on top of them once per run
+            self.update_player_statistics()
+            update_player_ratings()
+            self.update_ground_statistics()
+            if options['full']:
+                HeadToHead.rebuild()
+            else:
+                HeadToHead.refresh_pairs(self.affected_pairs)
+            CricketRecord.rebuild()
+            for season in SeasonStatistics.objects.filter(is_closed=False):
+                season.compute_statistics()
         
         self.stdout.write(
             self.style.SUCCESS('Successfully populated all statistics!')
         )
 
-    def create_match_statistics(self):
-        """Create match statistics from existing challenges"""
-        self.stdout.write('Creating match statistics...')
-        
-        challenges = Challenge.objects.all()
-        created_count = 0
-        
-        for challenge in challenges:
-            # Create statistics for challenger
-            if challenge.challenger and not MatchStatistics.objects.filter(
-                user=challenge.challenger, match=challenge
-            ).exists():
-                MatchStatistics.objects.create(
-                    user=challenge.challenger,
-                    match=challenge,
-                    runs_scored=self.generate_random_runs(),
-                    balls_faced=self.generate_random_balls(),
-                    fours=self.generate_random_fours(),
-                    sixes=self.generate_random_sixes(),
-                    overs_bowled=self.generate_random_overs(),
-                    runs_conceded=self.generate_random_runs_conceded(),
-                    wickets_taken=self.generate_random_wickets(),
-                    catches=self.generate_random_catches(),
-                    match_date=challenge.created_at,
-                    ground=challenge.ground,
-                    opponent=challenge.challenged,
-                    result='WON' if challenge.status == 'completed' and challenge.winner == challenge.challenger else 'LOST',
-                    performance_rating=self.calculate_performance_rating(),
-                    contribution_score=self.calculate_contribution_score()
-                )
-                created_count += 1
-            
-            # Create statistics for challenged player
-            if challenge.challenged and not MatchStatistics.objects.filter(
-                user=challenge.challenged, match=challenge
-            ).exists():
-                MatchStatistics.objects.create(
-                    user=challenge.challenged,
-                    match=challenge,
-                    runs_scored=self.generate_random_runs(),
-                    balls_faced=self.generate_random_balls(),
-                    fours=self.generate_random_fours(),
-                    sixes=self.generate_random_sixes(),
-                    overs_bowled=self.generate_random_overs(),
-                    runs_conceded=self.generate_random_runs_conceded(),
-                    wickets_taken=self.generate_random_wickets(),
-                    catches=self.generate_random_catches(),
-                    match_date=challenge.created_at,
-                    ground=challenge.ground,
-                    opponent=challenge.challenger,
-                    result='WON' if challenge.status == 'completed' and challenge.winner == challenge.challenged else 'LOST',
-                    performance_rating=self.calculate_performance_rating(),
-                    contribution_score=self.calculate_contribution_score()
-                )
-                created_count += 1
-        
-        self.stdout.write(f'Created {created_count} match statistics')
-
-    def create_player_statistics(self):
-        """Create player statistics for all users"""
-        self.stdout.write('Creating player statistics...')
+    def load_match_statistics(self, full, batch_size):
+        """Upsert per-player match statistics from match results"""
+        checkpoint, _ = StatisticsCheckpoint.objects.get_or_create(name=self.checkpoint_name)
+        run_started_at = timezone.now()
+        
+        results = MatchResult.objects.select_related('challenge').order_by('updated_at', 'id')
+        
+        if full or not checkpoint.high_water_mark:
+            self.stdout.write('Running full backfill of match statistics...')
+            results = results.filter(challenge__status='COMPLETED')
+        else:
+            # Winner changes only touch the challenge, so watch both timestamps.
+            # Changed results of challenges that are no longer completed are
+            # loaded too, so load_batch deletes their rows.
+            high_water_mark = checkpoint.high_water_mark
+            results = results.filter(
+                Q(updated_at__gte=high_water_mark) | Q(challenge__completed_at__gte=high_water_mark)
+            )
+            self.stdout.write(f'Loading match results changed since {high_water_mark:%Y-%m-%d %H:%M:%S}...')
         
-        users = User.active_objects()
-        created_count = 0
+        started = time.monotonic()
+        processed = created_count = updated_count = deleted_count = 0
+        batch = []
+        for match_result in results.iterator(chunk_size=batch_size):
+            batch.append(match_result)
+            if len(batch) >= batch_size:
+                created, updated, deleted = self.load_batch(batch)
+                processed += len(batch)
+                created_count += created
+                updated_count += updated
+                deleted_count += deleted
+                batch = []
+        if batch:
+            created, updated, deleted = self.load_batch(batch)
+            processed += len(batch)
+            created_count += created
+            updated_count += updated
+            deleted_count += deleted
         
-        for user in users:
-            if not PlayerStatistics.objects.filter(user=user).exists():
-                player_stats = PlayerStatistics.objects.create(user=user)
-                player_stats.update_statistics()
-                created_count += 1
+        # Deleted results and un-completed challenges leave no changed result
+        # behind, so their rows are found from the statistics side every run
+        deleted_count += self.delete_orphaned_statistics()
         
-        self.stdout.write(f'Created {created_count} player statistics')
+        elapsed = time.monotonic() - started
+        rate = processed / elapsed if elapsed > 0 else 0
+        
+        checkpoint.high_water_mark = run_started_at
+        checkpoint.rows_processed = processed
+        checkpoint.last_run_at = timezone.now()
+        checkpoint.save()
+        
+        self.stdout.write(
+            f'Processed {processed} match results: {created_count} created, '
+            f'{updated_count} updated, {deleted_count} deleted '
+            f'in {elapsed:.2f}s ({rate:.0f} rows/s)'
+        )
+        return created_count + updated_count + deleted_count
 
-    def create_ground_statistics(self):
-        """Create ground statistics for all grounds"""
-        self.stdout.write('Creating ground statistics...')
+    def load_batch(self, match_results):
+        """Write one batch of match results with bulk_create/bulk_update"""
+        match_ids = [match_result.challenge_id for match_result in match_results]
+        existing = {
+            (row.user_id, row.match_id): row
+            for row in MatchStatistics.objects.filter(match_id__in=match_ids)
+        }
         
-        grounds = Ground.objects.all()
-        created_count = 0
+        existing_pairings = {
+            (row.user_id, row.opponent_id, row.match_id): row
+            for row in HeadToHeadMatch.objects.filter(match_id__in=match_ids)
+        }
         
-        for ground in grounds:
-            if not GroundStatistics.objects.filter(ground=ground).exists():
-                match_stats = MatchStatistics.objects.filter(ground=ground)
+        to_create = []
+        to_update = []
+        derived_keys = set()
+        pairings_to_create = []
+        pairings_to_update = []
+        derived_pairings = set()
+        for match_result in match_results:
+            if match_result.challenge.status != 'COMPLETED':
+                continue
+            for pairing in HeadToHeadMatch.build_from_match_result(match_result):
+                key = (pairing.user_id, pairing.opponent_id, pairing.match_id)
+                derived_pairings.add(key)
+                self.affected_pairs.add(key[:2])
                 
-                total_matches = match_stats.count()
-                total_runs = match_stats.aggregate(Sum('runs_scored'))['runs_scored__sum'] or 0
-                total_wickets = match_stats.aggregate(Sum('wickets_taken'))['wickets_taken__sum'] or 0
-                average_score = round(total_runs / total_matches, 2) if total_matches > 0 else 0
+                current = existing_pairings.get(key)
+                if current is None:
+                    pairings_to_create.append(pairing)
+                elif current.get_sync_values() != pairing.get_sync_values():
+                    pairing.pk = current.pk
+                    pairings_to_update.append(pairing)
+            
+            for row in MatchStatistics.build_from_match_result(match_result):
+                key = (row.user_id, row.match_id)
+                derived_keys.add(key)
+                self.affected_users.add(row.user_id)
+                if row.ground_id:
+                    self.affected_grounds.add(row.ground_id)
                 
-                GroundStatistics.objects.create(
-                    ground=ground,
-                    total_matches=total_matches,
-                    total_runs_scored=total_runs,
-                    total_wickets=total_wickets,
-                    average_score=average_score,
-                    highest_score=match_stats.aggregate(Max('runs_scored'))['runs_scored__max'] or 0,
-                    lowest_score=match_stats.aggregate(Max('runs_scored'))['runs_scored__max'] or 0,
-                    batting_friendly_rating=self.calculate_ground_rating(total_runs, total_matches),
-                    bowling_friendly_rating=self.calculate_ground_rating(total_wickets, total_matches),
-                    overall_rating=self.calculate_overall_rating(total_runs, total_wickets, total_matches)
-                )
-                created_count += 1
-        
-        self.stdout.write(f'Created {created_count} ground statistics')
-
-    def generate_random_runs(self):
-        """Generate random runs (0-100)"""
-        import random
-        return random.randint(0, 100)
-
-    def generate_random_balls(self):
-        """Generate random balls faced (0-60)"""
-        import random
-        return random.randint(0, 60)
-
-    def generate_random_fours(self):
-        """Generate random fours (0-10)"""
-        import random
-        return random.randint(0, 10)
-
-    def generate_random_sixes(self):
-        """Generate random sixes (0-5)"""
-        import random
-        return random.randint(0, 5)
-
-    def generate_random_overs(self):
-        """Generate random overs bowled (0-10)"""
-        import random
-        return round(random.uniform(0, 10), 1)
-
-    def generate_random_runs_conceded(self):
-        """Generate random runs conceded (0-50)"""
-        import random
-        return random.randint(0, 50)
-
-    def generate_random_wickets(self):
-        """Generate random wickets (0-5)"""
-        import random
-        return random.randint(0, 5)
+                current = existing.get(key)
+                if current is None:
+                    to_create.append(row)
+                elif current.get_sync_values() != row.get_sync_values():
+                    row.pk = current.pk
+                    row.created_at = current.created_at
+                    row.updated_at = timezone.now()
+                    to_update.append(row)
+        
+        # Participants removed from a challenge lose their derived rows
+        stale_ids = [row.pk for key, row in existing.items() if key not in derived_keys]
+        self.affected_users.update(key[0] for key in existing if key not in derived_keys)
+        stale_pairing_ids = [row.pk for key, row in existing_pairings.items() if key not in derived_pairings]
+        self.affected_pairs.update(key[:2] for key in existing_pairings if key not in derived_pairings)
+        
+        with transaction.atomic():
+            MatchStatistics.objects.bulk_create(to_create)
+            if to_update:
+                MatchStatistics.objects.bulk_update(to_update, self.update_fields, batch_size=len(to_update))
+            if stale_ids:
+                MatchStatistics.objects.filter(pk__in=stale_ids).delete()
+            HeadToHeadMatch.objects.bulk_create(pairings_to_create)
+            if pairings_to_update:
+                HeadToHeadMatch.objects.bulk_update(pairings_to_update, HeadToHeadMatch.SYNC_FIELDS)
+            if stale_pairing_ids:
+                HeadToHeadMatch.objects.filter(pk__in=stale_pairing_ids).delete()
+        
+        return len(to_create), len(to_update), len(stale_ids)
 
-    def generate_random_catches(self):
-        """Generate random catches (0-3)"""
-        import random
-        return random.randint(0, 3)
+    def delete_orphaned_statistics(self):
+        """Remove rows that no completed match result backs"""
+        orphaned = MatchStatistics.objects.exclude(
+            match__status='COMPLETED', match__match_result__isnull=False
+        )
+        for user_id, ground_id in orphaned.values_list('user_id', 'ground_id'):
+            self.affected_users.add(user_id)
+            if ground_id:
+                self.affected_grounds.add(ground_id)
+        deleted, _ = orphaned.delete()
+        
+        orphaned_pairings = HeadToHeadMatch.objects.exclude(
+            match__status='COMPLETED', match__match_result__isnull=False
+        )
+        self.affected_pairs.update(orphaned_pairings.values_list('user_id', 'opponent_id').distinct())
+        orphaned_pairings.delete()
+        return deleted
 
-    def calculate_performance_rating(self):
-        """Calculate performance rating (0-100)"""
-        import random
-        return round(random.uniform(50, 100), 1)
+    def update_player_statistics(self):
+        """Refresh player statistics for users touched by this run"""
+        self.stdout.write('Updating player statistics...')
+        
+        existing = set(PlayerStatistics.objects.filter(
+            user_id__in=self.affected_users
+        ).values_list('user_id', flat=True))
+        PlayerStatistics.objects.bulk_create([
+            PlayerStatistics(user_id=user_id)
+            for user_id in self.affected_users if user_id not in existing
+        ])
+        
+        updated_count = 0
+        for player_stats in PlayerStatistics.objects.filter(user_id__in=self.affected_users):
+            player_stats.update_statistics()
+            updated_count += 1
+        
+        self.stdout.write(f'Updated {updated_count} player statistics')
 
-    def calculate_contribution_score(self):
-        """Calculate contribution score (0-100)"""
-        import random
-        return round(random.uniform(30, 90), 1)
+    def update_ground_statistics(self):
+        """Refresh ground statistics for grounds touched by this run"""
+        self.stdout.write('Updating ground statistics...')
+        
+        ground_totals = MatchStatistics.objects.filter(
+            ground_id__in=self.affected_grounds
+        ).values('ground_id').annotate(
+            total_matches=Count('match', distinct=True),
+            total_runs=Sum('runs_scored'),
+            total_wickets=Sum('wickets_taken'),
+            highest_score=Max('runs_scored'),
+            lowest_score=Min('runs_scored'),
+        )
+        
+        updated_count = 0
+        for totals in ground_totals:
+            total_matches = totals['total_matches']
+            total_runs = totals['total_runs'] or 0
+            total_wickets = totals['total_wickets'] or 0
+            GroundStatistics.objects.update_or_create(
+                ground_id=totals['ground_id'],
+                defaults={
+                    'total_matches': total_matches,
+                    'total_runs_scored': total_runs,
+                    'total_wickets': total_wickets,
+                    'average_score': round(total_runs / total_matches, 2) if total_matches > 0 else 0,
+                    'highest_score': totals['highest_score'] or 0,
+                    'lowest_score': totals['lowest_score'] or 0,
+                    'batting_friendly_rating': self.calculate_ground_rating(total_runs, total_matches),
+                    'bowling_friendly_rating': self.calculate_ground_rating(total_wickets, total_matches),
+                    'overall_rating': self.calculate_overall_rating(total_runs, total_wickets, total_matches),
+                }
+            )
+            updated_count += 1
+        
+        self.stdout.write(f'Updated {updated_count} ground statistics')
 
     def calculate_ground_rating(self, total, matches):
         """Calculate ground rating based on total and matches"""
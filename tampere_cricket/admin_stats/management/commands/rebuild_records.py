@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from tampere_cricket.admin_stats.models import CricketRecord
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the records book from all match statistics'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding cricket records...')
+        
+        records = CricketRecord.rebuild()
+        
+        for record in records.values():
+            holder = record.holder.username if record.holder else 'No holder'
+            self.stdout.write(f'{record.get_record_type_display()}: {record.display_value or "-"} ({holder})')
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {len(records)} records!')
+        )
@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from tampere_cricket.admin_stats.analytics import compute_player_ratings, update_player_ratings
+
+
+class Command(BaseCommand):
+    help = 'Compute consistency, contribution and form ratings for all players'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--benchmark',
+            action='store_true',
+            help='Time the rating computation on synthetic data instead of updating the database',
+        )
+        parser.add_argument('--players', type=int, default=10000, help='Synthetic players for --benchmark')
+        parser.add_argument('--matches', type=int, default=100, help='Synthetic matches per player for --benchmark')
+
+    def handle(self, *args, **options):
+        if options['benchmark']:
+            self.run_benchmark(options['players'], options['matches'])
+            return
+        
+        started = time.monotonic()
+        updated_count = update_player_ratings()
+        elapsed = time.monotonic() - started
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated ratings for {updated_count} players in {elapsed:.2f}s')
+        )
+
+    def run_benchmark(self, players, matches):
+        """Time compute_player_ratings on a synthetic league"""
+        rng = np.random.default_rng(0)
+        rows = players * matches
+        
+        user_ids = np.repeat(np.arange(players), matches)
+        # Pair rows into two-player matches
+        match_ids = rng.permutation(rows) // 2
+        runs = rng.integers(0, 60, size=rows)
+        wickets = rng.integers(0, 5, size=rows)
+        
+        self.stdout.write(f'Benchmarking {players} players x {matches} matches ({rows} rows)...')
+        started = time.perf_counter()
+        compute_player_ratings(user_ids, match_ids, runs, wickets)
+        elapsed = time.perf_counter() - started
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Computed ratings in {elapsed:.3f}s ({rows / elapsed:,.0f} rows/s)')
+        )
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from tampere_cricket.admin_stats.models import SeasonStatistics
+
+
+class Command(BaseCommand):
+    help = 'Compute season statistics from match statistics and optionally close seasons'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--season-id',
+            type=int,
+            help='Compute statistics for a specific season ID only',
+        )
+        parser.add_argument(
+            '--close',
+            action='store_true',
+            help='Freeze the selected seasons after computing their final statistics',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recompute closed seasons as well',
+        )
+
+    def handle(self, *args, **options):
+        seasons = SeasonStatistics.objects.all()
+        if options['season_id']:
+            seasons = seasons.filter(id=options['season_id'])
+            if not seasons.exists():
+                self.stdout.write(
+                    self.style.ERROR(f'Season with ID {options["season_id"]} not found')
+                )
+                return
+        
+        computed_count = 0
+        skipped_count = 0
+        for season in seasons:
+            if options['close']:
+                season.close()
+                computed_count += 1
+                self.stdout.write(f'Closed {season.season_name}: {season.total_matches} matches, {season.total_runs} runs')
+            elif season.compute_statistics(force=options['force']):
+                computed_count += 1
+                self.stdout.write(f'Computed {season.season_name}: {season.total_matches} matches, {season.total_runs} runs')
+            else:
+                skipped_count += 1
+                self.stdout.write(f'Skipped closed season {season.season_name}')
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Computed {computed_count} seasons, skipped {skipped_count} closed seasons')
+        )
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_stats', '0001_initial'),
+        ('grounds', '0003_remove_ground_address_remove_ground_lat_and_more'),
+        ('matches', '0010_alter_challenge_duration'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seasonstatistics',
+            name='is_closed',
+            field=models.BooleanField(default=False, help_text="Freeze this season's statistics"),
+        ),
+        migrations.AddField(
+            model_name='seasonstatistics',
+            name='last_computed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='seasonstatistics',
+            name='most_runs_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='seasonstatistics',
+            name='most_wickets_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='matchstatistics',
+            index=models.Index(fields=['match_date'], name='matchstats_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchstatistics',
+            index=models.Index(fields=['user', 'match_date'], name='matchstats_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='seasonstatistics',
+            index=models.Index(fields=['is_closed', 'start_date', 'end_date'], name='season_open_range_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_stats', '0002_season_statistics_engine'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CricketRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_type', models.CharField(choices=[('HIGHEST_SCORE', 'Highest Individual Score'), ('BEST_BOWLING', 'Best Bowling Figures'), ('MOST_SIXES', 'Most Sixes in a Match'), ('FASTEST_SCORING', 'Fastest Scoring'), ('LONGEST_WIN_STREAK', 'Longest Win Streak')], max_length=30, unique=True)),
+                ('value', models.FloatField(default=0.0)),
+                ('tiebreak_value', models.FloatField(default=0.0, help_text='Lower is better, e.g. runs conceded for bowling figures')),
+                ('display_value', models.CharField(blank=True, max_length=20)),
+                ('achieved_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('holder', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cricket_records', to=settings.AUTH_USER_MODEL)),
+                ('match_stat', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='records', to='admin_stats.matchstatistics')),
+            ],
+            options={
+                'verbose_name': 'Cricket Record',
+                'verbose_name_plural': 'Cricket Records',
+                'ordering': ['record_type'],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_stats', '0003_cricketrecord'),
+        ('grounds', '0003_remove_ground_address_remove_ground_lat_and_more'),
+        ('matches', '0011_matchresult_updated_challenge_completed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatisticsCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('high_water_mark', models.DateTimeField(blank=True, null=True)),
+                ('rows_processed', models.PositiveIntegerField(default=0)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Statistics Checkpoint',
+                'verbose_name_plural': 'Statistics Checkpoints',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='matchstatistics',
+            constraint=models.UniqueConstraint(fields=('user', 'match'), name='matchstats_unique_user_match'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_stats', '0004_statistics_etl'),
+        ('grounds', '0003_remove_ground_address_remove_ground_lat_and_more'),
+        ('matches', '0011_matchresult_updated_challenge_completed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadToHead',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('matches', models.PositiveIntegerField(default=0)),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('draws', models.PositiveIntegerField(default=0)),
+                ('runs', models.PositiveIntegerField(default=0)),
+                ('wickets', models.PositiveIntegerField(default=0)),
+                ('last_played_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Head to Head',
+                'verbose_name_plural': 'Head to Head',
+                'ordering': ['-matches', 'opponent_id'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='matchstatistics',
+            index=models.Index(fields=['user', 'opponent'], name='matchstats_user_opponent_idx'),
+        ),
+        migrations.AddField(
+            model_name='headtohead',
+            name='opponent',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head_against', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='headtohead',
+            name='player',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='headtohead',
+            index=models.Index(fields=['player', '-matches'], name='headtohead_player_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='headtohead',
+            constraint=models.UniqueConstraint(fields=('player', 'opponent'), name='headtohead_unique_pair'),
+        ),
+    ]
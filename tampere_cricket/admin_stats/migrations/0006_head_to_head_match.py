@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_match_statistics(apps, schema_editor):
+    """
+    Seed one pairing per existing match statistics row. This is exact for
+    regular challenges; run populate_stats --full to split the merged rows of
+    single wicket players who batted and bowled.
+    """
+    MatchStatistics = apps.get_model('admin_stats', 'MatchStatistics')
+    HeadToHeadMatch = apps.get_model('admin_stats', 'HeadToHeadMatch')
+    rows = MatchStatistics.objects.filter(opponent__isnull=False).exclude(opponent=models.F('user')).values(
+        'user_id', 'opponent_id', 'match_id', 'match_date', 'result', 'runs_scored', 'wickets_taken'
+    )
+    HeadToHeadMatch.objects.bulk_create((HeadToHeadMatch(**row) for row in rows.iterator()), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_stats', '0005_head_to_head'),
+        ('matches', '0012_challenge_status_scheduled_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeadToHeadMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('match_date', models.DateTimeField()),
+                ('result', models.CharField(choices=[('WON', 'Won'), ('LOST', 'Lost'), ('DRAW', 'Draw'), ('TIE', 'Tie')], max_length=10)),
+                ('runs_scored', models.PositiveIntegerField(default=0)),
+                ('wickets_taken', models.PositiveIntegerField(default=0)),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head_matches', to='matches.challenge')),
+                ('opponent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head_matches_against', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='head_to_head_matches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Head to Head Match',
+                'verbose_name_plural': 'Head to Head Matches',
+                'indexes': [models.Index(fields=['user', 'opponent'], name='headtoheadmatch_pair_idx')],
+                'constraints': [models.UniqueConstraint(fields=('match', 'user', 'opponent'), name='headtoheadmatch_unique_pairing')],
+            },
+        ),
+        migrations.RunPython(copy_match_statistics, migrations.RunPython.noop),
+    ]
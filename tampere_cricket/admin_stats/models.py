@@ -1,8 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Avg, Sum, Count, Q, F
+from django.db.models import Avg, Sum, Count, Q, F, Max
+from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
+from datetime import datetime, time, timedelta
 
 User = get_user_model()
 
@@ -56,6 +58,14 @@ class MatchStatistics(models.Model):
         ordering = ['-match_date']
         verbose_name = 'Match Statistics'
         verbose_name_plural = 'Match Statistics'
+        indexes = [
+            models.Index(fields=['match_date'], name='matchstats_date_idx'),
+            models.Index(fields=['user', 'match_date'], name='matchstats_user_date_idx'),
+            models.Index(fields=['user', 'opponent'], name='matchstats_user_opponent_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'match'], name='matchstats_unique_user_match'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.match_date.strftime('%Y-%m-%d')}"
@@ -83,6 +93,237 @@ class MatchStatistics(models.Model):
         if self.overs_bowled > 0:
             return round(self.runs_conceded / self.overs_bowled, 2)
         return 0.0
+    
+    # Fields derived from MatchResult and rewritten when a result changes
+    SYNC_FIELDS = [
+        'match_date', 'ground', 'opponent', 'result',
+        'runs_scored', 'balls_faced', 'fours', 'sixes', 'strike_rate', 'batting_average',
+        'overs_bowled', 'runs_conceded', 'wickets_taken', 'bowling_average',
+        'economy_rate', 'bowling_strike_rate',
+    ]
+    
+    def get_sync_values(self):
+        """Values compared to decide whether a derived row needs rewriting"""
+        return tuple(getattr(self, self._meta.get_field(field).attname) for field in self.SYNC_FIELDS)
+    
+    def calculate_derived_fields(self):
+        """Fill rates and averages from the raw counting stats"""
+        self.strike_rate = self.calculate_strike_rate()
+        self.batting_average = self.calculate_batting_average()
+        self.bowling_average = self.calculate_bowling_average()
+        self.economy_rate = self.calculate_economy_rate()
+        if self.wickets_taken > 0:
+            self.bowling_strike_rate = round((self.overs_bowled * 6) / self.wickets_taken, 2)
+        else:
+            self.bowling_strike_rate = 0.0
+    
+    @classmethod
+    def get_roles(cls, match_result):
+        """Who played which part in a MatchResult.
+        
+        Returns (roles, results): roles is a list of (user_id, own team,
+        opposing team, batting?, bowling?, opponent_id) and results maps each
+        user to WON, LOST or DRAW. Regular challenges map the challenger_* and
+        opponent_* columns to the two players. Single wicket challenges map
+        challenger_* to team 1 and opponent_* to team 2, each batter facing
+        the other team's bowler.
+        """
+        challenge = match_result.challenge
+        team1 = {
+            'runs': match_result.challenger_runs,
+            'wickets': match_result.challenger_wickets,
+            'sixes': match_result.challenger_sixes,
+            'fours': match_result.challenger_fours,
+        }
+        team2 = {
+            'runs': match_result.opponent_runs,
+            'wickets': match_result.opponent_wickets,
+            'sixes': match_result.opponent_sixes,
+            'fours': match_result.opponent_fours,
+        }
+        
+        if challenge.challenge_type == 'SINGLE_WICKET':
+            roles = [
+                (challenge.team1_batter_id, team1, team2, True, False, challenge.team2_bowler_id),
+                (challenge.team1_bowler_id, team1, team2, False, True, challenge.team2_batter_id),
+                (challenge.team2_batter_id, team2, team1, True, False, challenge.team1_bowler_id),
+                (challenge.team2_bowler_id, team2, team1, False, True, challenge.team1_batter_id),
+            ]
+            teams = {
+                challenge.team1_batter_id: 1, challenge.team1_bowler_id: 1,
+                challenge.team2_batter_id: 2, challenge.team2_bowler_id: 2,
+            }
+            winner_team = teams.get(challenge.winner_id)
+        else:
+            roles = [
+                (challenge.challenger_id, team1, team2, True, True, challenge.opponent_id),
+                (challenge.opponent_id, team2, team1, True, True, challenge.challenger_id),
+            ]
+            winner_team = None
+        roles = [role for role in roles if role[0]]
+        
+        results = {}
+        for user_id, *_ in roles:
+            if challenge.winner_id is None:
+                results[user_id] = 'DRAW'
+            elif winner_team is not None:
+                results[user_id] = 'WON' if teams.get(user_id) == winner_team else 'LOST'
+            else:
+                results[user_id] = 'WON' if challenge.winner_id == user_id else 'LOST'
+        return roles, results
+    
+    @classmethod
+    def get_match_date(cls, match_result):
+        challenge = match_result.challenge
+        return challenge.completed_at or challenge.scheduled_at or match_result.created_at
+    
+    @classmethod
+    def build_from_match_result(cls, match_result):
+        """Derive unsaved per-player rows from a MatchResult.
+        
+        Batters take runs, sixes and fours and bowlers take wickets and the
+        runs conceded to the other batter, see get_roles. A player holding
+        several roles gets one merged row, whose opponent is that of their
+        first role; HeadToHeadMatch keeps every pairing. Balls faced and overs
+        bowled are taken from the challenge's over count.
+        """
+        challenge = match_result.challenge
+        match_date = cls.get_match_date(match_result)
+        overs = challenge.over_count or match_result.total_overs or 0
+        roles, results = cls.get_roles(match_result)
+        
+        rows = {}
+        for user_id, own, other, batting, bowling, opponent_id in roles:
+            row = rows.get(user_id)
+            if row is None:
+                row = rows[user_id] = cls(
+                    user_id=user_id,
+                    match_id=challenge.id,
+                    match_date=match_date,
+                    ground_id=challenge.ground_id,
+                    opponent_id=opponent_id,
+                    result=results[user_id],
+                )
+            if batting:
+                row.runs_scored += own['runs']
+                row.sixes += own['sixes']
+                row.fours += own['fours']
+                row.balls_faced += overs * 6
+            if bowling:
+                row.wickets_taken += own['wickets']
+                row.runs_conceded += other['runs']
+                row.overs_bowled += overs
+        
+        for row in rows.values():
+            row.calculate_derived_fields()
+        return list(rows.values())
+    
+    @classmethod
+    def sync_from_match_result(cls, match_result):
+        """Upsert the rows of one match result, saving only rows that changed.
+        
+        Returns the (player, opponent) pairs whose head-to-head totals may
+        have changed.
+        """
+        challenge = match_result.challenge
+        existing = {row.user_id: row for row in cls.objects.filter(match_id=challenge.id)}
+        derived = cls.build_from_match_result(match_result) if challenge.status == 'COMPLETED' else []
+        
+        for row in derived:
+            current = existing.pop(row.user_id, None)
+            if current is not None:
+                if current.get_sync_values() == row.get_sync_values():
+                    continue
+                row.pk = current.pk
+                row.created_at = current.created_at
+            row.save()
+        for stale in existing.values():
+            stale.delete()
+        return HeadToHeadMatch.sync_from_match_result(match_result)
+
+
+class HeadToHeadMatch(models.Model):
+    """
+    One player's part against one opponent in one match, the unit HeadToHead
+    sums. A single wicket player who bats and bowls faces two opponents and so
+    has two rows, with the runs of their innings and the wickets of their spell
+    respectively.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='head_to_head_matches')
+    opponent = models.ForeignKey(User, on_delete=models.CASCADE, related_name='head_to_head_matches_against')
+    match = models.ForeignKey('matches.Challenge', on_delete=models.CASCADE, related_name='head_to_head_matches')
+    match_date = models.DateTimeField()
+    result = models.CharField(max_length=10, choices=[
+        ('WON', 'Won'),
+        ('LOST', 'Lost'),
+        ('DRAW', 'Draw'),
+        ('TIE', 'Tie')
+    ])
+    runs_scored = models.PositiveIntegerField(default=0)
+    wickets_taken = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Head to Head Match'
+        verbose_name_plural = 'Head to Head Matches'
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'user', 'opponent'], name='headtoheadmatch_unique_pairing'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'opponent'], name='headtoheadmatch_pair_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} vs {self.opponent_id} in {self.match_id}"
+    
+    SYNC_FIELDS = ['match_date', 'result', 'runs_scored', 'wickets_taken']
+    
+    def get_sync_values(self):
+        return tuple(getattr(self, field) for field in self.SYNC_FIELDS)
+    
+    @classmethod
+    def build_from_match_result(cls, match_result):
+        """Derive unsaved rows from a MatchResult, one per (player, opponent) pair"""
+        match_date = MatchStatistics.get_match_date(match_result)
+        roles, results = MatchStatistics.get_roles(match_result)
+        
+        rows = {}
+        for user_id, own, other, batting, bowling, opponent_id in roles:
+            if not opponent_id or opponent_id == user_id:
+                continue
+            row = rows.get((user_id, opponent_id))
+            if row is None:
+                row = rows[user_id, opponent_id] = cls(
+                    user_id=user_id,
+                    opponent_id=opponent_id,
+                    match_id=match_result.challenge_id,
+                    match_date=match_date,
+                    result=results[user_id],
+                )
+            if batting:
+                row.runs_scored += own['runs']
+            if bowling:
+                row.wickets_taken += own['wickets']
+        return list(rows.values())
+    
+    @classmethod
+    def sync_from_match_result(cls, match_result):
+        """Upsert the pairings of one match result; returns every pair added, changed or removed"""
+        challenge = match_result.challenge
+        existing = {(row.user_id, row.opponent_id): row for row in cls.objects.filter(match_id=challenge.id)}
+        derived = cls.build_from_match_result(match_result) if challenge.status == 'COMPLETED' else []
+        
+        pairs = set(existing)
+        for row in derived:
+            pairs.add((row.user_id, row.opponent_id))
+            current = existing.pop((row.user_id, row.opponent_id), None)
+            if current is not None:
+                if current.get_sync_values() == row.get_sync_values():
+                    continue
+                row.pk = current.pk
+            row.save()
+        if existing:
+            cls.objects.filter(pk__in=[row.pk for row in existing.values()]).delete()
+        return pairs
 
 
 class PlayerStatistics(models.Model):
@@ -172,6 +413,13 @@ class PlayerStatistics(models.Model):
         if total_overs > 0:
             self.career_economy_rate = round(total_runs_conceded / total_overs, 2)
         
+        # Best bowling figures: most wickets, fewest runs conceded as tiebreak
+        best_bowling = match_stats.filter(wickets_taken__gt=0).order_by(
+            '-wickets_taken', 'runs_conceded'
+        ).values('wickets_taken', 'runs_conceded').first()
+        if best_bowling:
+            self.best_bowling_figures = f"{best_bowling['wickets_taken']}/{best_bowling['runs_conceded']}"
+        
         # Calculate win percentage
         won_matches = match_stats.filter(result='WON').count()
         if self.total_matches > 0:
@@ -237,6 +485,12 @@ class SeasonStatistics(models.Model):
     best_bowling_figures = models.CharField(max_length=20, blank=True)
     most_runs = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='season_most_runs')
     most_wickets = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='season_most_wickets')
+    most_runs_total = models.PositiveIntegerField(default=0)
+    most_wickets_total = models.PositiveIntegerField(default=0)
+    
+    # Closed seasons are frozen and never recomputed from raw match data
+    is_closed = models.BooleanField(default=False, help_text="Freeze this season's statistics")
+    last_computed_at = models.DateTimeField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     
@@ -244,6 +498,412 @@ class SeasonStatistics(models.Model):
         ordering = ['-start_date']
         verbose_name = 'Season Statistics'
         verbose_name_plural = 'Season Statistics'
+        indexes = [
+            models.Index(fields=['is_closed', 'start_date', 'end_date'], name='season_open_range_idx'),
+        ]
     
     def __str__(self):
         return f"{self.season_name} - Statistics"
+    
+    @classmethod
+    def live_seasons_for(cls, match_date):
+        """Get open seasons whose date range contains the given match date"""
+        day = timezone.localtime(match_date).date() if timezone.is_aware(match_date) else match_date.date()
+        return cls.objects.filter(is_closed=False, start_date__lte=day, end_date__gte=day)
+    
+    def get_date_range(self):
+        """Get the season as a half-open [start, end) datetime range"""
+        start = datetime.combine(self.start_date, time.min)
+        end = datetime.combine(self.end_date + timedelta(days=1), time.min)
+        if settings.USE_TZ:
+            start = timezone.make_aware(start)
+            end = timezone.make_aware(end)
+        return start, end
+    
+    def get_match_statistics(self):
+        """Match statistics inside the season, filtered on the indexed match_date"""
+        start, end = self.get_date_range()
+        return MatchStatistics.objects.filter(match_date__gte=start, match_date__lt=end)
+    
+    def compute_statistics(self, force=False):
+        """Recompute the whole season from range aggregates"""
+        if self.is_closed and not force:
+            return False
+        
+        match_stats = self.get_match_statistics().order_by()
+        
+        totals = match_stats.aggregate(
+            matches=Count('match', distinct=True),
+            players=Count('user', distinct=True),
+            runs=Sum('runs_scored'),
+            wickets=Sum('wickets_taken'),
+            highest=Max('runs_scored'),
+        )
+        self.total_matches = totals['matches']
+        self.total_players = totals['players']
+        self.total_runs = totals['runs'] or 0
+        self.total_wickets = totals['wickets'] or 0
+        self.highest_individual_score = totals['highest'] or 0
+        
+        # Best figures: most wickets, fewest runs conceded as tiebreak
+        best = match_stats.filter(wickets_taken__gt=0).order_by(
+            '-wickets_taken', 'runs_conceded', 'match_date'
+        ).values('wickets_taken', 'runs_conceded').first()
+        self.best_bowling_figures = f"{best['wickets_taken']}/{best['runs_conceded']}" if best else ''
+        
+        top_batter = match_stats.values('user').annotate(
+            total=Sum('runs_scored')
+        ).filter(total__gt=0).order_by('-total', 'user').first()
+        self.most_runs_id = top_batter['user'] if top_batter else None
+        self.most_runs_total = top_batter['total'] if top_batter else 0
+        
+        top_bowler = match_stats.values('user').annotate(
+            total=Sum('wickets_taken')
+        ).filter(total__gt=0).order_by('-total', 'user').first()
+        self.most_wickets_id = top_bowler['user'] if top_bowler else None
+        self.most_wickets_total = top_bowler['total'] if top_bowler else 0
+        
+        self.last_computed_at = timezone.now()
+        self.save()
+        return True
+    
+    def apply_match_statistics(self, match_stat):
+        """Fold a newly created MatchStatistics row into a live season"""
+        if self.is_closed:
+            return False
+        
+        season_stats = self.get_match_statistics()
+        others = season_stats.exclude(pk=match_stat.pk)
+        
+        if not others.filter(match_id=match_stat.match_id).exists():
+            self.total_matches += 1
+        if not others.filter(user_id=match_stat.user_id).exists():
+            self.total_players += 1
+        self.total_runs += match_stat.runs_scored
+        self.total_wickets += match_stat.wickets_taken
+        self.highest_individual_score = max(self.highest_individual_score, match_stat.runs_scored)
+        
+        if match_stat.wickets_taken > 0:
+            figures = (match_stat.wickets_taken, match_stat.runs_conceded)
+            if not self.best_bowling_figures or self._is_better_figures(figures):
+                self.best_bowling_figures = f"{figures[0]}/{figures[1]}"
+        
+        # Only the contributing player's season totals can overtake the leaders
+        player_totals = season_stats.filter(user_id=match_stat.user_id).aggregate(
+            runs=Sum('runs_scored'),
+            wickets=Sum('wickets_taken'),
+        )
+        player_runs = player_totals['runs'] or 0
+        player_wickets = player_totals['wickets'] or 0
+        if player_runs > self.most_runs_total:
+            self.most_runs_id = match_stat.user_id
+            self.most_runs_total = player_runs
+        if player_wickets > self.most_wickets_total:
+            self.most_wickets_id = match_stat.user_id
+            self.most_wickets_total = player_wickets
+        
+        self.last_computed_at = timezone.now()
+        self.save()
+        return True
+    
+    def _is_better_figures(self, figures):
+        """Compare (wickets, runs) against the stored best bowling figures"""
+        try:
+            wickets, runs = (int(part) for part in self.best_bowling_figures.split('/'))
+        except ValueError:
+            return True
+        return figures[0] > wickets or (figures[0] == wickets and figures[1] < runs)
+    
+    def close(self):
+        """Compute the final statistics and freeze the season"""
+        self.compute_statistics(force=True)
+        self.is_closed = True
+        self.save(update_fields=['is_closed'])
+
+
+class CricketRecord(models.Model):
+    """Precomputed all-time individual records, one row per record type"""
+    HIGHEST_SCORE = 'HIGHEST_SCORE'
+    BEST_BOWLING = 'BEST_BOWLING'
+    MOST_SIXES = 'MOST_SIXES'
+    FASTEST_SCORING = 'FASTEST_SCORING'
+    LONGEST_WIN_STREAK = 'LONGEST_WIN_STREAK'
+    
+    RECORD_TYPE_CHOICES = [
+        (HIGHEST_SCORE, 'Highest Individual Score'),
+        (BEST_BOWLING, 'Best Bowling Figures'),
+        (MOST_SIXES, 'Most Sixes in a Match'),
+        (FASTEST_SCORING, 'Fastest Scoring'),
+        (LONGEST_WIN_STREAK, 'Longest Win Streak'),
+    ]
+    
+    # Minimum balls faced for an innings to qualify for the fastest scoring record
+    FASTEST_SCORING_MIN_BALLS = 10
+    
+    record_type = models.CharField(max_length=30, choices=RECORD_TYPE_CHOICES, unique=True)
+    holder = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='cricket_records')
+    match_stat = models.ForeignKey(MatchStatistics, on_delete=models.SET_NULL, null=True, blank=True, related_name='records')
+    value = models.FloatField(default=0.0)
+    tiebreak_value = models.FloatField(default=0.0, help_text="Lower is better, e.g. runs conceded for bowling figures")
+    display_value = models.CharField(max_length=20, blank=True)
+    achieved_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['record_type']
+        verbose_name = 'Cricket Record'
+        verbose_name_plural = 'Cricket Records'
+    
+    def __str__(self):
+        return f"{self.get_record_type_display()} - {self.display_value}"
+    
+    def is_beaten_by(self, value, tiebreak_value=0.0, achieved_at=None):
+        """Check if a candidate (value, tiebreak) beats this record, earlier matches winning ties"""
+        if self.holder_id is None:
+            return True
+        if value != self.value:
+            return value > self.value
+        if tiebreak_value != self.tiebreak_value:
+            return tiebreak_value < self.tiebreak_value
+        return bool(achieved_at and self.achieved_at and achieved_at < self.achieved_at)
+    
+    def set_holder(self, match_stat, value, tiebreak_value=0.0, display_value=''):
+        """Point this record at a new holder"""
+        self.holder_id = match_stat.user_id if match_stat else None
+        self.match_stat = match_stat
+        self.value = value
+        self.tiebreak_value = tiebreak_value
+        self.display_value = display_value
+        self.achieved_at = match_stat.match_date if match_stat else None
+    
+    @classmethod
+    def get_candidates(cls, match_stat):
+        """Record candidates (type, value, tiebreak, display) for a single match row"""
+        candidates = [
+            (cls.HIGHEST_SCORE, match_stat.runs_scored, 0.0, str(match_stat.runs_scored)),
+        ]
+        if match_stat.wickets_taken > 0:
+            candidates.append((
+                cls.BEST_BOWLING,
+                match_stat.wickets_taken,
+                match_stat.runs_conceded,
+                f"{match_stat.wickets_taken}/{match_stat.runs_conceded}",
+            ))
+        if match_stat.sixes > 0:
+            candidates.append((cls.MOST_SIXES, match_stat.sixes, 0.0, str(match_stat.sixes)))
+        if match_stat.balls_faced >= cls.FASTEST_SCORING_MIN_BALLS:
+            # Compared unrounded, like rebuild's ordering; only the display is rounded
+            strike_rate = (match_stat.runs_scored / match_stat.balls_faced) * 100
+            candidates.append((cls.FASTEST_SCORING, strike_rate, 0.0, f"{strike_rate:.2f}"))
+        return candidates
+    
+    @classmethod
+    def get_records(cls):
+        """All records keyed by record type, creating missing rows"""
+        records = {record.record_type: record for record in cls.objects.all()}
+        for record_type, _ in cls.RECORD_TYPE_CHOICES:
+            if record_type not in records:
+                records[record_type], _ = cls.objects.get_or_create(record_type=record_type)
+        return records
+    
+    @classmethod
+    def consider(cls, match_stat):
+        """Update only the records a new match row actually beats"""
+        records = cls.get_records()
+        
+        for record_type, value, tiebreak_value, display_value in cls.get_candidates(match_stat):
+            record = records[record_type]
+            if record.is_beaten_by(value, tiebreak_value, match_stat.match_date):
+                record.set_holder(match_stat, value, tiebreak_value, display_value)
+                record.save()
+        
+        # A win can only extend a streak, so losses never touch the streak record
+        if match_stat.result == 'WON':
+            streak, last_stat = cls.get_win_streak_around(match_stat)
+            record = records[cls.LONGEST_WIN_STREAK]
+            # Credited to the streak's last match, as rebuild does
+            if record.is_beaten_by(streak, achieved_at=last_stat.match_date):
+                record.set_holder(last_stat, streak, display_value=str(streak))
+                record.save()
+    
+    @classmethod
+    def get_win_streak_around(cls, match_stat):
+        """Length and last row of the run of consecutive wins that contains this match"""
+        player_results = MatchStatistics.objects.filter(user_id=match_stat.user_id).exclude(pk=match_stat.pk)
+        streak = 1
+        for result in player_results.filter(
+            match_date__lt=match_stat.match_date
+        ).order_by('-match_date').values_list('result', flat=True).iterator():
+            if result != 'WON':
+                break
+            streak += 1
+        
+        last_stat_id = None
+        for pk, result in player_results.filter(
+            match_date__gt=match_stat.match_date
+        ).order_by('match_date').values_list('pk', 'result').iterator():
+            if result != 'WON':
+                break
+            streak += 1
+            last_stat_id = pk
+        
+        last_stat = MatchStatistics.objects.get(pk=last_stat_id) if last_stat_id else match_stat
+        return streak, last_stat
+    
+    @classmethod
+    def rebuild(cls, record_types=None):
+        """Recompute records from scratch with one ordered query per record"""
+        records = cls.get_records()
+        record_types = record_types or [record_type for record_type, _ in cls.RECORD_TYPE_CHOICES]
+        match_stats = MatchStatistics.objects.order_by()
+        
+        best_rows = {
+            cls.HIGHEST_SCORE: match_stats.order_by('-runs_scored', 'match_date'),
+            cls.BEST_BOWLING: match_stats.filter(wickets_taken__gt=0).order_by('-wickets_taken', 'runs_conceded', 'match_date'),
+            cls.MOST_SIXES: match_stats.filter(sixes__gt=0).order_by('-sixes', 'match_date'),
+            cls.FASTEST_SCORING: match_stats.filter(
+                balls_faced__gte=cls.FASTEST_SCORING_MIN_BALLS
+            ).annotate(
+                scoring_rate=F('runs_scored') * 1.0 / F('balls_faced')
+            ).order_by('-scoring_rate', 'match_date'),
+        }
+        
+        for record_type in record_types:
+            record = records[record_type]
+            record.set_holder(None, 0.0)
+            
+            if record_type == cls.LONGEST_WIN_STREAK:
+                best_streak, best_stat_id = cls._find_longest_win_streak()
+                if best_stat_id:
+                    record.set_holder(MatchStatistics.objects.get(pk=best_stat_id), best_streak, display_value=str(best_streak))
+            else:
+                match_stat = best_rows[record_type].first()
+                if match_stat:
+                    for candidate_type, value, tiebreak_value, display_value in cls.get_candidates(match_stat):
+                        if candidate_type == record_type:
+                            record.set_holder(match_stat, value, tiebreak_value, display_value)
+            record.save()
+        return records
+    
+    @classmethod
+    def _find_longest_win_streak(cls):
+        """Scan results per player in date order and return (streak, last match id)"""
+        best_streak, best_stat_id, best_date = 0, None, None
+        current_user, streak = None, 0
+        rows = MatchStatistics.objects.order_by('user_id', 'match_date').values_list(
+            'pk', 'user_id', 'result', 'match_date'
+        )
+        for pk, user_id, result, match_date in rows.iterator(chunk_size=2000):
+            if user_id != current_user:
+                current_user, streak = user_id, 0
+            streak = streak + 1 if result == 'WON' else 0
+            # Equal streaks go to the one that ended first, as in is_beaten_by
+            if streak and (streak > best_streak or (streak == best_streak and match_date < best_date)):
+                best_streak, best_stat_id, best_date = streak, pk, match_date
+        return best_streak, best_stat_id
+
+
+class StatisticsCheckpoint(models.Model):
+    """High-water mark for incremental statistics pipelines"""
+    name = models.CharField(max_length=50, unique=True)
+    high_water_mark = models.DateTimeField(null=True, blank=True)
+    rows_processed = models.PositiveIntegerField(default=0)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Statistics Checkpoint'
+        verbose_name_plural = 'Statistics Checkpoints'
+    
+    def __str__(self):
+        return f"{self.name} - {self.high_water_mark}"
+
+
+class HeadToHead(models.Model):
+    """Precomputed record of a player against one opponent"""
+    player = models.ForeignKey(User, on_delete=models.CASCADE, related_name='head_to_head')
+    opponent = models.ForeignKey(User, on_delete=models.CASCADE, related_name='head_to_head_against')
+    
+    matches = models.PositiveIntegerField(default=0)
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    draws = models.PositiveIntegerField(default=0)
+    runs = models.PositiveIntegerField(default=0)
+    wickets = models.PositiveIntegerField(default=0)
+    last_played_at = models.DateTimeField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-matches', 'opponent_id']
+        verbose_name = 'Head to Head'
+        verbose_name_plural = 'Head to Head'
+        constraints = [
+            models.UniqueConstraint(fields=['player', 'opponent'], name='headtohead_unique_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['player', '-matches'], name='headtohead_player_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.player.username} vs {self.opponent.username}"
+    
+    @classmethod
+    def aggregate_fields(cls):
+        """Aggregates that turn head-to-head matches into head-to-head totals"""
+        return {
+            'total_matches': Count('id'),
+            'total_wins': Count('id', filter=Q(result='WON')),
+            'total_losses': Count('id', filter=Q(result='LOST')),
+            'total_draws': Count('id', filter=Q(result__in=['DRAW', 'TIE'])),
+            'total_runs': Sum('runs_scored'),
+            'total_wickets': Sum('wickets_taken'),
+            'last_played': Max('match_date'),
+        }
+    
+    @classmethod
+    def from_totals(cls, player_id, opponent_id, totals):
+        return cls(
+            player_id=player_id,
+            opponent_id=opponent_id,
+            matches=totals['total_matches'],
+            wins=totals['total_wins'],
+            losses=totals['total_losses'],
+            draws=totals['total_draws'],
+            runs=totals['total_runs'] or 0,
+            wickets=totals['total_wickets'] or 0,
+            last_played_at=totals['last_played'],
+        )
+    
+    @classmethod
+    def refresh_pairs(cls, pairs):
+        """Recompute the given (player, opponent) pairs from indexed head-to-head matches"""
+        for player_id, opponent_id in pairs:
+            if not player_id or not opponent_id:
+                continue
+            totals = HeadToHeadMatch.objects.filter(
+                user_id=player_id, opponent_id=opponent_id
+            ).aggregate(**cls.aggregate_fields())
+            if totals['total_matches']:
+                row = cls.from_totals(player_id, opponent_id, totals)
+                cls.objects.update_or_create(
+                    player_id=player_id,
+                    opponent_id=opponent_id,
+                    defaults={
+                        field: getattr(row, field)
+                        for field in ['matches', 'wins', 'losses', 'draws', 'runs', 'wickets', 'last_played_at']
+                    },
+                )
+            else:
+                cls.objects.filter(player_id=player_id, opponent_id=opponent_id).delete()
+    
+    @classmethod
+    def rebuild(cls, batch_size=1000):
+        """Rebuild the whole table with one grouped query"""
+        totals = HeadToHeadMatch.objects.order_by().values(
+            'user_id', 'opponent_id'
+        ).annotate(**cls.aggregate_fields())
+        rows = [cls.from_totals(row['user_id'], row['opponent_id'], row) for row in totals.iterator()]
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rows, batch_size=batch_size)
+        return len(rows)
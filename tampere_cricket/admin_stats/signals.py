@@ -0,0 +1,75 @@
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from tampere_cricket.matches.models import Challenge, MatchResult
+from .models import MatchStatistics, SeasonStatistics, CricketRecord, HeadToHead, HeadToHeadMatch
+
+
+def get_invalidated_record_types(match_stat):
+    """Record types whose holder depends on this match row"""
+    return list(CricketRecord.objects.filter(
+        Q(match_stat_id=match_stat.pk) |
+        Q(match_stat__isnull=True, holder__isnull=False) |
+        Q(record_type=CricketRecord.LONGEST_WIN_STREAK, holder_id=match_stat.user_id)
+    ).values_list('record_type', flat=True))
+
+
+@receiver(post_save, sender=MatchStatistics)
+def update_live_season_statistics(sender, instance, created, **kwargs):
+    """Keep live seasons up to date as match statistics are written"""
+    for season in SeasonStatistics.live_seasons_for(instance.match_date):
+        if created:
+            season.apply_match_statistics(instance)
+        else:
+            # Edited rows may lower totals or records, so recompute the range
+            season.compute_statistics()
+
+
+@receiver(post_save, sender=MatchStatistics)
+def update_cricket_records(sender, instance, created, **kwargs):
+    """Update the records book only where this match could change a record"""
+    if not created:
+        record_types = get_invalidated_record_types(instance)
+        if record_types:
+            CricketRecord.rebuild(record_types)
+    CricketRecord.consider(instance)
+
+
+@receiver(post_delete, sender=MatchStatistics)
+def recompute_season_on_delete(sender, instance, **kwargs):
+    """Recompute live seasons that lost a match statistics row"""
+    for season in SeasonStatistics.live_seasons_for(instance.match_date):
+        season.compute_statistics()
+
+
+@receiver(post_delete, sender=MatchStatistics)
+def rebuild_records_on_delete(sender, instance, **kwargs):
+    """Rebuild records that were held by the deleted match row"""
+    record_types = get_invalidated_record_types(instance)
+    if record_types:
+        CricketRecord.rebuild(record_types)
+
+
+@receiver(post_delete, sender=HeadToHeadMatch)
+def update_head_to_head_on_delete(sender, instance, **kwargs):
+    """Refresh the head-to-head totals of a removed pairing's players"""
+    HeadToHead.refresh_pairs([(instance.user_id, instance.opponent_id)])
+
+
+@receiver(post_save, sender=MatchResult)
+def sync_statistics_on_result_save(sender, instance, **kwargs):
+    """Derive match statistics as soon as a completed result is written"""
+    if instance.challenge.status == 'COMPLETED':
+        HeadToHead.refresh_pairs(MatchStatistics.sync_from_match_result(instance))
+
+
+@receiver(post_save, sender=Challenge)
+def sync_statistics_on_challenge_save(sender, instance, created, **kwargs):
+    """Completion and winner changes only touch the challenge, so resync its result"""
+    if created or instance.status != 'COMPLETED':
+        return
+    try:
+        match_result = instance.match_result
+    except MatchResult.DoesNotExist:
+        return
+    HeadToHead.refresh_pairs(MatchStatistics.sync_from_match_result(match_result))
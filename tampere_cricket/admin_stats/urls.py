@@ -10,4 +10,8 @@ urlpatterns = [
     path('ground/<int:ground_id>/', views.ground_analysis, name='ground_analysis'),
     path('records/', views.records, name='records'),
     path('api/statistics/', views.statistics_api, name='statistics_api'),
+    path('api/avatar-uploads/', views.avatar_upload_metrics, name='avatar_upload_metrics'),
+    path('export/match-statistics/', views.export_match_statistics, name='export_match_statistics'),
+    path('export/match-results/', views.export_match_results, name='export_match_results'),
+    path('export/leaderboard/', views.export_leaderboard, name='export_leaderboard'),
 ]
@@ -1,43 +1,65 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.admin.views.decorators import staff_member_required
 from django.db.models import Avg, Sum, Count, Q, F, Max, Min
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.paginator import Paginator
 from django.utils import timezone
 from datetime import datetime, timedelta
+import csv
+import itertools
 import json
 
-from .models import MatchStatistics, PlayerStatistics, GroundStatistics, SeasonStatistics
+from .models import MatchStatistics, PlayerStatistics, GroundStatistics, SeasonStatistics, CricketRecord, HeadToHead
 from tampere_cricket.accounts.models import User, Profile
-from tampere_cricket.matches.models import Challenge
+from tampere_cricket.accounts.uploads import avatar_uploads
+from tampere_cricket.matches.models import Challenge, MatchResult
 from tampere_cricket.grounds.models import Ground
 
 
+# Rows fetched per database round trip when streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+
+def get_dashboard_filters(request):
+    """Read the dashboard filter parameters shared by the dashboard and exports"""
+    return {
+        'date_from': request.GET.get('date_from', ''),
+        'date_to': request.GET.get('date_to', ''),
+        'ground_id': request.GET.get('ground', ''),
+        'player_id': request.GET.get('player', ''),
+    }
+
+
+def filter_match_statistics(match_stats, filters):
+    """Apply dashboard filters to a MatchStatistics queryset"""
+    if filters['date_from']:
+        match_stats = match_stats.filter(match_date__gte=filters['date_from'])
+    if filters['date_to']:
+        match_stats = match_stats.filter(match_date__lte=filters['date_to'])
+    if filters['ground_id']:
+        match_stats = match_stats.filter(ground_id=filters['ground_id'])
+    if filters['player_id']:
+        match_stats = match_stats.filter(user_id=filters['player_id'])
+    return match_stats
+
+
 @staff_member_required
 def admin_dashboard(request):
     """Main admin dashboard with overview statistics"""
     
     # Get filter parameters
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    ground_id = request.GET.get('ground', '')
-    player_id = request.GET.get('player', '')
+    filters = get_dashboard_filters(request)
+    date_from = filters['date_from']
+    date_to = filters['date_to']
+    ground_id = filters['ground_id']
+    player_id = filters['player_id']
     
     # Base querysets
-    match_stats = MatchStatistics.objects.all()
+    match_stats = filter_match_statistics(MatchStatistics.objects.all(), filters)
     players = User.active_objects()
     grounds = Ground.objects.all()
     
-    # Apply filters
-    if date_from:
-        match_stats = match_stats.filter(match_date__gte=date_from)
-    if date_to:
-        match_stats = match_stats.filter(match_date__lte=date_to)
-    if ground_id:
-        match_stats = match_stats.filter(ground_id=ground_id)
-    if player_id:
-        match_stats = match_stats.filter(user_id=player_id)
-    
     # Calculate overview statistics
     total_matches = match_stats.count()
     total_players = players.count()
@@ -130,13 +152,18 @@ def player_analysis(request, player_id):
     # Performance over time (last 10 matches)
     recent_performance = match_stats[:10]
     
-    # Opponent analysis
-    opponent_analysis = match_stats.values('opponent__username').annotate(
-        matches=Count('id'),
-        runs=Sum('runs_scored'),
-        wickets=Sum('wickets_taken'),
-        wins=Count('id', filter=Q(result='WON'))
-    ).order_by('-matches')
+    # Opponent analysis - unfiltered views read the precomputed head-to-head table
+    if date_from or date_to or ground_id:
+        opponent_analysis = match_stats.values('opponent__username').annotate(
+            matches=Count('id'),
+            runs=Sum('runs_scored'),
+            wickets=Sum('wickets_taken'),
+            wins=Count('id', filter=Q(result='WON'))
+        ).order_by('-matches')
+    else:
+        opponent_analysis = HeadToHead.objects.filter(player=player).values(
+            'opponent__username', 'matches', 'runs', 'wickets', 'wins'
+        )
     
     context = {
         'player': player,
@@ -282,26 +309,26 @@ def ground_analysis(request, ground_id):
 def records(request):
     """Cricket records and achievements"""
     
-    # Individual records
-    highest_score = MatchStatistics.objects.aggregate(Max('runs_scored'))['runs_scored__max'] or 0
-    best_bowling = MatchStatistics.objects.aggregate(Max('wickets_taken'))['wickets_taken__max'] or 0
-    
-    # Get record holders
-    highest_score_holder = MatchStatistics.objects.filter(runs_scored=highest_score).first()
-    best_bowling_holder = MatchStatistics.objects.filter(wickets_taken=best_bowling).first()
+    # Individual records are precomputed into one small table
+    records_by_type = {
+        record.record_type: record
+        for record in CricketRecord.objects.select_related('holder', 'match_stat__ground')
+        if record.holder_id
+    }
     
     # Career records
-    career_records = PlayerStatistics.objects.all().order_by('-total_runs')[:10]
-    bowling_records = PlayerStatistics.objects.all().order_by('-total_wickets')[:10]
+    career_records = PlayerStatistics.objects.select_related('user').order_by('-total_runs')[:10]
+    bowling_records = PlayerStatistics.objects.select_related('user').order_by('-total_wickets')[:10]
     
     # Ground records
-    ground_records = GroundStatistics.objects.all().order_by('-total_matches')[:10]
+    ground_records = GroundStatistics.objects.select_related('ground').order_by('-total_matches')[:10]
     
     context = {
-        'highest_score': highest_score,
-        'highest_score_holder': highest_score_holder,
-        'best_bowling': best_bowling,
-        'best_bowling_holder': best_bowling_holder,
+        'highest_score_record': records_by_type.get(CricketRecord.HIGHEST_SCORE),
+        'best_bowling_record': records_by_type.get(CricketRecord.BEST_BOWLING),
+        'most_sixes_record': records_by_type.get(CricketRecord.MOST_SIXES),
+        'fastest_scoring_record': records_by_type.get(CricketRecord.FASTEST_SCORING),
+        'win_streak_record': records_by_type.get(CricketRecord.LONGEST_WIN_STREAK),
         'career_records': career_records,
         'bowling_records': bowling_records,
         'ground_records': ground_records,
@@ -343,3 +370,105 @@ def statistics_api(request):
             })
     
     return JsonResponse({'error': 'Invalid chart type'})
+
+
+@staff_member_required
+def avatar_upload_metrics(request):
+    """Queue depth and upload latency of this worker's background avatar uploads"""
+    metrics = avatar_uploads.metrics.snapshot()
+    metrics['pending_users'] = User.objects.exclude(avatar_pending='').count()
+    return JsonResponse(metrics)
+
+
+class Echo:
+    """File-like object that returns each written CSV line instead of buffering it"""
+    
+    def write(self, value):
+        return value
+
+
+def stream_export(filename, header, rows, export_format):
+    """Stream rows as CSV or NDJSON without materializing the queryset"""
+    if export_format == 'ndjson':
+        content = (json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n' for row in rows)
+        response = StreamingHttpResponse(content, content_type='application/x-ndjson')
+        extension = 'ndjson'
+    else:
+        writer = csv.writer(Echo())
+        content = itertools.chain(
+            [writer.writerow(header)],
+            (writer.writerow(row) for row in rows),
+        )
+        response = StreamingHttpResponse(content, content_type='text/csv')
+        extension = 'csv'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
+
+
+@staff_member_required
+def export_match_statistics(request):
+    """Export filtered match statistics"""
+    filters = get_dashboard_filters(request)
+    fields = [
+        'id', 'match_id', 'match_date', 'user_id', 'user__username', 'opponent_id',
+        'ground__name', 'result', 'runs_scored', 'balls_faced', 'fours', 'sixes',
+        'strike_rate', 'overs_bowled', 'runs_conceded', 'wickets_taken', 'maidens',
+        'economy_rate', 'catches', 'stumpings', 'run_outs',
+    ]
+    rows = filter_match_statistics(MatchStatistics.objects.all(), filters).order_by(
+        'match_date', 'id'
+    ).values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return stream_export('match_statistics', fields, rows, request.GET.get('format', 'csv'))
+
+
+@staff_member_required
+def export_match_results(request):
+    """Export filtered match results"""
+    filters = get_dashboard_filters(request)
+    results = MatchResult.objects.all()
+    if filters['date_from']:
+        results = results.filter(challenge__completed_at__gte=filters['date_from'])
+    if filters['date_to']:
+        results = results.filter(challenge__completed_at__lte=filters['date_to'])
+    if filters['ground_id']:
+        results = results.filter(challenge__ground_id=filters['ground_id'])
+    if filters['player_id']:
+        player_id = filters['player_id']
+        results = results.filter(
+            Q(challenge__challenger_id=player_id) |
+            Q(challenge__opponent_id=player_id) |
+            Q(challenge__team1_batter_id=player_id) |
+            Q(challenge__team1_bowler_id=player_id) |
+            Q(challenge__team2_batter_id=player_id) |
+            Q(challenge__team2_bowler_id=player_id)
+        )
+    fields = [
+        'id', 'challenge_id', 'challenge__challenge_type', 'challenge__metric',
+        'challenge__target_value', 'challenge__completed_at', 'challenge__ground__name',
+        'challenge__challenger_id', 'challenge__opponent_id', 'challenge__winner_id',
+        'challenger_runs', 'challenger_wickets', 'challenger_sixes', 'challenger_fours', 'challenger_dots',
+        'opponent_runs', 'opponent_wickets', 'opponent_sixes', 'opponent_fours', 'opponent_dots',
+        'total_overs', 'match_duration', 'updated_at',
+    ]
+    rows = results.order_by('id').values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return stream_export('match_results', fields, rows, request.GET.get('format', 'csv'))
+
+
+@staff_member_required
+def export_leaderboard(request):
+    """Export the leaderboard aggregated over the filtered match statistics"""
+    filters = get_dashboard_filters(request)
+    fields = [
+        'user_id', 'user__username', 'user__profile__rating', 'matches', 'wins',
+        'runs', 'wickets', 'highest_score',
+    ]
+    rows = filter_match_statistics(MatchStatistics.objects.all(), filters).order_by().values(
+        'user_id', 'user__username', 'user__profile__rating'
+    ).annotate(
+        matches=Count('id'),
+        wins=Count('id', filter=Q(result='WON')),
+        runs=Sum('runs_scored'),
+        wickets=Sum('wickets_taken'),
+        highest_score=Max('runs_scored'),
+    ).order_by('-user__profile__rating', '-wins', 'user_id').values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return stream_export('leaderboard', fields, rows, request.GET.get('format', 'csv'))
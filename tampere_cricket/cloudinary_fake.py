@@ -0,0 +1,68 @@
+"""
+In-memory stand-in for Cloudinary, for development and tests without an account
+"""
+import threading
+import time
+from collections import Counter
+
+import cloudinary.exceptions
+
+
+class FakeCloudinary:
+    """
+    Stores uploads in memory and answers like the Cloudinary upload and Admin APIs.
+    Pass it as the client of a CloudinaryStorage; calls counts every request made.
+    """
+    
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.resources = {}
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._version = int(time.time())
+    
+    def _call(self, method):
+        with self._lock:
+            self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+    
+    def upload(self, file, public_id=None, folder=None, **options):
+        self._call('upload')
+        if hasattr(file, 'read'):
+            data = file.read()
+        elif isinstance(file, bytes):
+            data = file
+        else:
+            with open(file, 'rb') as f:
+                data = f.read()
+        with self._lock:
+            self._version += 1
+            # Cloudinary names anonymous uploads randomly; a counter is unique enough here
+            public_id = public_id or f'upload_{self._version}'
+            if folder:
+                public_id = f'{folder}/{public_id}'
+            resource = {
+                'public_id': public_id,
+                'version': self._version,
+                'format': options.get('format') or 'jpg',
+                'resource_type': options.get('resource_type', 'image'),
+                'bytes': len(data),
+                'data': data,
+            }
+            self.resources[public_id] = resource
+        return {key: value for key, value in resource.items() if key != 'data'}
+    
+    def destroy(self, public_id):
+        self._call('destroy')
+        with self._lock:
+            found = self.resources.pop(public_id, None)
+        return {'result': 'ok' if found else 'not found'}
+    
+    def resource(self, public_id):
+        self._call('resource')
+        with self._lock:
+            resource = self.resources.get(public_id)
+        if resource is None:
+            raise cloudinary.exceptions.NotFound(f'Resource not found - {public_id}')
+        return {key: value for key, value in resource.items() if key != 'data'}
@@ -1,11 +1,56 @@
 """
 Custom Cloudinary storage backend for Django
+
+Resource metadata (size, format, version) is cached per public_id, filled
+from upload responses and refreshed lazily, so exists() and size() do not
+cost an Admin API round trip on every call.
 """
+import logging
+import os
+import time
+
 import cloudinary
+import cloudinary.api
+import cloudinary.exceptions
 import cloudinary.uploader
+from django.core.cache import cache
 from django.core.files.storage import Storage
-from django.conf import settings
-import os
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds resource metadata is trusted before it is fetched again
+METADATA_TTL = 60 * 60
+
+# Seconds a missing resource is remembered; short, since it may be uploaded elsewhere
+MISSING_TTL = 60
+
+
+class CloudinaryClient:
+    """The Cloudinary calls the storage makes, so a stand-in can replace them"""
+    
+    def upload(self, file, **options):
+        return cloudinary.uploader.upload(file, **options)
+    
+    def destroy(self, public_id):
+        return cloudinary.uploader.destroy(public_id)
+    
+    def resource(self, public_id):
+        return cloudinary.api.resource(public_id)
+
+
+def metadata_cache_key(name):
+    return f'cloudinary:resource:{name}'
+
+
+def resource_metadata(result):
+    """The metadata worth keeping from an upload or Admin API response"""
+    return {
+        'bytes': result.get('bytes', 0),
+        'format': result.get('format', ''),
+        'version': result.get('version'),
+        'fetched_at': time.time(),
+    }
 
 
 class CloudinaryStorage(Storage):
@@ -13,7 +58,7 @@ class CloudinaryStorage(Storage):
     Custom storage backend that uploads files to Cloudinary
     """
     
-    def __init__(self):
+    def __init__(self, client=None):
         # Configure Cloudinary if not already configured
         if not hasattr(cloudinary.config(), 'cloud_name'):
             cloudinary.config(
@@ -21,38 +66,64 @@ class CloudinaryStorage(Storage):
                 api_key=os.getenv('CLOUDINARY_API_KEY'),
                 api_secret=os.getenv('CLOUDINARY_API_SECRET')
             )
+        self.client = client or CloudinaryClient()
     
     def _open(self, name, mode='rb'):
         # For reading, we'll return the Cloudinary URL
         return cloudinary.CloudinaryResource(name)
     
     def _save(self, name, content):
-        # Upload to Cloudinary
+        # Upload to Cloudinary. Failures are raised rather than returning a name
+        # that points at nothing, so callers keep their copy and can retry.
         try:
-            result = cloudinary.uploader.upload(
+            result = self.client.upload(
                 content,
                 public_id=name.replace('/', '_').replace('.', '_'),
                 folder="media/avatars"
             )
-            return result['public_id']
         except Exception as e:
-            # If upload fails, return the original name
-            return name
+            logger.warning('Cloudinary upload of %s failed: %s', name, e)
+            raise
+        
+        # The upload response already describes the resource, so remember it
+        cache.set(metadata_cache_key(result['public_id']), resource_metadata(result), METADATA_TTL)
+        return result['public_id']
     
     def delete(self, name):
         # Delete from Cloudinary
         try:
-            cloudinary.uploader.destroy(name)
-        except:
-            pass  # Ignore errors
+            self.client.destroy(name)
+        except cloudinary.exceptions.Error as e:
+            logger.warning('Cloudinary delete of %s failed: %s', name, e)
+        cache.set(metadata_cache_key(name), {}, MISSING_TTL)
+    
+    def get_metadata(self, name):
+        """
+        Cached {'bytes', 'format', 'version', 'fetched_at'} of a resource, or {} when it does not exist.
+        Returns None when Cloudinary cannot be reached and nothing is cached.
+        """
+        cache_key = metadata_cache_key(name)
+        metadata = cache.get(cache_key)
+        if metadata is not None:
+            return metadata
+        
+        try:
+            result = self.client.resource(name)
+        except cloudinary.exceptions.NotFound:
+            cache.set(cache_key, {}, MISSING_TTL)
+            return {}
+        except Exception as e:
+            # Do not cache failures, the next call tries again
+            logger.warning('Cloudinary lookup of %s failed: %s', name, e)
+            return None
+        
+        metadata = resource_metadata(result)
+        cache.set(cache_key, metadata, METADATA_TTL)
+        return metadata
     
     def exists(self, name):
         # Check if file exists in Cloudinary
-        try:
-            result = cloudinary.api.resource(name)
-            return result is not None
-        except:
-            return False
+        return bool(self.get_metadata(name))
     
     def url(self, name):
         # Return Cloudinary URL
@@ -62,11 +133,7 @@ class CloudinaryStorage(Storage):
     
     def size(self, name):
         # Get file size from Cloudinary
-        try:
-            result = cloudinary.api.resource(name)
-            return result.get('bytes', 0)
-        except:
-            return 0
+        return (self.get_metadata(name) or {}).get('bytes', 0)
     
     def get_available_name(self, name, max_length=None):
         # Return a unique name for the file
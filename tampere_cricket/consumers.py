@@ -0,0 +1,67 @@
+"""
+WebSocket consumer for live challenge, time slot and notification updates
+"""
+from datetime import date
+
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+
+from .realtime import group_for_challenge, group_for_slots, group_for_user
+
+
+class LiveUpdatesConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Signed-in users always receive their own notifications and challenge updates.
+    Any client can also subscribe to a challenge or to one day's time slots:
+    {"action": "subscribe", "stream": "challenge", "id": 12}
+    {"action": "subscribe", "stream": "slots", "date": "2025-06-01"}
+    """
+    
+    # Most streams one socket may follow, so a client cannot join every group
+    MAX_SUBSCRIPTIONS = 20
+    
+    async def connect(self):
+        self.subscriptions = set()
+        user = self.scope.get('user')
+        if user is not None and user.is_authenticated:
+            await self.channel_layer.group_add(group_for_user(user.pk), self.channel_name)
+            self.subscriptions.add(group_for_user(user.pk))
+        await self.accept()
+    
+    async def disconnect(self, code):
+        for group in self.subscriptions:
+            await self.channel_layer.group_discard(group, self.channel_name)
+    
+    def get_group(self, content):
+        """Group for a subscription request, or None when it is invalid"""
+        stream = content.get('stream')
+        try:
+            if stream == 'challenge':
+                return group_for_challenge(int(content.get('id')))
+            if stream == 'slots':
+                return group_for_slots(date.fromisoformat(str(content.get('date'))))
+        except (TypeError, ValueError):
+            pass
+        return None
+    
+    async def receive_json(self, content, **kwargs):
+        action = content.get('action')
+        group = self.get_group(content)
+        if action not in ('subscribe', 'unsubscribe') or group is None:
+            await self.send_json({'event': 'error', 'data': {'message': 'Invalid subscription'}})
+            return
+        
+        if action == 'subscribe':
+            if group not in self.subscriptions:
+                if len(self.subscriptions) >= self.MAX_SUBSCRIPTIONS:
+                    await self.send_json({'event': 'error', 'data': {'message': 'Too many subscriptions'}})
+                    return
+                await self.channel_layer.group_add(group, self.channel_name)
+                self.subscriptions.add(group)
+        elif group in self.subscriptions and not group.startswith('user.'):
+            await self.channel_layer.group_discard(group, self.channel_name)
+            self.subscriptions.discard(group)
+        await self.send_json({'event': f'{action}d', 'data': {'stream': content.get('stream')}})
+    
+    async def push(self, message):
+        """Forward a broadcast event to the client"""
+        await self.send_json({'event': message['event'], 'data': message['data']})
@@ -0,0 +1,214 @@
+"""
+Resized WebP/JPEG derivatives of uploaded images
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+
+# Derivatives are built on this many background threads; 0 builds them inside the request
+DERIVATIVE_WORKERS = getattr(settings, 'IMAGE_DERIVATIVE_WORKERS', 2)
+
+# Variant name -> (width, height); images are cropped to fill the box
+AVATAR_VARIANTS = {
+    'thumb': (96, 96),
+    'card': (240, 240),
+    'hero': (480, 480),
+}
+
+NEWS_VARIANTS = {
+    'thumb': (320, 180),
+    'card': (640, 360),
+    'hero': (1280, 720),
+}
+
+# Format -> (file extension, Pillow save options)
+FORMATS = {
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 6}),
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def derivative_name(name, variant, extension):
+    """Storage name of a derivative, next to the original in a derivatives/ folder"""
+    folder, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(folder, 'derivatives', f'{stem}_{variant}.{extension}').replace(os.sep, '/')
+
+
+def fit_size(source_size, target_size):
+    """Target box scaled down so the source is never upscaled"""
+    scale = min(1.0, source_size[0] / target_size[0], source_size[1] / target_size[1])
+    return max(1, round(target_size[0] * scale)), max(1, round(target_size[1] * scale))
+
+
+def delete_derivatives(storage, derivatives):
+    """Remove previously generated files from storage"""
+    for variant in (derivatives or {}).get('variants', {}).values():
+        for fmt in FORMATS:
+            if variant.get(fmt):
+                storage.delete(variant[fmt])
+
+
+def generate_derivatives(field_file, variants):
+    """
+    Write every variant of an image in every format and describe them.
+    Returns {'source': name, 'variants': {variant: {'width', 'height', 'webp', 'jpeg'}}};
+    variants stay empty when the image cannot be read, so it is not retried on every save.
+    """
+    storage = field_file.storage
+    try:
+        field_file.open('rb')
+        with Image.open(field_file) as source:
+            source = ImageOps.exif_transpose(source)
+            if source.mode != 'RGB':
+                # Flatten transparency onto white, since JPEG has no alpha
+                background = Image.new('RGB', source.size, (255, 255, 255))
+                background.paste(source, mask=source.convert('RGBA').getchannel('A'))
+                source = background
+            source.load()
+    except (OSError, UnidentifiedImageError, AttributeError, ValueError) as e:
+        logger.warning('Cannot read image %s for derivatives: %s', field_file.name, e)
+        return {'source': field_file.name, 'variants': {}}
+    finally:
+        try:
+            field_file.close()
+        except Exception:
+            pass
+    
+    result = {'source': field_file.name, 'variants': {}}
+    for variant, target_size in variants.items():
+        width, height = fit_size(source.size, target_size)
+        resized = ImageOps.fit(source, (width, height), Image.LANCZOS)
+        entry = {'width': width, 'height': height}
+        
+        for fmt, (extension, options) in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, **options)
+            name = derivative_name(field_file.name, variant, extension)
+            # Overwrite in place rather than letting storage pick a new name
+            storage.delete(name)
+            entry[fmt] = storage.save(name, ContentFile(buffer.getvalue()))
+        
+        result['variants'][variant] = entry
+    return result
+
+
+def refresh_derivatives(instance, field_name, variants, force=False):
+    """
+    Regenerate the derivatives of an instance's image field when the image changed.
+    Saves the description to <field_name>_variants, and bumps updated_at where the
+    model has one, with a queryset update, so no save signals fire again. Returns
+    True when anything was written.
+    """
+    field_file = getattr(instance, field_name)
+    variants_field = f'{field_name}_variants'
+    current = getattr(instance, variants_field) or {}
+    
+    if not field_file:
+        derivatives = {}
+    elif force or current.get('source') != field_file.name:
+        derivatives = generate_derivatives(field_file, variants)
+    else:
+        return False
+    
+    if derivatives == current:
+        return False
+    
+    updates = {variants_field: derivatives}
+    if any(field.name == 'updated_at' for field in instance._meta.concrete_fields):
+        # Caches and validators keyed on updated_at must see the new variants
+        updates['updated_at'] = timezone.now()
+    for field, value in updates.items():
+        setattr(instance, field, value)
+    type(instance)._default_manager.filter(pk=instance.pk).update(**updates)
+    
+    # Old files go only once nothing points at them any more
+    if current and current.get('source') != derivatives.get('source'):
+        delete_derivatives(field_file.storage, current)
+    return True
+
+
+def derivatives_stale(instance, field_name):
+    """Whether an instance's image changed since its derivatives were built"""
+    field_file = getattr(instance, field_name)
+    current = getattr(instance, f'{field_name}_variants') or {}
+    if not field_file:
+        return bool(current)
+    return current.get('source') != field_file.name
+
+
+class DerivativeQueue:
+    """
+    Builds derivatives on a thread pool once the saving transaction commits, so
+    downloading and encoding an image stays off the request. Anything lost with
+    the process is picked up by generate_image_variants.
+    """
+    
+    def __init__(self, workers=DERIVATIVE_WORKERS):
+        self.workers = workers
+        self._executor = None
+        self._pending = set()
+        self._lock = threading.Lock()
+    
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image-derivatives')
+            return self._executor
+    
+    def submit(self, instance, field_name, variants, on_refresh=None):
+        """
+        Queue a rebuild of an instance's derivatives; on_refresh(instance) runs after
+        new ones are saved. An instance already waiting is not queued twice.
+        """
+        key = (type(instance), instance.pk, field_name)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        
+        if self.workers:
+            transaction.on_commit(lambda: self.get_executor().submit(self.process, key, variants, on_refresh))
+        else:
+            self.process(key, variants, on_refresh)
+    
+    def process(self, key, variants, on_refresh=None):
+        """Rebuild the derivatives of a queued instance; returns whether any were written"""
+        model, pk, field_name = key
+        with self._lock:
+            # Saves from now on queue again, so a newer image is never missed
+            self._pending.discard(key)
+        try:
+            instance = model._default_manager.filter(pk=pk).first()
+            if instance is None or not refresh_derivatives(instance, field_name, variants):
+                return False
+            if on_refresh:
+                on_refresh(instance)
+            return True
+        except Exception:
+            logger.exception('Building %s derivatives of %s %s failed', field_name, model.__name__, pk)
+            return False
+        finally:
+            if self.workers:
+                close_old_connections()
+    
+    def shutdown(self, wait=True):
+        """Finish queued builds and stop the workers"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+derivative_queue = DerivativeQueue()
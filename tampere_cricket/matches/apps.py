@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class MatchesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tampere_cricket.matches'
+    
+    def ready(self):
+        import tampere_cricket.matches.signals
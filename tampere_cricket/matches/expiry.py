@@ -0,0 +1,113 @@
+"""
+Cancelling open and pending challenges whose kick-off has passed
+
+The sweep cancels with chunked UPDATEs, which skip the Challenge signals, so it
+does their work itself once per run: matchmaking and slot availability are
+refreshed, open challenge pages are told, and everyone affected gets a single
+notification.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+
+from tampere_cricket.notifications.models import Notification
+from tampere_cricket.realtime import broadcast_many, group_for_challenge
+
+from .matchmaking import invalidate_open_challenges
+from .models import Challenge
+from .signals import slots_update
+
+
+# Challenges cancelled per UPDATE; small enough to keep row locks brief
+BATCH_SIZE = 500
+
+EXPIRING_STATUSES = ['OPEN', 'PENDING']
+
+
+def get_expired(now):
+    """Open and pending challenges that should have started by now"""
+    return Challenge.objects.filter(status__in=EXPIRING_STATUSES).filter(
+        Q(scheduled_at__lt=now) |
+        # Challenges without a kick-off time expire the day after their date
+        Q(scheduled_at__isnull=True, date__lt=timezone.localdate(now))
+    )
+
+
+# Everyone taking part in a challenge, whatever its type
+PARTICIPANT_FIELDS = [
+    'challenger_id', 'opponent_id', 'team1_batter_id', 'team1_bowler_id', 'team2_batter_id', 'team2_bowler_id',
+]
+
+
+def cancel_expired(now=None, batch_size=BATCH_SIZE):
+    """Cancel expired challenges chunk by chunk; returns a dict of id, scheduled_at and participant ids per challenge"""
+    now = now or timezone.now()
+    expired = get_expired(now).order_by('scheduled_at', 'id')
+    cancelled = []
+    while True:
+        with transaction.atomic():
+            chunk = expired
+            if connection.features.has_select_for_update_skip_locked:
+                # Challenges being accepted right now are left for the next run
+                chunk = chunk.select_for_update(skip_locked=True)
+            rows = list(chunk.values('id', 'scheduled_at', *PARTICIPANT_FIELDS)[:batch_size])
+            if not rows:
+                break
+            Challenge.objects.filter(id__in=[row['id'] for row in rows]).update(status='CANCELLED')
+        cancelled.extend(rows)
+    return cancelled
+
+
+def notify_expired(cancelled):
+    """
+    One notification per affected participant, however many of their challenges
+    expired, written for the whole run in one bulk insert. Returns how many users
+    were notified.
+    """
+    from tampere_cricket.accounts.models import User
+    
+    counts = Counter()
+    for row in cancelled:
+        counts.update({row[field] for field in PARTICIPANT_FIELDS if row[field]})
+    active = set(User.active_objects().filter(id__in=list(counts)).values_list('id', flat=True))
+    
+    messages = {}
+    for user_id, count in counts.items():
+        if user_id not in active:
+            continue
+        if count == 1:
+            messages[user_id] = (
+                'Challenge expired',
+                "Your challenge passed its date without being accepted and has been cancelled.",
+            )
+        else:
+            messages[user_id] = (
+                'Challenges expired',
+                f"{count} of your challenges passed their date without being accepted and have been cancelled.",
+            )
+    
+    notified = Notification.send_many(
+        messages,
+        url=reverse('challenges_list') + '?status=cancelled',
+        event_key=f'challenges_expired:{int(timezone.now().timestamp())}',
+    )
+    return len(notified)
+
+
+def expire_challenges(now=None, batch_size=BATCH_SIZE):
+    """Cancel expired challenges, then refresh what the skipped signals would have; returns (cancelled, notified)"""
+    cancelled = cancel_expired(now, batch_size)
+    if not cancelled:
+        return 0, 0
+    
+    invalidate_open_challenges()
+    days = {timezone.localtime(row['scheduled_at']).date() for row in cancelled if row['scheduled_at']}
+    # One batch of concurrent sends for every challenge page and day of slots
+    broadcast_many(
+        [(group_for_challenge(row['id']), 'challenge', {'id': row['id'], 'status': 'CANCELLED'}) for row in cancelled] +
+        [slots_update(day) for day in sorted(days)]
+    )
+    return len(cancelled), notify_expired(cancelled)
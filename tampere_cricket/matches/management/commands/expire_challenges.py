@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tampere_cricket.matches.expiry import BATCH_SIZE, expire_challenges
+
+
+class Command(BaseCommand):
+    help = 'Cancel open and pending challenges whose date has passed'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep sweeping instead of exiting after one run',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=300,
+            help='Seconds between sweeps with --loop (default: 300)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Challenges cancelled per UPDATE (default: {BATCH_SIZE})',
+        )
+    
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        try:
+            while True:
+                started = time.monotonic()
+                cancelled, notified = expire_challenges(batch_size=batch_size)
+                if cancelled or not options['loop']:
+                    self.stdout.write(self.style.SUCCESS(
+                        f'Cancelled {cancelled} expired challenges and notified {notified} users '
+                        f'in {time.monotonic() - started:.2f}s'
+                    ))
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
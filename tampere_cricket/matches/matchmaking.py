@@ -0,0 +1,166 @@
+"""
+Rating-aware matchmaking for open challenges
+"""
+import bisect
+import threading
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+
+
+# Seconds a worker keeps its local index before rebuilding from the database
+INDEX_TTL = 30
+
+# Shared version numbers, one per index, bumped when what the index holds changes
+# so every worker notices and rebuilds just that index on its next lookup
+PLAYERS_VERSION_KEY = 'matchmaking:players_version'
+CHALLENGES_VERSION_KEY = 'matchmaking:challenges_version'
+
+
+class RatingIndex:
+    """Entries kept sorted by rating for nearest-rating lookups"""
+    
+    def __init__(self, entries=()):
+        # entries are (rating, id, payload) tuples
+        self.entries = sorted(entries, key=lambda entry: (entry[0], entry[1]))
+        self.ratings = [entry[0] for entry in self.entries]
+    
+    def __len__(self):
+        return len(self.entries)
+    
+    def nearest(self, rating, limit, predicate=None):
+        """Payloads closest in rating, found by bisecting and walking outwards"""
+        right = bisect.bisect_left(self.ratings, rating)
+        left = right - 1
+        results = []
+        
+        while len(results) < limit and (left >= 0 or right < len(self.entries)):
+            take_left = right >= len(self.entries) or (
+                left >= 0 and rating - self.ratings[left] <= self.ratings[right] - rating
+            )
+            if take_left:
+                payload = self.entries[left][2]
+                left -= 1
+            else:
+                payload = self.entries[right][2]
+                right += 1
+            if predicate is None or predicate(payload):
+                results.append(payload)
+        return results
+
+
+class MatchmakingService:
+    """Per-worker cache of rating indexes with the database as source of truth"""
+    
+    def __init__(self, ttl=INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._built_at = {}
+        self._versions = {}
+        self.players = RatingIndex()
+        self.open_challenges = RatingIndex()
+    
+    def is_stale(self, key, version):
+        built_at = self._built_at.get(key)
+        return built_at is None or time.monotonic() - built_at > self.ttl or version != self._versions.get(key)
+    
+    def get_indexes(self):
+        """Return the player and open challenge indexes, rebuilding whichever is stale"""
+        versions = cache.get_many([PLAYERS_VERSION_KEY, CHALLENGES_VERSION_KEY])
+        with self._lock:
+            for key, rebuild in ((PLAYERS_VERSION_KEY, self.rebuild_players),
+                                 (CHALLENGES_VERSION_KEY, self.rebuild_open_challenges)):
+                version = versions.get(key, 0)
+                if self.is_stale(key, version):
+                    rebuild()
+                    self._built_at[key] = time.monotonic()
+                    self._versions[key] = version
+            return self.players, self.open_challenges
+    
+    def rebuild_players(self):
+        """Load ratings for active players from the database"""
+        from tampere_cricket.accounts.models import User
+        
+        players = User.active_objects().filter(is_active=True).values_list(
+            'id', 'username', 'profile__rating'
+        )
+        self.players = RatingIndex(
+            (rating or 0.0, user_id, {'id': user_id, 'username': username, 'rating': rating or 0.0})
+            for user_id, username, rating in players
+        )
+    
+    def rebuild_open_challenges(self):
+        """Load open challenges, rated by their challenger, from the database"""
+        from .models import Challenge
+        
+        open_challenges = Challenge.objects.filter(status='OPEN').values_list(
+            'id', 'challenger_id', 'challenger__username', 'challenge_type', 'date', 'challenger__profile__rating'
+        )
+        self.open_challenges = RatingIndex(
+            (rating or 0.0, challenge_id, {
+                'id': challenge_id,
+                'challenger_id': challenger_id,
+                'challenger': username,
+                'challenge_type': challenge_type,
+                'date': date,
+                'rating': rating or 0.0,
+            })
+            for challenge_id, challenger_id, username, challenge_type, date, rating in open_challenges
+        )
+    
+    def suggest(self, user, challenge_type=None, limit=5):
+        """Closest-rated players and open challenges for a user"""
+        from tampere_cricket.accounts.models import Profile, User
+        from .models import Challenge
+        
+        rating = Profile.objects.filter(user=user).values_list('rating', flat=True).first() or 0.0
+        players, open_challenges = self.get_indexes()
+        today = timezone.localdate()
+        
+        # Over-fetch, since entries may have changed since the snapshot was taken
+        player_candidates = players.nearest(
+            rating, limit * 2, lambda player: player['id'] != user.id
+        )
+        challenge_candidates = open_challenges.nearest(
+            rating, limit * 2, lambda challenge: (
+                challenge['challenger_id'] != user.id and
+                (not challenge_type or challenge['challenge_type'] == challenge_type) and
+                (challenge['date'] is None or challenge['date'] >= today)
+            )
+        )
+        
+        live_players = set(User.active_objects().filter(
+            id__in=[player['id'] for player in player_candidates], is_active=True
+        ).values_list('id', flat=True))
+        live_challenges = set(Challenge.objects.filter(
+            id__in=[challenge['id'] for challenge in challenge_candidates], status='OPEN'
+        ).values_list('id', flat=True))
+        
+        return {
+            'rating': rating,
+            'players': [player for player in player_candidates if player['id'] in live_players][:limit],
+            'open_challenges': [
+                challenge for challenge in challenge_candidates if challenge['id'] in live_challenges
+            ][:limit],
+        }
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def invalidate_open_challenges():
+    """Tell every worker to rebuild its open challenge index on the next lookup"""
+    bump_version(CHALLENGES_VERSION_KEY)
+
+
+def invalidate_players():
+    """Tell every worker to rebuild its player index on the next lookup"""
+    bump_version(PLAYERS_VERSION_KEY)
+
+
+matchmaking = MatchmakingService()
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grounds', '0003_remove_ground_address_remove_ground_lat_and_more'),
+        ('matches', '0010_alter_challenge_duration'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['completed_at'], name='challenge_completed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchresult',
+            index=models.Index(fields=['updated_at'], name='matchresult_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grounds', '0003_remove_ground_address_remove_ground_lat_and_more'),
+        ('matches', '0011_matchresult_updated_challenge_completed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['status', 'scheduled_at'], name='challenge_status_sched_idx'),
+        ),
+    ]
@@ -57,6 +57,13 @@ class Challenge(models.Model):
     accepted_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['completed_at'], name='challenge_completed_idx'),
+            # Expiry sweep of open and pending challenges past their kick-off
+            models.Index(fields=['status', 'scheduled_at'], name='challenge_status_sched_idx'),
+        ]
+    
     def __str__(self):
         if self.challenge_type == 'SINGLE_WICKET':
             try:
@@ -123,6 +130,10 @@ class Challenge(models.Model):
         else:
             return [self.opponent] if self.opponent else []
     
+    def get_metric(self):
+        """The metric the challenge is scored on, e.g. 'runs', whatever case it was entered in"""
+        return (self.metric or '').strip().lower()
+    
     def all_participants_accepted(self):
         """Check if all participants have accepted the challenge"""
         if self.challenge_type == 'SINGLE_WICKET':
@@ -167,7 +178,7 @@ class Challenge(models.Model):
                     'accepted': self.status == 'ACCEPTED'
                 }
             }
-
+    
     def clean(self):
         if self.date and self.date < timezone.now().date():
             raise ValidationError("Challenge date cannot be in the past")
@@ -224,11 +235,43 @@ class TimeSlot(models.Model):
     is_available = models.BooleanField(default=True)
     price = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     
+    # Challenges that can be booked into one slot
+    MAX_CHALLENGES = 2
+    
     def __str__(self):
         return f"{self.ground.name} - {self.date} {self.start_time}-{self.end_time}"
     
     class Meta:
         unique_together = ['ground', 'date', 'start_time']
+    
+    @classmethod
+    def get_availability(cls, date):
+        """Bookable slots of a day with how many active challenges each already holds"""
+        slots = cls.objects.filter(date=date, is_available=True).select_related('ground').order_by('start_time')
+        # One query for the day's bookings instead of a COUNT per slot
+        booked_times = [
+            timezone.localtime(scheduled_at).time()
+            for scheduled_at in Challenge.objects.filter(
+                scheduled_at__date=date,
+                status__in=['OPEN', 'PENDING', 'ACCEPTED']
+            ).values_list('scheduled_at', flat=True)
+        ]
+        
+        availability = []
+        for slot in slots:
+            current_count = sum(slot.start_time <= booked < slot.end_time for booked in booked_times)
+            availability.append({
+                'id': slot.id,
+                'display': f"{slot.start_time.strftime('%H:%M')} - {slot.end_time.strftime('%H:%M')}",
+                'start_time': slot.start_time.strftime('%H:%M'),
+                'end_time': slot.end_time.strftime('%H:%M'),
+                'price': float(slot.price),
+                'is_available': current_count < cls.MAX_CHALLENGES,
+                'current_count': current_count,
+                'max_challenges': cls.MAX_CHALLENGES,
+                'ground_name': slot.ground.name,
+            })
+        return availability
 
 
 class MatchResult(models.Model):
@@ -267,29 +310,31 @@ class MatchResult(models.Model):
     
     def get_challenger_score(self):
         """Get challenger's total score based on challenge metric"""
-        if self.challenge.metric == 'runs':
+        metric = self.challenge.get_metric()
+        if metric == 'runs':
             return self.challenger_runs
-        elif self.challenge.metric == 'wickets':
+        elif metric == 'wickets':
             return self.challenger_wickets
-        elif self.challenge.metric == 'sixes':
+        elif metric == 'sixes':
             return self.challenger_sixes
-        elif self.challenge.metric == 'fours':
+        elif metric == 'fours':
             return self.challenger_fours
-        elif self.challenge.metric == 'dots':
+        elif metric == 'dots':
             return self.challenger_dots
         return 0
     
     def get_opponent_score(self):
         """Get opponent's total score based on challenge metric"""
-        if self.challenge.metric == 'runs':
+        metric = self.challenge.get_metric()
+        if metric == 'runs':
             return self.opponent_runs
-        elif self.challenge.metric == 'wickets':
+        elif metric == 'wickets':
             return self.opponent_wickets
-        elif self.challenge.metric == 'sixes':
+        elif metric == 'sixes':
             return self.opponent_sixes
-        elif self.challenge.metric == 'fours':
+        elif metric == 'fours':
             return self.opponent_fours
-        elif self.challenge.metric == 'dots':
+        elif metric == 'dots':
             return self.opponent_dots
         return 0
     
@@ -331,3 +376,6 @@ class MatchResult(models.Model):
     class Meta:
         verbose_name = "Match Result"
         verbose_name_plural = "Match Results"
+        indexes = [
+            models.Index(fields=['updated_at'], name='matchresult_updated_idx'),
+        ]
@@ -0,0 +1,167 @@
+"""
+Monte-Carlo match outcome predictions from historical match results
+"""
+import numpy as np
+
+from django.core.cache import cache
+from django.db.models import Case, F, Q, When
+
+
+METRICS = ('runs', 'wickets', 'sixes', 'fours', 'dots')
+
+# Number of simulated matches per prediction
+SIMULATIONS = 100_000
+
+# Most recent results per player used to fit their distribution
+HISTORY_LIMIT = 50
+
+# Weight, in matches, given to the league-wide distribution when fitting a
+# player, so newcomers start at the league average
+PRIOR_MATCHES = 5
+
+# Seconds a prediction stays cached
+PREDICTION_TTL = 60 * 60
+
+# Bumped whenever a match result changes, so cached predictions are dropped
+VERSION_CACHE_KEY = 'prediction:version'
+
+
+def get_player_values(user, metric):
+    """Recent values of a metric for a player, taken from their side of each result"""
+    from .models import MatchResult
+    
+    single_wicket = Q(challenge__challenge_type='SINGLE_WICKET')
+    whens = [
+        When(~single_wicket & Q(challenge__challenger=user), then=F(f'challenger_{metric}')),
+        When(~single_wicket & Q(challenge__opponent=user), then=F(f'opponent_{metric}')),
+    ]
+    if metric == 'runs':
+        # Single wicket results record the batters' runs on each side
+        whens += [
+            When(single_wicket & Q(challenge__team1_batter=user), then=F('challenger_runs')),
+            When(single_wicket & Q(challenge__team2_batter=user), then=F('opponent_runs')),
+        ]
+    
+    values = MatchResult.objects.filter(
+        challenge__status='COMPLETED'
+    ).annotate(
+        value=Case(*whens, default=None)
+    ).filter(
+        value__isnull=False
+    ).order_by('-challenge__completed_at').values_list('value', flat=True)[:HISTORY_LIMIT]
+    return np.fromiter(values, dtype=np.float64)
+
+
+def get_league_values(metric):
+    """Recent values of a metric across both sides of all completed results"""
+    from .models import MatchResult
+    
+    rows = MatchResult.objects.filter(
+        challenge__status='COMPLETED'
+    ).order_by('-challenge__completed_at').values_list(
+        f'challenger_{metric}', f'opponent_{metric}'
+    )[:HISTORY_LIMIT * 20]
+    return np.array(list(rows), dtype=np.float64).ravel()
+
+
+def fit_distribution(values, league_values):
+    """Mean and variance of a player's metric, shrunk towards the league"""
+    league_mean = league_values.mean() if league_values.size else 0.0
+    league_var = league_values.var() if league_values.size else 0.0
+    if not values.size:
+        return league_mean, league_var
+    
+    weight = values.size / (values.size + PRIOR_MATCHES)
+    mean = weight * values.mean() + (1 - weight) * league_mean
+    var = weight * values.var() + (1 - weight) * league_var
+    return mean, var
+
+
+def sample_counts(rng, mean, var, size):
+    """Draw counts with the given mean and variance (negative binomial, or Poisson without overdispersion)"""
+    if mean <= 0:
+        return np.zeros(size)
+    if var > mean:
+        # Method of moments: mean = r(1-p)/p, var = mean/p
+        return rng.negative_binomial(mean * mean / (var - mean), mean / var, size)
+    return rng.poisson(mean, size)
+
+
+def percent(mask):
+    """Share of simulations where mask is true, as a percentage"""
+    return round(float(mask.mean()) * 100, 1)
+
+
+def simulate(challenger_fit, opponent_fit, target=None, single_wicket=False, simulations=SIMULATIONS, rng=None):
+    """Simulate matches, deciding each one the way MatchResult.determine_winner does"""
+    rng = rng or np.random.default_rng()
+    challenger = sample_counts(rng, *challenger_fit, simulations)
+    opponent = sample_counts(rng, *opponent_fit, simulations)
+    
+    if single_wicket or target is None:
+        challenger_wins = challenger > opponent
+    else:
+        challenger_hit = challenger >= target
+        opponent_hit = opponent >= target
+        challenger_wins = (challenger_hit & ~opponent_hit) | ((challenger_hit == opponent_hit) & (challenger > opponent))
+    
+    # Only single wicket challenges can be drawn; otherwise ties go to the opponent
+    draws = (challenger == opponent) if single_wicket else np.zeros(simulations, dtype=bool)
+    opponent_wins = ~challenger_wins & ~draws
+    
+    prediction = {
+        'simulations': simulations,
+        'challenger_win': percent(challenger_wins),
+        'opponent_win': percent(opponent_wins),
+        'draw': percent(draws),
+        'challenger_expected': round(float(challenger.mean()), 1),
+        'opponent_expected': round(float(opponent.mean()), 1),
+    }
+    if target is not None and not single_wicket:
+        prediction['challenger_target'] = percent(challenger >= target)
+        prediction['opponent_target'] = percent(opponent >= target)
+    return prediction
+
+
+def predict(challenger, opponent, metric, target=None, single_wicket=False):
+    """Cached outcome prediction for challenger vs opponent on a metric and target"""
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    cache_key = f'prediction:{version}:{challenger.id}:{opponent.id}:{metric}:{target}:{int(single_wicket)}'
+    prediction = cache.get(cache_key)
+    if prediction is None:
+        league_values = get_league_values(metric)
+        challenger_values = get_player_values(challenger, metric)
+        opponent_values = get_player_values(opponent, metric)
+        prediction = simulate(
+            fit_distribution(challenger_values, league_values),
+            fit_distribution(opponent_values, league_values),
+            target=target,
+            single_wicket=single_wicket,
+        )
+        prediction['challenger_matches'] = int(challenger_values.size)
+        prediction['opponent_matches'] = int(opponent_values.size)
+        cache.set(cache_key, prediction, PREDICTION_TTL)
+    return prediction
+
+
+def predict_challenge(challenge, opponent=None):
+    """Prediction for a challenge, or None when the sides or metric are not known yet"""
+    if challenge.challenge_type == 'SINGLE_WICKET':
+        # Single wicket challenges are decided on the batters' runs alone
+        if not challenge.team1_batter or not challenge.team2_batter:
+            return None
+        return predict(challenge.team1_batter, challenge.team2_batter, 'runs', single_wicket=True)
+    
+    opponent = challenge.opponent or opponent
+    metric = challenge.get_metric()
+    if opponent is None or opponent == challenge.challenger or metric not in METRICS:
+        return None
+    return predict(challenge.challenger, opponent, metric, challenge.target_value)
+
+
+def invalidate_predictions():
+    """Drop every cached prediction after results change"""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
@@ -0,0 +1,86 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from tampere_cricket.accounts.models import Profile, User
+from .models import Challenge, MatchResult, TimeSlot
+from .matchmaking import invalidate_open_challenges, invalidate_players
+from .prediction import invalidate_predictions
+from tampere_cricket.realtime import broadcast, group_for_challenge, group_for_slots, group_for_user
+
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def invalidate_challenge_index(sender, instance, **kwargs):
+    """Open challenges changed, so the matchmaking challenge index is stale"""
+    invalidate_open_challenges()
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_player_index(sender, instance, update_fields=None, **kwargs):
+    """A player's rating, name or status changed, so the matchmaking player index is stale"""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        # Logging in changes nothing the index holds
+        return
+    invalidate_players()
+
+
+@receiver(post_save, sender=MatchResult)
+@receiver(post_delete, sender=MatchResult)
+def invalidate_outcome_predictions(sender, instance, **kwargs):
+    """Results changed, so cached predictions were fitted on stale history"""
+    invalidate_predictions()
+
+
+def slots_update(day):
+    """(group, event, data) of a day's time slot availability, built when sent"""
+    return group_for_slots(day), 'slots', lambda: {
+        'date': day.isoformat(),
+        'slots': TimeSlot.get_availability(day),
+    }
+
+
+def broadcast_slots(day):
+    """Push a day's time slot availability to the pages watching it"""
+    broadcast(*slots_update(day))
+
+
+@receiver(post_save, sender=Challenge)
+def push_challenge_update(sender, instance, **kwargs):
+    """Push the challenge's state to its page and its players, and refresh slot availability"""
+    data = {
+        'id': instance.pk,
+        'status': instance.status,
+        'accepted': [
+            instance.team1_batter_accepted, instance.team1_bowler_accepted,
+            instance.team2_batter_accepted, instance.team2_bowler_accepted,
+        ],
+    }
+    broadcast(group_for_challenge(instance.pk), 'challenge', data)
+    for user_id in {instance.challenger_id, instance.opponent_id, instance.team1_batter_id,
+                    instance.team1_bowler_id, instance.team2_batter_id, instance.team2_bowler_id}:
+        if user_id:
+            broadcast(group_for_user(user_id), 'challenge', data)
+    
+    # The stored kick-off is noted by the notifications app's pre_save, so a rescheduled challenge frees its old slot
+    previous = getattr(instance, '_previous_state', None) or {}
+    days = {timezone.localtime(scheduled_at).date()
+            for scheduled_at in (instance.scheduled_at, previous.get('scheduled_at'))
+            if scheduled_at}
+    for day in days:
+        broadcast_slots(day)
+
+
+@receiver(post_delete, sender=Challenge)
+def push_freed_slot(sender, instance, **kwargs):
+    """A deleted challenge frees its time slot"""
+    if instance.scheduled_at:
+        broadcast_slots(timezone.localtime(instance.scheduled_at).date())
+
+
+@receiver(post_save, sender=TimeSlot)
+@receiver(post_delete, sender=TimeSlot)
+def push_slot_change(sender, instance, **kwargs):
+    """Slots were added, edited or removed by an admin"""
+    broadcast_slots(instance.date)
@@ -13,6 +13,8 @@ from django.db import models
 from .models import Challenge, TimeSlot, MatchResult
 from .serializers import ChallengeSerializer
 from .forms import ChallengeForm, MatchResultForm
+from .matchmaking import matchmaking
+from .prediction import predict_challenge
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
@@ -108,7 +110,14 @@ def challenges_list(request):
 def challenge_detail(request, challenge_id):
     """Display challenge details"""
     challenge = get_object_or_404(Challenge, id=challenge_id)
-    return render(request, 'challenges/detail.html', {'challenge': challenge})
+    
+    # Outcome odds while the challenge is still to be played
+    prediction = None
+    if challenge.status in ['OPEN', 'PENDING', 'ACCEPTED']:
+        viewer = request.user if request.user.is_authenticated else None
+        prediction = predict_challenge(challenge, opponent=viewer)
+    
+    return render(request, 'challenges/detail.html', {'challenge': challenge, 'prediction': prediction})
 
 
 @login_required
@@ -207,7 +216,10 @@ def challenge_accept(request, challenge_id):
             
             if not challenge_rules:
                 messages.error(request, 'You must agree to the Challenge Rules & Guidelines to accept this challenge.')
-                return render(request, 'challenges/accept_confirm.html', {'challenge': challenge})
+                return render(request, 'challenges/accept_confirm.html', {
+                    'challenge': challenge,
+                    'prediction': predict_challenge(challenge, opponent=request.user),
+                })
             
             # Mark the specific participant as accepted
             if challenge.team1_batter == request.user:
@@ -250,7 +262,10 @@ def challenge_accept(request, challenge_id):
             
             if not challenge_rules:
                 messages.error(request, 'You must agree to the Challenge Rules & Guidelines to accept this challenge.')
-                return render(request, 'challenges/accept_confirm.html', {'challenge': challenge})
+                return render(request, 'challenges/accept_confirm.html', {
+                    'challenge': challenge,
+                    'prediction': predict_challenge(challenge, opponent=request.user),
+                })
             
             # Check if challenge is still available for acceptance (prevent race conditions)
             if challenge.status != 'OPEN':
@@ -265,7 +280,10 @@ def challenge_accept(request, challenge_id):
             messages.success(request, "Challenge accepted successfully! You are now the opponent.")
             return redirect('challenge_detail', challenge_id=challenge_id)
     
-    return render(request, 'challenges/accept_confirm.html', {'challenge': challenge})
+    return render(request, 'challenges/accept_confirm.html', {
+        'challenge': challenge,
+        'prediction': predict_challenge(challenge, opponent=request.user),
+    })
 
 
 @login_required
@@ -421,6 +439,49 @@ def challenge_create(request):
     return render(request, 'challenges/create.html', {'form': form})
 
 
+@login_required
+@require_http_methods(["GET"])
+def suggested_opponents_api(request):
+    """API endpoint suggesting the closest-rated opponents and open challenges"""
+    challenge_type = request.GET.get('challenge_type', '')
+    if challenge_type and challenge_type not in dict(Challenge.CHALLENGE_TYPE_CHOICES):
+        return JsonResponse({'error': 'Invalid challenge type'}, status=400)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 5)), 1), 20)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid limit'}, status=400)
+    
+    suggestions = matchmaking.suggest(request.user, challenge_type=challenge_type or None, limit=limit)
+    rating = suggestions['rating']
+    
+    return JsonResponse({
+        'rating': rating,
+        'players': [
+            {
+                'id': player['id'],
+                'username': player['username'],
+                'rating': round(player['rating'], 1),
+                'rating_difference': round(player['rating'] - rating, 1),
+                'profile_url': reverse('public_profile', args=[player['id']]),
+            }
+            for player in suggestions['players']
+        ],
+        'open_challenges': [
+            {
+                'id': challenge['id'],
+                'challenger': challenge['challenger'],
+                'challenge_type': challenge['challenge_type'],
+                'date': challenge['date'].isoformat() if challenge['date'] else None,
+                'rating': round(challenge['rating'], 1),
+                'rating_difference': round(challenge['rating'] - rating, 1),
+                'url': reverse('challenge_detail', args=[challenge['id']]),
+            }
+            for challenge in suggestions['open_challenges']
+        ],
+    })
+
+
 @csrf_exempt
 @require_http_methods(["GET"])
 def timeslots_api(request):
@@ -436,35 +497,8 @@ def timeslots_api(request):
     except ValueError:
         return JsonResponse({'error': 'Invalid date format'}, status=400)
     
-    # Get only admin-created time slots for the selected date
-    time_slots = TimeSlot.objects.filter(date=selected_date, is_available=True).order_by('start_time')
-    
-    # Format the response
-    slots_data = []
-    for slot in time_slots:
-        # Count existing challenges for this time slot
-        existing_challenges = Challenge.objects.filter(
-            scheduled_at__date=selected_date,
-            scheduled_at__time__gte=slot.start_time,
-            scheduled_at__time__lt=slot.end_time,
-            status__in=['OPEN', 'PENDING', 'ACCEPTED']
-        ).count()
-        
-        # Calculate availability status
-        max_challenges = 2  # Maximum challenges per time slot
-        is_slot_available = existing_challenges < max_challenges
-        
-        slots_data.append({
-            'id': slot.id,
-            'display': f"{slot.start_time.strftime('%H:%M')} - {slot.end_time.strftime('%H:%M')}",
-            'start_time': slot.start_time.strftime('%H:%M'),
-            'end_time': slot.end_time.strftime('%H:%M'),
-            'price': float(slot.price),
-            'is_available': is_slot_available,
-            'current_count': existing_challenges,
-            'max_challenges': max_challenges,
-            'ground_name': slot.ground.name,
-        })
+    # Get only admin-created time slots for the selected date, with their bookings
+    slots_data = TimeSlot.get_availability(selected_date)
     
     return JsonResponse({
         'slots': slots_data,
@@ -5,12 +5,12 @@ from .models import News, NewsCategory
 
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
-    list_display = ('title', 'author', 'category', 'published', 'published_at', 'created_at', 'preview_link')
+    list_display = ('title', 'author', 'category', 'published', 'published_at', 'views', 'created_at', 'preview_link')
     list_filter = ('published', 'category', 'created_at', 'author')
     search_fields = ('title', 'content', 'excerpt')
     ordering = ('-created_at',)
     prepopulated_fields = {'slug': ('title',)}
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('views', 'created_at', 'updated_at')
     
     fieldsets = (
         ('Article Information', {
@@ -24,12 +24,17 @@ class NewsAdmin(admin.ModelAdmin):
             'fields': ('published', 'published_at', 'author')
         }),
         ('Timestamps', {
-            'fields': ('created_at', 'updated_at'),
+            'fields': ('views', 'created_at', 'updated_at'),
             'classes': ('collapse',)
         }),
     )
     
     def preview_link(self, obj):
+        if obj.is_scheduled:
+            return format_html(
+                '<span style="color: orange;">Scheduled for {}</span>',
+                obj.published_at.strftime('%Y-%m-%d %H:%M')
+            )
         if obj.published:
             return format_html(
                 '<a href="/news/" target="_blank" style="color: green;">View Highlights on Site</a>'
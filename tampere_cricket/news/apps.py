@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tampere_cricket.news'
+    
+    def ready(self):
+        import tampere_cricket.news.signals
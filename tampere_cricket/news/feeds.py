@@ -0,0 +1,53 @@
+"""
+RSS and Atom feeds of published highlights
+"""
+from django.contrib.syndication.views import Feed
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .models import News
+
+
+# Articles listed in each feed
+FEED_SIZE = 20
+
+
+class LatestHighlightsFeed(Feed):
+    """Latest published highlights, read as plain values so no model instances are built"""
+    title = 'SportsHub Highlights'
+    link = reverse_lazy('highlights')
+    description = 'Latest highlights from the SportsHub cricket community.'
+    
+    def items(self):
+        return News.published_objects().order_by('-published_at').values(
+            'title', 'slug', 'excerpt', 'content', 'published_at', 'updated_at',
+            'author__username', 'category__name'
+        )[:FEED_SIZE]
+    
+    def item_title(self, item):
+        return item['title']
+    
+    def item_description(self, item):
+        return item['excerpt'] or Truncator(item['content']).words(60)
+    
+    def item_link(self, item):
+        return reverse('highlights_detail', args=[item['slug']])
+    
+    def item_pubdate(self, item):
+        return item['published_at']
+    
+    def item_updateddate(self, item):
+        return item['updated_at']
+    
+    def item_author_name(self, item):
+        return item['author__username']
+    
+    def item_categories(self, item):
+        return [item['category__name']] if item['category__name'] else []
+
+
+class AtomHighlightsFeed(LatestHighlightsFeed):
+    """Atom version of the highlights feed"""
+    feed_type = Atom1Feed
+    subtitle = LatestHighlightsFeed.description
@@ -0,0 +1,187 @@
+"""
+Cached highlights listing with keyset pagination, and cached article pages
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.views.decorators.cache import cache_page
+
+
+# Articles per "load more" page
+PAGE_SIZE = 6
+
+# Articles drop off the listing this long after they were published
+LISTING_WINDOW = timedelta(days=30)
+
+# Most seconds a cached page or category list is kept; short, since the
+# listing window moves even when nothing is edited. Entries expire sooner
+# when a scheduled article is due, see get_cache_timeout.
+LIST_CACHE_TTL = 5 * 60
+
+# Seconds a published article is kept; saves invalidate it sooner
+DETAIL_CACHE_TTL = 60 * 60
+
+# Bumped whenever an article or category changes, so cached pages are dropped
+VERSION_CACHE_KEY = 'highlights:version'
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(article):
+    """Opaque cursor pointing just after an article in listing order"""
+    microseconds = (article.published_at - EPOCH) // timedelta(microseconds=1)
+    return f'{microseconds}_{article.id}'
+
+
+def decode_cursor(cursor):
+    """(microseconds since epoch, id) from a cursor, or None when it is missing or malformed"""
+    try:
+        microseconds, article_id = (int(part) for part in cursor.split('_'))
+        EPOCH + timedelta(microseconds=microseconds)
+    except (AttributeError, ValueError, OverflowError):
+        return None
+    return microseconds, article_id
+
+
+def get_next_publish_at():
+    """When the next scheduled article goes live, cached until then"""
+    from .models import News
+    
+    now = timezone.now()
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    cache_key = f'highlights:next_publish:{version}'
+    # Stored as a timestamp, or 0 when nothing is scheduled
+    next_publish = cache.get(cache_key)
+    if next_publish is None or 0 < next_publish <= now.timestamp():
+        next_publish_at = News.get_next_publish_at(now)
+        next_publish = next_publish_at.timestamp() if next_publish_at else 0
+        cache.set(cache_key, next_publish, LIST_CACHE_TTL)
+    return datetime.fromtimestamp(next_publish, dt_timezone.utc) if next_publish else None
+
+
+def get_cache_timeout(timeout=LIST_CACHE_TTL):
+    """Cache timeout cut short so entries expire the moment the next scheduled article goes live"""
+    next_publish_at = get_next_publish_at()
+    if next_publish_at is None:
+        return timeout
+    seconds_left = math.ceil((next_publish_at - timezone.now()).total_seconds())
+    return max(1, min(timeout, seconds_left))
+
+
+def cache_until_next_publish(timeout):
+    """
+    cache_page whose timeout is worked out per request with get_cache_timeout, so
+    feeds and sitemaps list a scheduled article as soon as it goes live. Pages are
+    keyed on the listing version, so invalidate_news_cache drops them too.
+    """
+    def decorator(view):
+        @wraps(view)
+        def cached_view(request, *args, **kwargs):
+            key_prefix = f'highlights:{cache.get(VERSION_CACHE_KEY, 0)}'
+            return cache_page(get_cache_timeout(timeout), key_prefix=key_prefix)(view)(request, *args, **kwargs)
+        return cached_view
+    return decorator
+
+
+def get_visible_news():
+    """Live articles inside the listing window, newest first"""
+    from .models import News
+    
+    now = timezone.now()
+    return News.published_objects(now).filter(
+        published_at__gte=now - LISTING_WINDOW
+    ).select_related('category', 'author').order_by('-published_at', '-id')
+
+
+def get_news_page(category_slug='', cursor=None):
+    """One page of the listing after a cursor, plus the cursor for the next page"""
+    # Key on the decoded position, so malformed cursors share the first page
+    position = decode_cursor(cursor)
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    cache_key = f'highlights:page:{version}:{category_slug}:{"%d_%d" % position if position else ""}'
+    page = cache.get(cache_key)
+    if page is not None:
+        return page
+    
+    news = get_visible_news()
+    if category_slug:
+        news = news.filter(category__slug=category_slug)
+    
+    if position:
+        microseconds, article_id = position
+        published_at = EPOCH + timedelta(microseconds=microseconds)
+        news = news.filter(
+            Q(published_at__lt=published_at) | Q(published_at=published_at, id__lt=article_id)
+        )
+    
+    # Fetch one extra article to learn whether there is a next page without a COUNT(*)
+    articles = list(news[:PAGE_SIZE + 1])
+    next_cursor = encode_cursor(articles[PAGE_SIZE - 1]) if len(articles) > PAGE_SIZE else None
+    page = (articles[:PAGE_SIZE], next_cursor)
+    
+    cache.set(cache_key, page, get_cache_timeout())
+    return page
+
+
+def get_search_page(news, page_number):
+    """One page of ranked search results; rank order has no stable keyset, so page by offset"""
+    try:
+        page_number = max(int(page_number), 1)
+    except (TypeError, ValueError):
+        page_number = 1
+    
+    offset = (page_number - 1) * PAGE_SIZE
+    articles = list(news[offset:offset + PAGE_SIZE + 1])
+    next_page = page_number + 1 if len(articles) > PAGE_SIZE else None
+    return articles[:PAGE_SIZE], next_page
+
+
+def get_categories():
+    """All categories with their number of listed articles"""
+    from .models import NewsCategory
+    
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    cache_key = f'highlights:categories:{version}'
+    categories = cache.get(cache_key)
+    if categories is None:
+        now = timezone.now()
+        categories = list(NewsCategory.objects.annotate(
+            article_count=Count('news_articles', filter=Q(
+                news_articles__published=True,
+                news_articles__published_at__lte=now,
+                news_articles__published_at__gte=now - LISTING_WINDOW
+            ))
+        ))
+        cache.set(cache_key, categories, get_cache_timeout())
+    return categories
+
+
+def get_article(slug):
+    """Published article for a slug, cached until it is next saved"""
+    from .models import News
+    
+    cache_key = f'highlights:detail:{slug}'
+    article = cache.get(cache_key)
+    if article is None:
+        article = News.published_objects().filter(slug=slug).select_related('category', 'author').first()
+        # Unknown and scheduled slugs are not cached, so random URLs cannot fill the cache
+        if article is not None:
+            cache.set(cache_key, article, DETAIL_CACHE_TTL)
+    return article
+
+
+def invalidate_articles(slugs):
+    """Drop the cached article pages for some slugs"""
+    cache.delete_many([f'highlights:detail:{slug}' for slug in slugs if slug])
+
+
+def invalidate_news_cache():
+    """Drop every cached listing page and category list"""
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 1, None)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from tampere_cricket.news.models import News
+from tampere_cricket.news.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for highlights articles'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding search index with {backend.__class__.__name__}...')
+        
+        backend.rebuild()
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully indexed {News.objects.count()} articles!')
+        )
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def install_search_index(apps, schema_editor):
+    from tampere_cricket.news.search import get_search_backend
+    get_search_backend(schema_editor.connection).install()
+
+
+def uninstall_search_index(apps, schema_editor):
+    from tampere_cricket.news.search import get_search_backend
+    get_search_backend(schema_editor.connection).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_newscategory_news_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_news_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='featured_image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Resized copies of the featured image'),
+        ),
+    ]
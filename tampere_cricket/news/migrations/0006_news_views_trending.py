@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_featured_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='views',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Times this article was read'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, help_text='Time-decayed views, see news.trending'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['-trending_score'], name='news_trending_idx'),
+        ),
+    ]
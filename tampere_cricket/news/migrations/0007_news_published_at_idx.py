@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_views_trending'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='news',
+            name='published_at',
+            field=models.DateTimeField(blank=True, help_text='When this article goes live; set a future time to schedule it', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['published', 'published_at'], name='news_published_at_idx'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+import zlib
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -29,8 +31,11 @@ class News(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='news_articles')
     category = models.ForeignKey(NewsCategory, on_delete=models.SET_NULL, null=True, blank=True, related_name='news_articles')
     featured_image = models.ImageField(upload_to='news/images/', blank=True, null=True, help_text="Featured image for the highlights article")
+    featured_image_variants = models.JSONField(default=dict, blank=True, editable=False, help_text="Resized copies of the featured image")
     published = models.BooleanField(default=False, help_text="Publish this article")
-    published_at = models.DateTimeField(null=True, blank=True, help_text="When this article was published")
+    published_at = models.DateTimeField(null=True, blank=True, help_text="When this article goes live; set a future time to schedule it")
+    views = models.PositiveIntegerField(default=0, editable=False, help_text="Times this article was read")
+    trending_score = models.FloatField(default=0, editable=False, help_text="Time-decayed views, see news.trending")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -38,17 +43,71 @@ class News(models.Model):
         ordering = ['-published_at', '-created_at']
         verbose_name = 'Highlights Article'
         verbose_name_plural = 'Highlights Articles'
+        indexes = [
+            models.Index(fields=['-trending_score'], name='news_trending_idx'),
+            models.Index(fields=['published', 'published_at'], name='news_published_at_idx'),
+        ]
+    
+    # Leave room in the slug field for a "-<n>" suffix
+    SLUG_BASE_LENGTH = 190
     
     def __str__(self):
         return self.title
     
+    @classmethod
+    def published_objects(cls, at=None):
+        """Articles that are live at a moment (now by default); scheduled ones stay hidden until published_at"""
+        return cls.objects.filter(published=True, published_at__lte=at or timezone.now())
+    
+    @classmethod
+    def get_next_publish_at(cls, at=None):
+        """When the next scheduled article goes live, or None"""
+        return cls.objects.filter(
+            published=True, published_at__gt=at or timezone.now()
+        ).order_by('published_at').values_list('published_at', flat=True).first()
+    
+    @classmethod
+    def assign_slugs(cls, articles):
+        """Give every article without a slug a unique one, using one query per distinct title"""
+        used = set()
+        checked_bases = set()
+        for article in articles:
+            if article.slug:
+                used.add(article.slug)
+                continue
+            
+            base = slugify(article.title)[:cls.SLUG_BASE_LENGTH].strip('-') or 'article'
+            if base not in checked_bases:
+                used.update(cls.objects.filter(slug__startswith=base).exclude(pk=article.pk).values_list('slug', flat=True))
+                checked_bases.add(base)
+            
+            slug, suffix = base, 2
+            while slug in used:
+                slug = f'{base}-{suffix}'
+                suffix += 1
+            used.add(slug)
+            article.slug = slug
+    
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            News.assign_slugs([self])
         if self.published and not self.published_at:
             self.published_at = timezone.now()
         super().save(*args, **kwargs)
     
+    @property
+    def render_version(self):
+        """
+        Changes whenever the article renders differently: on every save, and
+        when the variants of its current featured image are built
+        """
+        variants_source = (self.featured_image_variants or {}).get('source') or ''
+        return f'{self.updated_at.timestamp()}-{zlib.crc32(variants_source.encode()):08x}'
+    
     @property
     def is_published(self):
-        return self.published and self.published_at is not None
\ No newline at end of file
+        return self.published and self.published_at is not None and self.published_at <= timezone.now()
+    
+    @property
+    def is_scheduled(self):
+        return self.published and self.published_at is not None and self.published_at > timezone.now()
\ No newline at end of file
@@ -0,0 +1,190 @@
+"""
+Full-text search over highlights articles
+
+PostgreSQL keeps a weighted tsvector per article in a GIN-indexed shadow
+table, SQLite keeps an FTS5 virtual table. Other databases fall back to
+substring matching.
+"""
+import re
+
+from django.db import connection as default_connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_TABLE = 'news_search'
+
+# Relative importance of matches in the title, excerpt and content
+TITLE_WEIGHT = 10.0
+EXCERPT_WEIGHT = 5.0
+CONTENT_WEIGHT = 1.0
+
+
+class SearchBackend:
+    """Substring search used when the database has no full-text support"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def install(self):
+        """Create the search table and index every existing article"""
+    
+    def uninstall(self):
+        """Drop the search table"""
+    
+    def index(self, article):
+        """Add or refresh one article in the search table"""
+    
+    def remove(self, article_id):
+        """Drop one article from the search table"""
+    
+    def rebuild(self):
+        """Re-index every article"""
+    
+    def search(self, queryset, query):
+        """Articles matching the query, best matches first"""
+        return queryset.filter(
+            Q(title__icontains=query) | Q(excerpt__icontains=query) | Q(content__icontains=query)
+        )
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Weighted tsvector documents in a GIN-indexed table"""
+    
+    DOCUMENT_SQL = (
+        "setweight(to_tsvector('english', coalesce({title}, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce({excerpt}, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce({content}, '')), 'D')"
+    )
+    
+    # ts_rank weights are listed in {D, C, B, A} order
+    RANK_WEIGHTS = '{%s, 0, %s, %s}' % (
+        CONTENT_WEIGHT / TITLE_WEIGHT, EXCERPT_WEIGHT / TITLE_WEIGHT, 1.0
+    )
+    
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE {SEARCH_TABLE} ("
+                f"news_id bigint PRIMARY KEY REFERENCES news_news (id) ON DELETE CASCADE, "
+                f"document tsvector NOT NULL)"
+            )
+            cursor.execute(f"CREATE INDEX {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING gin (document)")
+        self.rebuild()
+    
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    
+    def index(self, article):
+        document = self.DOCUMENT_SQL.format(title='%s', excerpt='%s', content='%s')
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (news_id, document) VALUES (%s, {document}) "
+                f"ON CONFLICT (news_id) DO UPDATE SET document = EXCLUDED.document",
+                [article.pk, article.title, article.excerpt, article.content]
+            )
+    
+    def remove(self, article_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE news_id = %s", [article_id])
+    
+    def rebuild(self):
+        document = self.DOCUMENT_SQL.format(title='title', excerpt='excerpt', content='content')
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(f"INSERT INTO {SEARCH_TABLE} (news_id, document) SELECT id, {document} FROM news_news")
+    
+    def search(self, queryset, query):
+        table = queryset.model._meta.db_table
+        matches = RawSQL(
+            f"SELECT news_id FROM {SEARCH_TABLE} WHERE document @@ websearch_to_tsquery('english', %s)",
+            [query]
+        )
+        rank = RawSQL(
+            f"SELECT ts_rank('{self.RANK_WEIGHTS}', document, websearch_to_tsquery('english', %s)) "
+            f"FROM {SEARCH_TABLE} WHERE news_id = {table}.id",
+            [query], output_field=FloatField()
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank).order_by('-search_rank', '-published_at')
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 virtual table keyed by article id"""
+    
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(title, excerpt, content, tokenize='porter unicode61')"
+            )
+        self.rebuild()
+    
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+    
+    def index(self, article):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [article.pk])
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, excerpt, content) VALUES (%s, %s, %s, %s)",
+                [article.pk, article.title, article.excerpt, article.content]
+            )
+    
+    def remove(self, article_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [article_id])
+    
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, excerpt, content) "
+                f"SELECT id, title, excerpt, content FROM news_news"
+            )
+    
+    def search(self, queryset, query):
+        # Quote every word so user input can never be read as FTS5 syntax,
+        # and prefix-match so partial words still find articles
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return queryset.none()
+        match = ' '.join(f'"{term}"*' for term in terms)
+        
+        table = queryset.model._meta.db_table
+        matches = RawSQL(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s", [match])
+        # bm25 scores are lower for better matches
+        rank = RawSQL(
+            f"SELECT -bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {EXCERPT_WEIGHT}, {CONTENT_WEIGHT}) "
+            f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s AND rowid = {table}.id",
+            [match], output_field=FloatField()
+        )
+        return queryset.filter(id__in=matches).annotate(search_rank=rank).order_by('-search_rank', '-published_at')
+
+
+# FTS5 availability per database alias, checked once per process
+_fts5_support = {}
+
+
+def sqlite_supports_fts5(connection):
+    """Whether the SQLite library was compiled with FTS5"""
+    if connection.alias not in _fts5_support:
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA compile_options")
+            _fts5_support[connection.alias] = any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+    return _fts5_support[connection.alias]
+
+
+def get_search_backend(connection=None):
+    """Search backend suited to the database behind a connection"""
+    connection = connection or default_connection
+    if connection.vendor == 'postgresql':
+        return PostgresSearchBackend(connection)
+    if connection.vendor == 'sqlite' and sqlite_supports_fts5(connection):
+        return SQLiteSearchBackend(connection)
+    return SearchBackend(connection)
+
+
+def search_news(queryset, query):
+    """Filter and rank a News queryset by a free-text query"""
+    return get_search_backend().search(queryset, query)
@@ -0,0 +1,63 @@
+from django.db.models.signals import post_save, post_delete, pre_save, pre_delete
+from django.dispatch import receiver
+from .models import News, NewsCategory
+from tampere_cricket.images import NEWS_VARIANTS, derivative_queue, derivatives_stale
+from .listing import invalidate_articles, invalidate_news_cache
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=News)
+def index_news_for_search(sender, instance, **kwargs):
+    """Keep the full-text search table in step with the article"""
+    get_search_backend().index(instance)
+
+
+@receiver(post_save, sender=News)
+def generate_featured_image_variants(sender, instance, raw=False, **kwargs):
+    """Create resized copies of a newly uploaded featured image, in the background"""
+    if raw or not derivatives_stale(instance, 'featured_image'):
+        return
+    derivative_queue.submit(instance, 'featured_image', NEWS_VARIANTS, on_refresh=featured_image_refreshed)
+
+
+def featured_image_refreshed(article):
+    """Cached pages still point at the old images"""
+    invalidate_articles({article.slug})
+    invalidate_news_cache()
+
+
+@receiver(post_delete, sender=News)
+def remove_news_from_search(sender, instance, **kwargs):
+    """Deleted articles must stop matching searches"""
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=NewsCategory)
+@receiver(post_delete, sender=NewsCategory)
+def invalidate_news_listing(sender, instance, **kwargs):
+    """Articles or categories changed, so cached listing, feed and sitemap pages are stale"""
+    invalidate_news_cache()
+
+
+@receiver(pre_save, sender=News)
+def remember_previous_slug(sender, instance, **kwargs):
+    """Note the stored slug, so a renamed article's old page can be dropped"""
+    instance._previous_slug = None
+    if instance.pk:
+        instance._previous_slug = News.objects.filter(pk=instance.pk).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+def invalidate_article_page(sender, instance, **kwargs):
+    """Edited, unpublished or deleted articles must not be served from the cache"""
+    invalidate_articles({instance.slug, getattr(instance, '_previous_slug', None)})
+
+
+@receiver(post_save, sender=NewsCategory)
+@receiver(pre_delete, sender=NewsCategory)
+def invalidate_category_articles(sender, instance, **kwargs):
+    """Article pages show their category, so drop them when it changes"""
+    invalidate_articles(News.objects.filter(category=instance).values_list('slug', flat=True))
@@ -0,0 +1,74 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import News
+
+User = get_user_model()
+
+
+class CachedFeedTests(TestCase):
+    """Cached feeds and sitemaps follow article edits without waiting for their TTL"""
+    
+    urls = ['/highlights/feed/rss/', '/highlights/feed/atom/', '/sitemap-highlights.xml']
+    
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer', password='x')
+        self.article = News.objects.create(title='Derby day', content='Runs', author=self.author, published=True)
+    
+    def assertListed(self, text, listed=True):
+        for url in self.urls:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(text in response.content.decode(), listed, url)
+    
+    def test_edits_replace_cached_pages(self):
+        self.assertListed('derby-day')
+        
+        self.article.title = 'Derby night'
+        self.article.slug = 'derby-night'
+        self.article.save()
+        
+        self.assertListed('derby-night')
+        self.assertListed('derby-day', listed=False)
+    
+    def test_deleted_article_drops_out(self):
+        self.assertListed('derby-day')
+        
+        self.article.delete()
+        
+        self.assertListed('derby-day', listed=False)
+    
+    def test_stale_copy_is_not_revalidated(self):
+        url = reverse('highlights_rss')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        self.article.excerpt = 'Corrected'
+        self.article.save()
+        
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+    
+    def test_rescheduled_article_is_listed_at_once(self):
+        self.article.published_at = timezone.now() + timedelta(hours=1)
+        self.article.save()
+        self.assertListed('derby-day', listed=False)
+        
+        # Brought forward: the pages cached while it was scheduled must go
+        self.article.published_at = timezone.now() - timedelta(seconds=1)
+        self.article.save()
+        
+        self.assertListed('derby-day')
+    
+    def test_unpublished_article_drops_out(self):
+        self.assertListed('derby-day')
+        
+        self.article.published = False
+        self.article.save()
+        
+        self.assertListed('derby-day', listed=False)
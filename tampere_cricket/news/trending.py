@@ -0,0 +1,135 @@
+"""
+Buffered article view counts and a time-decayed trending score
+
+Views are counted in memory and written in batches, so hot articles do not
+serialise every request on one row lock. The trending score of an article is
+log(sum(exp(DECAY_RATE * (t - TRENDING_EPOCH)))) over its views: ordering by
+it equals ordering by exponentially decayed view counts at any moment, and it
+only changes when new views arrive, so it can be indexed.
+"""
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+# A view counts half as much towards trending after this long
+TRENDING_HALF_LIFE = timedelta(hours=24)
+DECAY_RATE = math.log(2) / TRENDING_HALF_LIFE.total_seconds()
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Buffered views are written once either limit is reached
+FLUSH_INTERVAL = 30
+FLUSH_THRESHOLD = 100
+
+# Seconds the trending list is cached; scores only move when views are flushed
+TRENDING_CACHE_TTL = 60
+
+
+def trending_increment(views, at):
+    """Log-space contribution of some views at a moment"""
+    return math.log(views) + DECAY_RATE * (at - TRENDING_EPOCH).total_seconds()
+
+
+def add_trending(score, views, at):
+    """Trending score after adding views, computed without overflowing"""
+    increment = trending_increment(views, at)
+    high, low = max(score, increment), min(score, increment)
+    return high + math.log1p(math.exp(low - high))
+
+
+def apply_views(counts, at=None):
+    """Add view counts to articles and fold them into their trending scores in one UPDATE"""
+    from .models import News
+    
+    at = at or timezone.now()
+    with transaction.atomic():
+        scores = dict(
+            News.objects.select_for_update().filter(id__in=counts).values_list('id', 'trending_score')
+        )
+        if not scores:
+            return 0
+        
+        News.objects.filter(id__in=scores).update(
+            views=F('views') + Case(
+                *[When(id=article_id, then=Value(counts[article_id])) for article_id in scores],
+                output_field=IntegerField()
+            ),
+            trending_score=Case(
+                *[When(id=article_id, then=Value(add_trending(score, counts[article_id], at)))
+                  for article_id, score in scores.items()],
+                output_field=FloatField()
+            ),
+        )
+    return len(scores)
+
+
+class ViewCounter:
+    """Per-process buffer of article views, flushed to the database in batches"""
+    
+    def __init__(self, flush_interval=FLUSH_INTERVAL, flush_threshold=FLUSH_THRESHOLD):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+    
+    def record(self, article_id):
+        """Count one view, flushing the buffer when it is due"""
+        with self._lock:
+            self._counts[article_id] += 1
+            self._pending += 1
+            due = (
+                self._pending >= self.flush_threshold or
+                time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+    
+    def flush(self):
+        """Write all buffered views; returns the number of articles updated"""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+            self._pending = 0
+            self._last_flush = time.monotonic()
+        if not counts:
+            return 0
+        
+        try:
+            return apply_views(counts)
+        except Exception:
+            # Put the views back so the next flush retries them
+            logger.exception('Failed to flush %d article view counts', len(counts))
+            with self._lock:
+                self._counts.update(counts)
+                self._pending += sum(counts.values())
+            return 0
+
+
+def get_trending_news(limit=3):
+    """Listed articles with the highest trending score, newest first on ties"""
+    from .listing import get_cache_timeout, get_visible_news
+    
+    cache_key = f'highlights:trending:{limit}'
+    articles = cache.get(cache_key)
+    if articles is None:
+        articles = list(get_visible_news().order_by('-trending_score', '-published_at')[:limit])
+        cache.set(cache_key, articles, get_cache_timeout(TRENDING_CACHE_TTL))
+    return articles
+
+
+view_counter = ViewCounter()
+
+# Do not lose the tail of the buffer when a worker shuts down cleanly
+atexit.register(view_counter.flush)
@@ -1,7 +1,15 @@
 from django.urls import path
+from django.views.decorators.http import conditional_page
 from . import views
+from .feeds import AtomHighlightsFeed, LatestHighlightsFeed
+from .listing import cache_until_next_publish
+
+# Most seconds feeds are served from the cache; less when a scheduled article is due
+FEED_CACHE_TTL = 15 * 60
 
 urlpatterns = [
     path('', views.news_list, name='highlights'),
+    path('feed/rss/', conditional_page(cache_until_next_publish(FEED_CACHE_TTL)(LatestHighlightsFeed())), name='highlights_rss'),
+    path('feed/atom/', conditional_page(cache_until_next_publish(FEED_CACHE_TTL)(AtomHighlightsFeed())), name='highlights_atom'),
     path('<slug:slug>/', views.news_detail, name='highlights_detail'),
 ]
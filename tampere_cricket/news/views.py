@@ -1,61 +1,94 @@
-from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
-from django.utils import timezone
-from datetime import timedelta
-from .models import News, NewsCategory
+from django.http import Http404
+from django.shortcuts import render
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_cookie
+from tampere_cricket.notifications.models import UnreadCounter
+from .listing import get_article, get_categories, get_news_page, get_search_page, get_visible_news
+from .search import search_news
+from .trending import view_counter
 
 
 def news_list(request):
-    """List all published highlights with category filtering and pagination"""
+    """List all published highlights with category filtering and "load more" pagination"""
     # Get filter parameters
     category_slug = request.GET.get('category', '')
     search_query = request.GET.get('search', '')
-    page = request.GET.get('page', 1)
+    after = request.GET.get('after')
     
-    # Get all published highlights that are not older than 1 month
-    one_month_ago = timezone.now() - timedelta(days=30)
-    news = News.objects.filter(
-        published=True,
-        created_at__gte=one_month_ago
-    ).order_by('-published_at')
-    
-    # Apply category filter
-    if category_slug:
-        news = news.filter(category__slug=category_slug)
-    
-    # Apply search filter
-    if search_query:
-        news = news.filter(title__icontains=search_query)
-    
-    # Paginate results (6 per page)
-    paginator = Paginator(news, 6)
-    try:
-        news_page = paginator.page(page)
-    except:
-        news_page = paginator.page(1)
-    
-    # Get all categories for filter
-    categories = NewsCategory.objects.all()
+    # Get all categories for filter, with their article counts
+    categories = get_categories()
     
     # Get current category
     current_category = None
     if category_slug:
-        current_category = NewsCategory.objects.filter(slug=category_slug).first()
+        current_category = next((category for category in categories if category.slug == category_slug), None)
+    
+    if category_slug and current_category is None:
+        # Unknown category, nothing to list
+        articles, next_page = [], None
+    elif search_query:
+        # Full-text search, ranked over title, excerpt and content
+        news = get_visible_news()
+        if category_slug:
+            news = news.filter(category__slug=category_slug)
+        articles, next_page = get_search_page(search_news(news, search_query), after)
+    else:
+        # Cached pages, continued from the last article shown
+        articles, next_page = get_news_page(category_slug, after)
     
     context = {
-        'news': news_page,
+        'news': articles,
         'categories': categories,
         'current_category': current_category,
         'search_query': search_query,
-        'paginator': paginator,
-        'has_next': news_page.has_next(),
-        'next_page': news_page.next_page_number() if news_page.has_next() else None,
+        'has_next': next_page is not None,
+        'next_page': next_page,
     }
     
     return render(request, 'highlights.html', context)
 
 
+def reader_version(request):
+    """
+    What the page's navigation shows a reader: who is logged in and their unread
+    notification count. base.html renders both, so they are part of the ETag.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return 'anon'
+    return f'{user.pk}-{UnreadCounter.get_unread(user)}'
+
+
+def article_etag(request, slug):
+    """ETag for conditional GETs of an article, from its render version and the reader"""
+    article = get_article(slug)
+    return f'"{article.pk}-{article.render_version}-{reader_version(request)}"' if article else None
+
+
+def article_last_modified(request, slug):
+    """
+    Last-Modified for conditional GETs of an article. Only sent to anonymous
+    readers, since a logged-in page also changes with their notifications.
+    """
+    article = get_article(slug)
+    if article is None or request.user.is_authenticated:
+        return None
+    return article.updated_at
+
+
 def news_detail(request, slug):
-    """Display individual highlights article"""
-    article = get_object_or_404(News, slug=slug, published=True)
-    return render(request, 'highlights/detail.html', {'article': article})
+    """Display individual highlights article, counting the view"""
+    article = get_article(slug)
+    if article is None:
+        raise Http404("No highlights article found")
+    
+    # Count every read, including ones answered with 304 Not Modified
+    view_counter.record(article.pk)
+    return render_article(request, slug)
+
+
+@vary_on_cookie
+@condition(etag_func=article_etag, last_modified_func=article_last_modified)
+def render_article(request, slug):
+    """Render an article unless the reader's copy is still current"""
+    return render(request, 'highlights/detail.html', {'article': get_article(slug)})
@@ -1,10 +1,32 @@
 from django.contrib import admin
-from .models import Notification
+from .models import ChallengeReminder, Notification, PushDelivery, UnreadCounter
 
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('user', 'title', 'is_read', 'created_at')
+    list_display = ('user', 'title', 'event_key', 'is_read', 'created_at')
     list_filter = ('is_read', 'created_at')
     search_fields = ('user__username', 'title', 'message')
     ordering = ('-created_at',)
+
+
+@admin.register(UnreadCounter)
+class UnreadCounterAdmin(admin.ModelAdmin):
+    list_display = ('user', 'unread')
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'unread')
+
+
+@admin.register(PushDelivery)
+class PushDeliveryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'title', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('user__username', 'title', 'token')
+    ordering = ('-created_at',)
+
+
+@admin.register(ChallengeReminder)
+class ChallengeReminderAdmin(admin.ModelAdmin):
+    list_display = ('challenge', 'minutes_before', 'due_at')
+    ordering = ('due_at',)
+    raw_id_fields = ('challenge',)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class NotificationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tampere_cricket.notifications'
+    
+    def ready(self):
+        import tampere_cricket.notifications.signals
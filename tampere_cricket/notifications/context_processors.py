@@ -0,0 +1,9 @@
+from .models import UnreadCounter
+
+
+def unread_notifications(request):
+    """Unread notification count for the navbar badge, read from the counter only when rendered"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {'unread_notifications': lambda: UnreadCounter.get_unread(user)}
@@ -0,0 +1,103 @@
+"""
+Challenge lifecycle events and the notifications they fan out to
+
+Signals compare a challenge with its state before the save; every change of
+status, and every single wicket player accepting, becomes one event, written
+for all of its recipients by Notification.fan_out.
+"""
+from django.urls import reverse
+
+from .models import Notification
+
+
+# Single wicket roles and their acceptance flags
+SINGLE_WICKET_ROLES = ['team1_batter', 'team1_bowler', 'team2_batter', 'team2_bowler']
+
+
+def involved_users(challenge):
+    """Active users taking part in a challenge, including its creator"""
+    users = {user.pk: user for user in challenge.get_active_participants()}
+    if challenge.challenger and not challenge.challenger.is_deleted:
+        users.setdefault(challenge.challenger.pk, challenge.challenger)
+    return users
+
+
+def get_events(challenge, previous):
+    """
+    (event_key, recipient ids, title, message) for what changed since the previous snapshot.
+    previous is None for a new challenge.
+    """
+    events = []
+    prefix = f'challenge:{challenge.pk}'
+    users = involved_users(challenge)
+    others = [user_id for user_id in users if user_id != challenge.challenger_id]
+    when = f" on {challenge.date:%d %b %Y}" if challenge.date else ''
+    challenger_name = challenge.get_challenger_display_name()
+    
+    if previous is None:
+        if challenge.challenge_type == 'SINGLE_WICKET':
+            events.append((
+                f'{prefix}:created', others,
+                'You have been picked for a challenge',
+                f"{challenger_name} picked you for a single wicket challenge{when}. Accept it to confirm your place.",
+            ))
+        elif challenge.status == 'PENDING':
+            events.append((
+                f'{prefix}:created', others,
+                f'New challenge from {challenger_name}',
+                f"{challenger_name} challenged you to a {challenge.get_challenge_type_display()}{when}.",
+            ))
+        return events
+    
+    if challenge.challenge_type == 'SINGLE_WICKET':
+        accepted_count = sum(getattr(challenge, f'{role}_accepted') for role in SINGLE_WICKET_ROLES)
+        for role in SINGLE_WICKET_ROLES:
+            player = getattr(challenge, role)
+            if player and getattr(challenge, f'{role}_accepted') and not previous[f'{role}_accepted']:
+                events.append((
+                    f'{prefix}:accepted_by:{player.pk}',
+                    [user_id for user_id in users if user_id != player.pk],
+                    f'{player.get_display_name()} accepted',
+                    f"{player.get_display_name()} accepted the single wicket challenge. "
+                    f"{accepted_count} of {len(SINGLE_WICKET_ROLES)} players have accepted.",
+                ))
+    
+    if challenge.status == previous['status']:
+        return events
+    
+    if challenge.status == 'ACCEPTED':
+        if challenge.challenge_type == 'SINGLE_WICKET':
+            events.append((
+                f'{prefix}:accepted', list(users),
+                'Challenge confirmed',
+                f"All players accepted, the single wicket challenge is on{when}.",
+            ))
+        else:
+            events.append((
+                f'{prefix}:accepted', [challenge.challenger_id],
+                f'{challenge.get_opponent_display_name()} accepted your challenge',
+                f"Your {challenge.get_challenge_type_display()}{when} is on.",
+            ))
+    elif challenge.status == 'COMPLETED':
+        result = f"{challenge.get_winner_display_name()} won." if challenge.winner_id else "The result has been entered."
+        events.append((
+            f'{prefix}:completed', list(users),
+            'Challenge result',
+            f"{challenge}: {result}",
+        ))
+    elif challenge.status == 'CANCELLED':
+        events.append((
+            f'{prefix}:cancelled', list(users),
+            'Challenge cancelled',
+            f"The {challenge.get_challenge_type_display()}{when} has been cancelled.",
+        ))
+    return events
+
+
+def notify_challenge(challenge, previous=None):
+    """Fan out the notifications for a challenge change; returns how many were written"""
+    url = reverse('challenge_detail', args=[challenge.pk])
+    notified = 0
+    for event_key, user_ids, title, message in get_events(challenge, previous):
+        notified += len(Notification.fan_out(user_ids, title, message, url=url, event_key=event_key))
+    return notified
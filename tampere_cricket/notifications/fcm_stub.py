@@ -0,0 +1,112 @@
+"""
+Local HTTP stand-in for the FCM HTTP v1 API, for rehearsing and testing push delivery
+"""
+import json
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+SEND_PATH = re.compile(r'^/v1/projects/(?P<project>[^/]+)/messages:send$')
+
+# Token prefix -> (HTTP status, v1 status, FCM error code) the stub answers with
+TOKEN_ERRORS = {
+    'invalid': (404, 'NOT_FOUND', 'UNREGISTERED'),
+    'malformed': (400, 'INVALID_ARGUMENT', 'INVALID_ARGUMENT'),
+    'flaky': (503, 'UNAVAILABLE', 'UNAVAILABLE'),
+    'broken': (500, 'INTERNAL', 'INTERNAL'),
+}
+
+
+class StubServer(ThreadingHTTPServer):
+    # Room for every concurrent sender; the default backlog of 5 drops connections
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class FakeFCM:
+    """
+    Answers v1 messages:send requests like FCM. A token's prefix picks the error
+    it gets, see TOKEN_ERRORS; other tokens are delivered. Requests need a
+    Bearer token equal to access_token. calls counts requests by outcome.
+    """
+    
+    def __init__(self, latency=0, access_token='stub-token', host='127.0.0.1', port=0):
+        self.latency = latency
+        self.access_token = access_token
+        self.calls = Counter()
+        self.messages = []
+        self.lock = threading.Lock()
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length)
+                if fake.latency:
+                    time.sleep(fake.latency)
+                status, response = fake.handle(self.path, self.headers.get('Authorization', ''), body)
+                
+                data = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = StubServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+    
+    @property
+    def endpoint(self):
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+    
+    def error(self, status, v1_status, code, message):
+        return status, {'error': {
+            'code': status,
+            'message': message,
+            'status': v1_status,
+            'details': [{'@type': 'type.googleapis.com/google.firebase.fcm.v1.FcmError', 'errorCode': code}],
+        }}
+    
+    def handle(self, path, authorization, body):
+        """(HTTP status, JSON response) for one request"""
+        match = SEND_PATH.match(path)
+        if not match:
+            return 404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}}
+        if authorization != f'Bearer {self.access_token}':
+            with self.lock:
+                self.calls['unauthenticated'] += 1
+            return 401, {'error': {'code': 401, 'message': 'Bad credentials', 'status': 'UNAUTHENTICATED'}}
+        
+        try:
+            message = json.loads(body)['message']
+            token = message['token']
+        except (ValueError, KeyError, TypeError):
+            return self.error(400, 'INVALID_ARGUMENT', 'INVALID_ARGUMENT', 'Malformed message')
+        
+        for prefix, (status, v1_status, code) in TOKEN_ERRORS.items():
+            if token.startswith(prefix):
+                with self.lock:
+                    self.calls[code] += 1
+                return self.error(status, v1_status, code, f'{code} for {token}')
+        
+        with self.lock:
+            self.calls['sent'] += 1
+            self.messages.append(message)
+            message_id = len(self.messages)
+        return 200, {'name': f"projects/{match['project']}/messages/{message_id}"}
+    
+    def start(self):
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
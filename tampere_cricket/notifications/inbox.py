@@ -0,0 +1,52 @@
+"""
+Notification inbox with keyset pagination
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+
+from .models import Notification
+
+
+# Notifications per inbox page
+PAGE_SIZE = 20
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_cursor(notification):
+    """Opaque cursor pointing just after a notification in inbox order"""
+    microseconds = (notification.created_at - EPOCH) // timedelta(microseconds=1)
+    return f'{microseconds}_{notification.id}'
+
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor, or None when it is missing or malformed"""
+    try:
+        microseconds, notification_id = (int(part) for part in cursor.split('_'))
+        return EPOCH + timedelta(microseconds=microseconds), notification_id
+    except (AttributeError, ValueError, OverflowError):
+        return None
+
+
+def get_inbox_page(user, cursor=None, unread_only=False):
+    """
+    One page of a user's notifications after a cursor, newest first, plus the
+    cursor for the next page. Seeks through the inbox index, so deep pages cost
+    the same as the first.
+    """
+    notifications = Notification.objects.filter(user=user).order_by('-created_at', '-id')
+    if unread_only:
+        notifications = notifications.filter(is_read=False)
+    
+    position = decode_cursor(cursor)
+    if position:
+        created_at, notification_id = position
+        notifications = notifications.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=notification_id)
+        )
+    
+    # Fetch one extra row to learn whether there is a next page without a COUNT(*)
+    page = list(notifications[:PAGE_SIZE + 1])
+    next_cursor = encode_cursor(page[PAGE_SIZE - 1]) if len(page) > PAGE_SIZE else None
+    return page[:PAGE_SIZE], next_cursor
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tampere_cricket.notifications.models import Notification, PushDelivery
+
+
+class Command(BaseCommand):
+    help = 'Delete read notifications older than the retention period, in small batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=180,
+            help='Keep read notifications this many days (default: 180)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted per statement (default: 1000)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        batch_size = max(1, options['batch_size'])
+        expired = Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+        
+        # Short DELETEs keep locks brief, so inboxes stay responsive while pruning
+        deleted = 0
+        while True:
+            ids = list(expired.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += Notification.objects.filter(id__in=ids).delete()[0]
+            self.stdout.write(f'Deleted {deleted} notifications so far')
+        
+        # Finished push deliveries are only kept for the same period
+        finished = PushDelivery.objects.filter(status__in=['SENT', 'FAILED'], created_at__lt=cutoff)
+        deliveries = 0
+        while True:
+            ids = list(finished.order_by('id').values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deliveries += PushDelivery.objects.filter(id__in=ids).delete()[0]
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Deleted {deleted} read notifications and {deliveries} finished push deliveries '
+                f'older than {options["days"]} days'
+            )
+        )
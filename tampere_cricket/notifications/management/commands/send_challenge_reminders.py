@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tampere_cricket.notifications.reminders import BATCH_SIZE, rebuild_queue, send_due_reminders
+
+
+class Command(BaseCommand):
+    help = 'Send reminders of upcoming challenges that are due, from the reminder queue'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep checking for due reminders instead of exiting',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Seconds between checks with --loop (default: 60)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Reminders claimed per transaction (default: {BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='First queue reminders for all upcoming accepted challenges',
+        )
+    
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            self.stdout.write(f'Queued {rebuild_queue()} reminders')
+        
+        batch_size = max(1, options['batch_size'])
+        try:
+            while True:
+                sent, notified = send_due_reminders(batch_size)
+                if sent or not options['loop']:
+                    self.stdout.write(self.style.SUCCESS(f'Sent {sent} reminders to {notified} users'))
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
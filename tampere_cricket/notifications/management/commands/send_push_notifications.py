@@ -0,0 +1,92 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tampere_cricket.notifications.fcm_stub import FakeFCM
+from tampere_cricket.notifications.push import BATCH_SIZE, FCMClient, deliver_due
+
+
+class Command(BaseCommand):
+    help = 'Send queued push notifications to FCM in concurrent batches, retrying failures'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for due deliveries instead of exiting when the queue is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds between polls with --loop (default: 5)',
+        )
+        parser.add_argument(
+            '--endpoint',
+            help='Send to this URL instead of FCM_ENDPOINT, e.g. a local stub',
+        )
+        parser.add_argument(
+            '--stub',
+            action='store_true',
+            help='Send to a local FCM stand-in instead, to rehearse delivery',
+        )
+        parser.add_argument(
+            '--stub-latency',
+            type=float,
+            default=0.05,
+            help='Seconds the stub takes per request (default: 0.05)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=BATCH_SIZE * 4,
+            help=f'Deliveries claimed per round (default: {BATCH_SIZE * 4})',
+        )
+    
+    def handle(self, *args, **options):
+        stub = FakeFCM(latency=options['stub_latency']).start() if options['stub'] else None
+        if stub:
+            client = FCMClient(endpoint=stub.endpoint, project_id='stub', access_token=lambda: stub.access_token)
+        else:
+            client = FCMClient(endpoint=options['endpoint'])
+        totals = {'sent': 0, 'retried': 0, 'failed': 0, 'pruned': 0}
+        latencies = []
+        started = time.monotonic()
+        
+        try:
+            while True:
+                stats = deliver_due(client, limit=max(1, options['limit']))
+                latencies.extend(stats.pop('latencies'))
+                for key, value in stats.items():
+                    totals[key] += value
+                
+                if any(stats.values()):
+                    self.stdout.write(
+                        f"Sent {stats['sent']}, retrying {stats['retried']}, "
+                        f"failed {stats['failed']}, invalid tokens {stats['pruned']}"
+                    )
+                    continue
+                if not options['loop']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if stub:
+                stub.stop()
+        
+        elapsed = time.monotonic() - started
+        summary = (
+            f"Sent {totals['sent']} pushes in {elapsed:.1f}s "
+            f"({totals['sent'] / elapsed if elapsed else 0:.0f}/s); "
+            f"{totals['retried']} retries scheduled, {totals['failed']} failed, "
+            f"{totals['pruned']} dropped for invalid tokens"
+        )
+        if latencies:
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            summary += f"; queue latency avg {sum(latencies) / len(latencies):.2f}s, p95 {p95:.2f}s"
+        if stub:
+            outcomes = ', '.join(f'{outcome} {count}' for outcome, count in stub.calls.most_common())
+            summary += f"; stub answered {sum(stub.calls.values())} requests ({outcomes})"
+        self.stdout.write(self.style.SUCCESS(summary))
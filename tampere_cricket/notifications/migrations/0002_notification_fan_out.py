@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_user_avatar_pending'),
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='event_key',
+            field=models.CharField(blank=True, default='', help_text='Identifies the event, so it is only notified once per user', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='url',
+            field=models.CharField(blank=True, default='', help_text='Page the notification links to', max_length=200),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('event_key', ''), _negated=True), fields=('user', 'event_key'), name='notification_event_unique'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-19 06:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0011_matchresult_updated_challenge_completed_indexes'),
+        ('notifications', '0004_push_delivery'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChallengeReminder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minutes_before', models.PositiveIntegerField()),
+                ('due_at', models.DateTimeField()),
+                ('challenge', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminders', to='matches.challenge')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['due_at'], name='reminder_due_idx')],
+                'constraints': [models.UniqueConstraint(fields=('challenge', 'minutes_before'), name='reminder_challenge_lead_unique')],
+            },
+        ),
+    ]
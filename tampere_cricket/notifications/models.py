@@ -1,5 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+from datetime import timedelta
+from tampere_cricket.realtime import broadcast_many, group_for_user
 
 User = get_user_model()
 
@@ -8,8 +12,189 @@ class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     title = models.CharField(max_length=200)
     message = models.TextField()
+    url = models.CharField(max_length=200, blank=True, default='', help_text="Page the notification links to")
+    event_key = models.CharField(max_length=100, blank=True, default='', help_text="Identifies the event, so it is only notified once per user")
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            # Inbox pages, newest first
+            models.Index(fields=['user', '-created_at', '-id'], name='notification_inbox_idx'),
+            # Unread filter, mark-all-read and retention
+            models.Index(fields=['user', 'is_read', 'created_at'], name='notification_user_read_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'event_key'],
+                condition=~Q(event_key=''),
+                name='notification_event_unique',
+            ),
+        ]
+    
     def __str__(self):
         return self.title
+    
+    @classmethod
+    def fan_out(cls, user_ids, title, message, url='', event_key=''):
+        """Notify several users of the same thing at once; returns the ids of the users notified"""
+        return cls.send_many({user_id: (title, message) for user_id in user_ids}, url=url, event_key=event_key)
+    
+    @classmethod
+    def send_many(cls, messages, url='', event_key=''):
+        """
+        Notify several users at once, each with their own {user_id: (title, message)}:
+        one INSERT for all rows and one UPDATE of their unread counters, in a single
+        transaction. Users already notified of event_key are skipped. Returns the ids
+        of the users notified.
+        """
+        user_ids = sorted(user_id for user_id in messages if user_id)
+        if not user_ids:
+            return []
+        
+        with transaction.atomic():
+            # Lock the recipients' counters in id order; concurrent fan-outs to the
+            # same users then run one after the other and cannot both pass the dedupe
+            UnreadCounter.objects.bulk_create(
+                [UnreadCounter(user_id=user_id) for user_id in user_ids], ignore_conflicts=True
+            )
+            list(UnreadCounter.objects.select_for_update().filter(user_id__in=user_ids).order_by('user_id').values_list('user_id', flat=True))
+            
+            if event_key:
+                notified = set(cls.objects.filter(user_id__in=user_ids, event_key=event_key).values_list('user_id', flat=True))
+                user_ids = [user_id for user_id in user_ids if user_id not in notified]
+                if not user_ids:
+                    return []
+            
+            cls.objects.bulk_create([
+                cls(user_id=user_id, title=messages[user_id][0], message=messages[user_id][1], url=url, event_key=event_key)
+                for user_id in user_ids
+            ])
+            UnreadCounter.objects.filter(user_id__in=user_ids).update(unread=F('unread') + 1)
+            PushDelivery.enqueue({user_id: messages[user_id] for user_id in user_ids}, url)
+            unread = dict(UnreadCounter.objects.filter(user_id__in=user_ids).values_list('user_id', 'unread'))
+        
+        broadcast_many(
+            (group_for_user(user_id), 'notification', {
+                'title': messages[user_id][0], 'message': messages[user_id][1], 'url': url,
+                'unread': unread.get(user_id, 0),
+            })
+            for user_id in user_ids
+        )
+        return user_ids
+    
+    @classmethod
+    def mark_all_read(cls, user):
+        """Mark every unread notification of a user as read in one UPDATE; returns how many"""
+        with transaction.atomic():
+            # Same lock as fan_out, so a notification arriving meanwhile is not lost from the count
+            list(UnreadCounter.objects.select_for_update().filter(user=user).values_list('user_id', flat=True))
+            marked = cls.objects.filter(user=user, is_read=False).update(is_read=True)
+            UnreadCounter.objects.filter(user=user).update(unread=0)
+        return marked
+    
+    @classmethod
+    def mark_read(cls, user, notification_id):
+        """Mark one notification as read; returns whether it was unread"""
+        with transaction.atomic():
+            list(UnreadCounter.objects.select_for_update().filter(user=user).values_list('user_id', flat=True))
+            marked = cls.objects.filter(user=user, id=notification_id, is_read=False).update(is_read=True)
+            if marked:
+                UnreadCounter.objects.filter(user=user, unread__gt=0).update(unread=F('unread') - 1)
+        return bool(marked)
+
+
+class UnreadCounter(models.Model):
+    """Number of unread notifications per user, kept in step with Notification writes"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='notification_counter')
+    unread = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.user} ({self.unread} unread)"
+    
+    @classmethod
+    def get_unread(cls, user):
+        """Unread notifications of a user, without counting rows"""
+        return cls.objects.filter(user=user).values_list('unread', flat=True).first() or 0
+
+
+class PushDelivery(models.Model):
+    """One push message waiting for, or done with, delivery to one device token"""
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("SENT", "Sent"),
+        ("FAILED", "Failed"),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='push_deliveries')
+    token = models.CharField(max_length=300)
+    title = models.CharField(max_length=200)
+    body = models.TextField()
+    url = models.CharField(max_length=200, blank=True, default='')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="When the next delivery attempt is due")
+    last_error = models.CharField(max_length=200, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='push_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.title} -> {self.user} ({self.status})"
+    
+    @classmethod
+    def enqueue(cls, messages, url=''):
+        """Queue a push of {user_id: (title, body)} to every device of those users; a no-op unless FCM is configured"""
+        from django.conf import settings
+        from tampere_cricket.accounts.models import Profile
+        
+        if not getattr(settings, 'FCM_PROJECT_ID', ''):
+            return 0
+        tokens = Profile.objects.filter(user_id__in=list(messages)).exclude(fcm_token='').values_list('user_id', 'fcm_token')
+        deliveries = cls.objects.bulk_create([
+            cls(user_id=user_id, token=token, title=messages[user_id][0], body=messages[user_id][1], url=url)
+            for user_id, token in tokens
+        ])
+        return len(deliveries)
+
+
+class ChallengeReminder(models.Model):
+    """A reminder of an accepted challenge, due some time before it starts"""
+    # How long before kick-off reminders are sent, in minutes
+    LEADS = [24 * 60, 60]
+    
+    challenge = models.ForeignKey('matches.Challenge', on_delete=models.CASCADE, related_name='reminders')
+    minutes_before = models.PositiveIntegerField()
+    due_at = models.DateTimeField()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['due_at'], name='reminder_due_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['challenge', 'minutes_before'], name='reminder_challenge_lead_unique'),
+        ]
+    
+    def __str__(self):
+        return f"{self.challenge} ({self.minutes_before} min before)"
+    
+    @classmethod
+    def schedule(cls, challenge):
+        """
+        Replace a challenge's queued reminders to match its status and kick-off.
+        Touches at most len(LEADS) rows, found through the challenge index.
+        """
+        cls.objects.filter(challenge=challenge).delete()
+        if challenge.status != 'ACCEPTED' or not challenge.scheduled_at:
+            return []
+        
+        now = timezone.now()
+        due = [(minutes, challenge.scheduled_at - timedelta(minutes=minutes)) for minutes in cls.LEADS]
+        return cls.objects.bulk_create([
+            cls(challenge=challenge, minutes_before=minutes, due_at=due_at)
+            for minutes, due_at in due if due_at > now
+        ])
@@ -0,0 +1,222 @@
+"""
+Batched push delivery to Firebase Cloud Messaging (HTTP v1)
+
+Notifications queue PushDelivery rows inside their own transaction; the
+send_push_notifications worker claims due rows in batches, sends each batch as
+concurrent per-token v1 requests, retries failures with exponential backoff
+and clears device tokens that FCM reports as no longer valid.
+"""
+import json
+import logging
+import random
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import PushDelivery
+
+logger = logging.getLogger(__name__)
+
+
+# Deliveries sent per round of concurrent requests
+BATCH_SIZE = 500
+
+# Requests in flight at once; v1 has no multicast, so each token is its own request
+SEND_CONCURRENCY = 20
+
+# Attempts before a delivery is given up
+MAX_ATTEMPTS = 5
+
+# First retry delay, doubled after every failed attempt
+RETRY_DELAY = timedelta(seconds=30)
+
+# Claimed rows are not handed to another worker for this long, so a crashed worker's rows are retried
+CLAIM_LEASE = timedelta(minutes=5)
+
+# v1 error codes meaning the token will never work again, so it is pruned
+INVALID_TOKEN_ERRORS = {'UNREGISTERED', 'SENDER_ID_MISMATCH'}
+
+# v1 error codes rejecting the message itself: it fails without a retry, but the
+# token is kept. Everything else, such as UNAVAILABLE, INTERNAL or
+# QUOTA_EXCEEDED, is retried.
+REJECTED_MESSAGE_ERRORS = {'INVALID_ARGUMENT'}
+
+FCM_SCOPES = ['https://www.googleapis.com/auth/firebase.messaging']
+
+
+class PushError(Exception):
+    """No request could be made, so every token in the batch should be retried"""
+
+
+class ServiceAccountToken:
+    """OAuth2 access tokens for FCM, refreshed shortly before they expire"""
+    
+    def __init__(self, credentials_file=None):
+        self.credentials_file = credentials_file or settings.FCM_CREDENTIALS_FILE
+        self._credentials = None
+        self._lock = threading.Lock()
+    
+    def __call__(self):
+        import google.auth
+        from google.auth.transport.requests import Request
+        from google.oauth2 import service_account
+        
+        with self._lock:
+            if self._credentials is None:
+                if self.credentials_file:
+                    self._credentials = service_account.Credentials.from_service_account_file(
+                        self.credentials_file, scopes=FCM_SCOPES
+                    )
+                else:
+                    self._credentials, _ = google.auth.default(scopes=FCM_SCOPES)
+            if not self._credentials.valid:
+                self._credentials.refresh(Request())
+            return self._credentials.token
+
+
+def get_error_code(error_body):
+    """The FCM error code of a v1 error response, else its generic status"""
+    try:
+        error = json.loads(error_body)['error']
+    except (ValueError, KeyError, TypeError):
+        return None
+    for detail in error.get('details', []):
+        if detail.get('errorCode'):
+            return detail['errorCode']
+    return error.get('status')
+
+
+class FCMClient:
+    """Sends messages through the v1 API; point endpoint at a local stub to run without Firebase"""
+    
+    def __init__(self, endpoint=None, project_id=None, access_token=None, timeout=10, concurrency=SEND_CONCURRENCY):
+        self.endpoint = (endpoint or settings.FCM_ENDPOINT).rstrip('/')
+        self.project_id = project_id or settings.FCM_PROJECT_ID
+        self.access_token = access_token or ServiceAccountToken()
+        self.timeout = timeout
+        self.concurrency = concurrency
+    
+    @property
+    def url(self):
+        return f'{self.endpoint}/v1/projects/{self.project_id}/messages:send'
+    
+    def send(self, token, title, body, url, access_token):
+        """Send one message; returns None when sent, else the error code"""
+        payload = {'message': {
+            'token': token,
+            'notification': {'title': title, 'body': body},
+            'data': {'url': url},
+        }}
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json', 'Authorization': f'Bearer {access_token}'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                return None
+        except urllib.error.HTTPError as e:
+            return get_error_code(e.read()) or f'HTTP {e.code}'
+        except (urllib.error.URLError, OSError) as e:
+            return str(e) or 'UNAVAILABLE'
+    
+    def send_batch(self, messages):
+        """
+        Send (token, title, body, url) messages concurrently; returns the error per
+        message, None where sent, in the same order.
+        """
+        try:
+            access_token = self.access_token()
+        except Exception as e:
+            raise PushError(f'Could not get an FCM access token: {e}') from e
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(lambda message: self.send(*message, access_token), messages))
+
+
+def claim_due(limit):
+    """
+    Lock and lease up to limit due deliveries. Workers skip rows another worker
+    holds, so several can run at once without sending anything twice.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        deliveries = list(
+            PushDelivery.objects.select_for_update(skip_locked=True)
+            .filter(status='PENDING', next_attempt_at__lte=now)
+            .order_by('next_attempt_at')[:limit]
+        )
+        PushDelivery.objects.filter(id__in=[delivery.id for delivery in deliveries]).update(
+            next_attempt_at=now + CLAIM_LEASE
+        )
+    return deliveries
+
+
+def deliver_due(client=None, limit=BATCH_SIZE * 4):
+    """
+    Send every due delivery, up to limit. Returns counts of sent, retried, failed
+    and pruned deliveries, and the seconds each sent message waited in the queue.
+    """
+    from tampere_cricket.accounts.models import Profile
+    
+    client = client or FCMClient()
+    stats = {'sent': 0, 'retried': 0, 'failed': 0, 'pruned': 0, 'latencies': []}
+    deliveries = claim_due(limit)
+    
+    sent, unsent, invalid_tokens = [], [], set()
+    for start in range(0, len(deliveries), BATCH_SIZE):
+        batch = deliveries[start:start + BATCH_SIZE]
+        try:
+            errors = client.send_batch([
+                (delivery.token, delivery.title, delivery.body, delivery.url) for delivery in batch
+            ])
+        except PushError as e:
+            logger.warning('Push batch of %d messages failed: %s', len(batch), e)
+            errors = [str(e)] * len(batch)
+        
+        for delivery, error in zip(batch, errors):
+            if error is None:
+                sent.append(delivery)
+            elif error in INVALID_TOKEN_ERRORS:
+                invalid_tokens.add(delivery.token)
+            else:
+                if error in REJECTED_MESSAGE_ERRORS:
+                    delivery.status = 'FAILED'
+                delivery.last_error = error[:200]
+                unsent.append(delivery)
+    
+    now = timezone.now()
+    with transaction.atomic():
+        if sent:
+            PushDelivery.objects.filter(id__in=[delivery.id for delivery in sent]).update(
+                status='SENT', sent_at=now, attempts=F('attempts') + 1
+            )
+            stats['sent'] = len(sent)
+            stats['latencies'] = [(now - delivery.created_at).total_seconds() for delivery in sent]
+        
+        for delivery in unsent:
+            delivery.attempts += 1
+            if delivery.status == 'FAILED' or delivery.attempts >= MAX_ATTEMPTS:
+                delivery.status = 'FAILED'
+                stats['failed'] += 1
+            else:
+                # Jitter spreads retries out, so a recovering FCM is not hit all at once
+                delay = RETRY_DELAY * 2 ** (delivery.attempts - 1) * random.uniform(0.8, 1.2)
+                delivery.next_attempt_at = now + delay
+                stats['retried'] += 1
+        PushDelivery.objects.bulk_update(unsent, ['attempts', 'status', 'next_attempt_at', 'last_error'])
+        
+        if invalid_tokens:
+            # One UPDATE clears the tokens everywhere, and stops their queued messages
+            Profile.objects.filter(fcm_token__in=invalid_tokens).update(fcm_token='')
+            stats['pruned'] = PushDelivery.objects.filter(token__in=invalid_tokens, status='PENDING').update(
+                status='FAILED', last_error='Invalid token'
+            )
+    return stats
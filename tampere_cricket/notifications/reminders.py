@@ -0,0 +1,90 @@
+"""
+Reminders of upcoming challenges
+
+Accepting or rescheduling a challenge queues its reminders, indexed by due
+time; the send_challenge_reminders worker claims the due ones in batches and
+fans them out, so nothing ever scans the challenges table.
+"""
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from tampere_cricket.matches.models import Challenge
+
+from .events import involved_users
+from .models import ChallengeReminder, Notification
+
+
+# Reminders claimed and sent per transaction
+BATCH_SIZE = 200
+
+
+def claim_due(limit, now=None):
+    """
+    Due reminders, soonest first. On PostgreSQL and MySQL rows another worker has
+    claimed are skipped; SQLite lets only one transaction write at a time, and a
+    reminder sent twice is ignored by the notification dedupe anyway.
+    Must run inside a transaction, which holds the claim until it commits.
+    """
+    due = ChallengeReminder.objects.filter(due_at__lte=now or timezone.now()).order_by('due_at')
+    if connection.features.has_select_for_update_skip_locked:
+        due = due.select_for_update(skip_locked=True)
+    return list(due[:limit])
+
+
+def format_lead(minutes):
+    """'24 hours', '1 hour' or '30 minutes'"""
+    if minutes % 60:
+        return f"{minutes} minute{'s' if minutes != 1 else ''}"
+    hours = minutes // 60
+    return f"{hours} hour{'s' if hours != 1 else ''}"
+
+
+def send_reminder(reminder, challenge, now):
+    """Notify a challenge's players of one reminder; returns how many were notified"""
+    # Skip reminders the queue should already have dropped, or that are too late to help
+    if (challenge is None or challenge.status != 'ACCEPTED' or not challenge.scheduled_at
+            or challenge.scheduled_at <= now):
+        return 0
+    
+    kick_off = timezone.localtime(challenge.scheduled_at)
+    user_ids = list(involved_users(challenge))
+    return len(Notification.fan_out(
+        user_ids,
+        f'Challenge in {format_lead(reminder.minutes_before)}',
+        f"Your {challenge.get_challenge_type_display()} starts at {kick_off:%H:%M} on {kick_off:%d %b %Y}"
+        f"{f' at {challenge.ground.name}' if challenge.ground else ''}.",
+        url=reverse('challenge_detail', args=[challenge.pk]),
+        # Keyed by kick-off, so a rescheduled challenge is reminded again
+        event_key=f'challenge:{challenge.pk}:reminder:{reminder.minutes_before}:{int(challenge.scheduled_at.timestamp())}',
+    ))
+
+
+def send_due_reminders(batch_size=BATCH_SIZE):
+    """Claim and send due reminders batch by batch; returns (reminders sent, users notified)"""
+    sent = notified = 0
+    while True:
+        now = timezone.now()
+        with transaction.atomic():
+            reminders = claim_due(batch_size, now)
+            if not reminders:
+                break
+            
+            challenges = Challenge.objects.select_related(
+                'challenger', 'opponent', 'ground',
+                'team1_batter', 'team1_bowler', 'team2_batter', 'team2_bowler',
+            ).in_bulk({reminder.challenge_id for reminder in reminders})
+            for reminder in reminders:
+                notified += send_reminder(reminder, challenges.get(reminder.challenge_id), now)
+            ChallengeReminder.objects.filter(id__in=[reminder.id for reminder in reminders]).delete()
+            sent += len(reminders)
+    return sent, notified
+
+
+def rebuild_queue():
+    """Queue reminders for every upcoming accepted challenge, e.g. after deploying the queue"""
+    queued = 0
+    upcoming = Challenge.objects.filter(status='ACCEPTED', scheduled_at__gt=timezone.now())
+    for challenge in upcoming.only('id', 'status', 'scheduled_at').iterator():
+        queued += len(ChallengeReminder.schedule(challenge))
+    return queued
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from tampere_cricket.matches.models import Challenge
+from .events import SINGLE_WICKET_ROLES, notify_challenge
+from .models import ChallengeReminder
+
+
+@receiver(pre_save, sender=Challenge)
+def remember_previous_state(sender, instance, **kwargs):
+    """Note the stored status, kick-off and acceptances, so the save can be turned into events"""
+    instance._previous_state = None
+    if instance.pk:
+        fields = ['status', 'scheduled_at'] + [f'{role}_accepted' for role in SINGLE_WICKET_ROLES]
+        instance._previous_state = Challenge.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Challenge)
+def notify_challenge_change(sender, instance, created, raw=False, **kwargs):
+    """Notify everyone involved of a new challenge or a change in its state"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous_state', None)
+    if created or previous is not None:
+        notify_challenge(instance, previous)
+
+
+@receiver(post_save, sender=Challenge)
+def schedule_reminders(sender, instance, created, raw=False, **kwargs):
+    """Requeue reminders when a challenge is accepted, rescheduled or cancelled"""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_state', None)
+    if created or previous is None:
+        changed = instance.status == 'ACCEPTED'
+    else:
+        changed = (previous['status'], previous['scheduled_at']) != (instance.status, instance.scheduled_at)
+    if changed:
+        ChallengeReminder.schedule(instance)
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tampere_cricket.accounts.models import Profile
+
+from .fcm_stub import FakeFCM
+from .models import Notification, PushDelivery
+from .push import MAX_ATTEMPTS, FCMClient, deliver_due
+
+User = get_user_model()
+
+
+def no_access_token():
+    raise RuntimeError('No credentials')
+
+
+@override_settings(FCM_PROJECT_ID='stub')
+class PushDeliveryTests(TestCase):
+    """deliver_due against the local FCM v1 stub"""
+    
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fcm = FakeFCM().start()
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.fcm.stop()
+        super().tearDownClass()
+    
+    def setUp(self):
+        self.fcm.calls.clear()
+        self.client_fcm = FCMClient(
+            endpoint=self.fcm.endpoint, project_id='stub', access_token=lambda: self.fcm.access_token
+        )
+    
+    def notify(self, *tokens):
+        """Queue one notification to a new user per device token"""
+        users = []
+        for i, token in enumerate(tokens):
+            user = User.objects.create_user(username=f'push{i}', password='x')
+            Profile.objects.filter(user=user).update(fcm_token=token)
+            users.append(user)
+        Notification.fan_out([user.id for user in users], 'Title', 'Body', url='/challenges/1/')
+        return users
+    
+    def test_sent(self):
+        self.notify('ok-1', 'ok-2')
+        
+        stats = deliver_due(self.client_fcm)
+        
+        self.assertEqual(stats['sent'], 2)
+        self.assertEqual(len(stats['latencies']), 2)
+        self.assertEqual(set(PushDelivery.objects.values_list('status', flat=True)), {'SENT'})
+        self.assertEqual(self.fcm.messages[0]['notification'], {'title': 'Title', 'body': 'Body'})
+        self.assertEqual(self.fcm.messages[0]['data'], {'url': '/challenges/1/'})
+    
+    def test_retryable_errors_are_retried_with_backoff(self):
+        self.notify('flaky-1', 'broken-1')
+        
+        stats = deliver_due(self.client_fcm)
+        
+        self.assertEqual(stats['retried'], 2)
+        for delivery in PushDelivery.objects.all():
+            self.assertEqual(delivery.status, 'PENDING')
+            self.assertEqual(delivery.attempts, 1)
+            self.assertGreater(delivery.next_attempt_at, timezone.now())
+        self.assertEqual(
+            set(PushDelivery.objects.values_list('last_error', flat=True)), {'UNAVAILABLE', 'INTERNAL'}
+        )
+        # Not due again yet
+        self.assertEqual(deliver_due(self.client_fcm)['retried'], 0)
+    
+    def test_failed_after_max_attempts(self):
+        self.notify('flaky-1')
+        PushDelivery.objects.update(attempts=MAX_ATTEMPTS - 1)
+        
+        stats = deliver_due(self.client_fcm)
+        
+        self.assertEqual(stats['failed'], 1)
+        delivery = PushDelivery.objects.get()
+        self.assertEqual(delivery.status, 'FAILED')
+        self.assertEqual(delivery.attempts, MAX_ATTEMPTS)
+    
+    def test_invalid_tokens_are_pruned(self):
+        users = self.notify('invalid-1', 'ok-1')
+        
+        stats = deliver_due(self.client_fcm)
+        
+        self.assertEqual(stats['sent'], 1)
+        self.assertEqual(stats['pruned'], 1)
+        self.assertEqual(
+            list(Profile.objects.filter(user__in=users).order_by('user_id').values_list('fcm_token', flat=True)),
+            ['', 'ok-1'],
+        )
+        self.assertEqual(PushDelivery.objects.filter(status='FAILED', last_error='Invalid token').count(), 1)
+    
+    def test_rejected_message_fails_but_keeps_the_token(self):
+        user, = self.notify('malformed-1')
+        
+        stats = deliver_due(self.client_fcm)
+        
+        self.assertEqual((stats['failed'], stats['retried'], stats['pruned']), (1, 0, 0))
+        delivery = PushDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts, delivery.last_error), ('FAILED', 1, 'INVALID_ARGUMENT'))
+        self.assertEqual(Profile.objects.get(user=user).fcm_token, 'malformed-1')
+    
+    def test_whole_batch_retried_without_access_token(self):
+        self.notify('ok-1')
+        client = FCMClient(endpoint=self.fcm.endpoint, project_id='stub', access_token=no_access_token)
+        
+        stats = deliver_due(client)
+        
+        self.assertEqual(stats['retried'], 1)
+        self.assertEqual(sum(self.fcm.calls.values()), 0)
+    
+    @override_settings(FCM_PROJECT_ID='')
+    def test_nothing_queued_without_fcm(self):
+        self.notify('ok-1')
+        self.assertFalse(PushDelivery.objects.exists())
@@ -3,4 +3,6 @@ from . import views
 
 urlpatterns = [
     path('', views.notifications_list, name='notifications_list'),
+    path('read-all/', views.notifications_mark_all_read, name='notifications_mark_all_read'),
+    path('<int:notification_id>/open/', views.notification_open, name='notification_open'),
 ]
@@ -1,8 +1,46 @@
-from django.shortcuts import render
-from .models import Notification
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
+from .inbox import get_inbox_page
+from .models import Notification, UnreadCounter
 
 
+@login_required
 def notifications_list(request):
-    """List all notifications for the user"""
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'notifications.html', {'notifications': notifications})
+    """List the user's notifications, newest first, with "load more" pagination"""
+    unread_only = request.GET.get('unread') == '1'
+    notifications, next_cursor = get_inbox_page(request.user, request.GET.get('after'), unread_only)
+    
+    return render(request, 'notifications.html', {
+        'notifications': notifications,
+        'unread_only': unread_only,
+        'unread_count': UnreadCounter.get_unread(request.user),
+        'has_next': next_cursor is not None,
+        'next_cursor': next_cursor,
+    })
+
+
+@login_required
+@require_POST
+def notifications_mark_all_read(request):
+    """Mark every notification of the user as read"""
+    marked = Notification.mark_all_read(request.user)
+    if marked:
+        messages.success(request, f"Marked {marked} notification{'s' if marked != 1 else ''} as read.")
+    return redirect('notifications_list')
+
+
+@login_required
+def notification_open(request, notification_id):
+    """Mark a notification as read and follow its link"""
+    notification = Notification.objects.filter(user=request.user, id=notification_id).values('url').first()
+    if notification is None:
+        return redirect('notifications_list')
+    
+    Notification.mark_read(request.user, notification_id)
+    url = notification['url']
+    if url and url_has_allowed_host_and_scheme(url, allowed_hosts={request.get_host()}):
+        return redirect(url)
+    return redirect('notifications_list')
@@ -56,16 +56,10 @@ def home(request):
     from tampere_cricket.grounds.models import Ground
     top_grounds = Ground.objects.filter(is_available=True)[:3]
     
-    # Get top 3 highlights items (not older than 1 month)
-    from tampere_cricket.news.models import News
-    from django.utils import timezone
-    from datetime import timedelta
+    # Get top 3 trending highlights items (not older than 1 month)
+    from tampere_cricket.news.trending import get_trending_news
     
-    one_month_ago = timezone.now() - timedelta(days=30)
-    recent_news = News.objects.filter(
-        published=True,
-        created_at__gte=one_month_ago
-    ).order_by('-created_at')[:3]
+    recent_news = get_trending_news(3)
     
     # Calculate real statistics for About section
     total_players = User.objects.count()
@@ -0,0 +1,77 @@
+"""
+Pushing live updates to WebSocket clients
+
+Any process can broadcast: events go through the channel layer to the ASGI
+server holding the sockets. Sends wait for the surrounding transaction to
+commit, so clients never hear about changes that were rolled back.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def group_for_user(user_id):
+    return f'user.{user_id}'
+
+
+def group_for_challenge(challenge_id):
+    return f'challenge.{challenge_id}'
+
+
+def group_for_slots(date):
+    return f'slots.{date.isoformat()}'
+
+
+# Group sends in flight at once when broadcasting many events
+SEND_CONCURRENCY = 50
+
+
+def broadcast(group, event, data):
+    """
+    Send an event to every socket subscribed to a group after commit.
+    data may be a callable, so payloads are only built when the send happens.
+    """
+    broadcast_many([(group, event, data)])
+
+
+def broadcast_many(messages):
+    """
+    Send (group, event, data) messages after commit, like broadcast, from a single
+    callback: the group sends run concurrently instead of one round-trip each.
+    """
+    messages = list(messages)
+    if not messages:
+        return
+    
+    def send():
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+        try:
+            # Payloads may query the database, so build them before going async
+            sends = [
+                (group, {'type': 'push', 'event': event, 'data': data() if callable(data) else data})
+                for group, event, data in messages
+            ]
+            async_to_sync(send_all)(channel_layer, sends)
+        except Exception:
+            # Live updates are best effort; pages still show the truth on reload
+            logger.exception('Failed to push %d live updates', len(messages))
+    
+    transaction.on_commit(send)
+
+
+async def send_all(channel_layer, sends):
+    for start in range(0, len(sends), SEND_CONCURRENCY):
+        chunk = sends[start:start + SEND_CONCURRENCY]
+        results = await asyncio.gather(
+            *(channel_layer.group_send(group, message) for group, message in chunk), return_exceptions=True
+        )
+        for (group, message), result in zip(chunk, results):
+            if isinstance(result, Exception):
+                logger.error('Failed to push %s to %s: %s', message['event'], group, result)
@@ -43,7 +43,9 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
     'rest_framework',
+    'channels',
     'tampere_cricket.accounts',
     'tampere_cricket.matches',
     'tampere_cricket.grounds',
@@ -77,6 +79,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tampere_cricket.notifications.context_processors.unread_notifications',
             ],
         },
     },
@@ -97,6 +100,55 @@ DATABASES = {
 }
 
 
+# Cache
+# Shared Redis cache in production so cached data and invalidations reach every
+# gunicorn worker; per-process memory cache for development and tests.
+REDIS_URL = os.getenv('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+
+# Channels
+# WebSocket pushes go through Redis in production, so any web or worker process
+# can reach sockets held by the ASGI server; in-memory for development and tests.
+ASGI_APPLICATION = 'tampere_cricket.asgi.application'
+
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
+
+
+# Push notifications (FCM HTTP v1)
+# Messages are queued in the database and sent by the send_push_notifications
+# worker; nothing is queued while FCM_PROJECT_ID is unset. Access tokens come
+# from the service account file, or Google application default credentials.
+FCM_PROJECT_ID = os.getenv('FCM_PROJECT_ID', '')
+FCM_CREDENTIALS_FILE = os.getenv('FCM_CREDENTIALS_FILE', '')
+FCM_ENDPOINT = os.getenv('FCM_ENDPOINT', 'https://fcm.googleapis.com')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -143,6 +195,7 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 # Cloudinary Configuration for production
 USE_CLOUDINARY = os.getenv('USE_CLOUDINARY', 'False').lower() == 'true'
+CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME', '')
 
 if USE_CLOUDINARY:
     import cloudinary
@@ -162,6 +215,12 @@ if USE_CLOUDINARY:
     # Override MEDIA_URL to use Cloudinary
     MEDIA_URL = f'https://res.cloudinary.com/{os.getenv("CLOUDINARY_CLOUD_NAME")}/image/upload/'
 
+# Avatar uploads run on this many background threads; 0 uploads inside the request
+AVATAR_UPLOAD_WORKERS = int(os.getenv('AVATAR_UPLOAD_WORKERS', '2'))
+
+# Resized image variants are built on this many background threads; 0 builds them inside the request
+IMAGE_DERIVATIVE_WORKERS = int(os.getenv('IMAGE_DERIVATIVE_WORKERS', '2'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
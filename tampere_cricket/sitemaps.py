@@ -0,0 +1,65 @@
+"""
+XML sitemaps for highlights, public profiles and challenges
+"""
+from django.contrib.sitemaps import Sitemap
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+
+from tampere_cricket.accounts.models import User
+from tampere_cricket.matches.models import Challenge
+from tampere_cricket.news.models import News
+
+
+# URLs per sitemap page; sections beyond this are split into ?p= pages
+SITEMAP_PAGE_SIZE = 1000
+
+
+class HighlightsSitemap(Sitemap):
+    changefreq = 'weekly'
+    priority = 0.8
+    limit = SITEMAP_PAGE_SIZE
+    
+    def items(self):
+        return News.published_objects().order_by('-published_at', '-id').values('slug', 'updated_at')
+    
+    def location(self, item):
+        return reverse('highlights_detail', args=[item['slug']])
+    
+    def lastmod(self, item):
+        return item['updated_at']
+
+
+class ProfileSitemap(Sitemap):
+    changefreq = 'weekly'
+    priority = 0.5
+    limit = SITEMAP_PAGE_SIZE
+    
+    def items(self):
+        return User.active_objects().filter(is_active=True).order_by('id').values('id')
+    
+    def location(self, item):
+        return reverse('public_profile', args=[item['id']])
+
+
+class ChallengeSitemap(Sitemap):
+    changefreq = 'daily'
+    priority = 0.6
+    limit = SITEMAP_PAGE_SIZE
+    
+    def items(self):
+        return Challenge.objects.exclude(status='CANCELLED').annotate(
+            last_changed=Coalesce('completed_at', 'accepted_at', 'created_at')
+        ).order_by('-id').values('id', 'last_changed')
+    
+    def location(self, item):
+        return reverse('challenge_detail', args=[item['id']])
+    
+    def lastmod(self, item):
+        return item['last_changed']
+
+
+sitemaps = {
+    'highlights': HighlightsSitemap,
+    'profiles': ProfileSitemap,
+    'challenges': ChallengeSitemap,
+}
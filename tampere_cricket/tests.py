@@ -0,0 +1,135 @@
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from .cloudinary_fake import FakeCloudinary
+from .cloudinary_storage import CloudinaryStorage, metadata_cache_key
+from .consumers import LiveUpdatesConsumer
+from .realtime import broadcast, group_for_slots
+
+
+class UnreachableCloudinary(FakeCloudinary):
+    """Fails every Admin API lookup as if the network were down"""
+    
+    def resource(self, public_id):
+        self._call('resource')
+        raise ConnectionError('Cloudinary unreachable')
+
+
+class CloudinaryMetadataCacheTests(SimpleTestCase):
+    """CloudinaryStorage metadata caching, against the in-memory fake"""
+    
+    def setUp(self):
+        cache.clear()
+        self.cloudinary = FakeCloudinary()
+        self.storage = CloudinaryStorage(client=self.cloudinary)
+    
+    def upload(self, name='avatars/1/me.jpg', data=b'x' * 1234):
+        return self.storage.save(name, ContentFile(data, name=name))
+    
+    def test_save_seeds_the_cache(self):
+        name = self.upload()
+        
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 1234)
+        self.assertEqual(self.cloudinary.calls['resource'], 0)
+    
+    def test_miss_is_fetched_once(self):
+        name = self.upload()
+        cache.delete(metadata_cache_key(name))
+        
+        self.assertEqual(self.storage.size(name), 1234)
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.cloudinary.calls['resource'], 1)
+    
+    def test_missing_resource_is_remembered(self):
+        self.assertFalse(self.storage.exists('avatars/none'))
+        self.assertFalse(self.storage.exists('avatars/none'))
+        self.assertEqual(self.storage.size('avatars/none'), 0)
+        self.assertEqual(self.cloudinary.calls['resource'], 1)
+    
+    def test_delete_invalidates(self):
+        name = self.upload()
+        
+        self.storage.delete(name)
+        
+        self.assertFalse(self.storage.exists(name))
+        self.assertEqual(self.cloudinary.calls['resource'], 0)
+        self.assertNotIn(name, self.cloudinary.resources)
+    
+    def test_save_after_delete_replaces_the_cached_miss(self):
+        name = self.upload()
+        self.storage.delete(name)
+        
+        self.assertEqual(self.upload(data=b'y' * 99), name)
+        
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.size(name), 99)
+        self.assertEqual(self.cloudinary.calls['resource'], 0)
+    
+    def test_failures_are_not_cached(self):
+        storage = CloudinaryStorage(client=UnreachableCloudinary())
+        
+        self.assertIsNone(storage.get_metadata('avatars/1/me'))
+        self.assertIsNone(storage.get_metadata('avatars/1/me'))
+        self.assertEqual(storage.client.calls['resource'], 2)
+    
+    def test_repeated_checks_cost_no_api_calls(self):
+        names = [self.upload(f'avatars/{i}/me.jpg') for i in range(10)]
+        cache.delete_many([metadata_cache_key(name) for name in names[:3]])
+        
+        for _ in range(20):
+            for name in names:
+                self.storage.exists(name)
+                self.storage.size(name)
+        
+        # 400 lookups: only the three evicted entries went back to Cloudinary
+        self.assertEqual(self.cloudinary.calls['resource'], 3)
+        self.assertEqual(self.cloudinary.calls['upload'], 10)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class LiveUpdatesConsumerTests(TransactionTestCase):
+    """LiveUpdatesConsumer subscriptions and broadcasts over the in-memory channel layer"""
+    
+    day = date(2025, 6, 1)
+    
+    async def connect(self):
+        communicator = WebsocketCommunicator(LiveUpdatesConsumer.as_asgi(), '/ws/live/')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+    
+    async def test_subscriber_receives_broadcast(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({'action': 'subscribe', 'stream': 'slots', 'date': self.day.isoformat()})
+        self.assertEqual(await communicator.receive_json_from(), {'event': 'subscribed', 'data': {'stream': 'slots'}})
+        
+        await sync_to_async(broadcast)(group_for_slots(self.day), 'slots', lambda: {'date': self.day.isoformat()})
+        
+        self.assertEqual(await communicator.receive_json_from(), {'event': 'slots', 'data': {'date': '2025-06-01'}})
+        await communicator.disconnect()
+    
+    async def test_other_groups_are_not_received(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({'action': 'subscribe', 'stream': 'challenge', 'id': 12})
+        await communicator.receive_json_from()
+        
+        await sync_to_async(broadcast)(group_for_slots(self.day), 'slots', {'date': self.day.isoformat()})
+        
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+    
+    async def test_invalid_subscription_is_rejected(self):
+        communicator = await self.connect()
+        await communicator.send_json_to({'action': 'subscribe', 'stream': 'slots', 'date': 'someday'})
+        
+        self.assertEqual(
+            await communicator.receive_json_from(),
+            {'event': 'error', 'data': {'message': 'Invalid subscription'}},
+        )
+        await communicator.disconnect()
@@ -19,12 +19,19 @@ from django.urls import path, include, reverse_lazy
 from django.contrib.auth import views as auth_views
 from django.conf import settings
 from django.conf.urls.static import static
+from django.contrib.sitemaps import views as sitemap_views
+from django.views.decorators.http import conditional_page
 from rest_framework.routers import DefaultRouter
 from tampere_cricket.matches.views import ChallengeViewSet, challenges_list, challenge_detail, challenge_accept
 from tampere_cricket.accounts.views import signup, profile, custom_login, custom_logout
+from tampere_cricket.news.listing import cache_until_next_publish
 from tampere_cricket.news.views import news_list
 from tampere_cricket import pages
 from tampere_cricket import admin as project_admin
+from tampere_cricket.sitemaps import sitemaps
+
+# Most seconds crawler-facing responses are served from the cache; less when a scheduled article is due
+CRAWLER_CACHE_TTL = 15 * 60
 
 router = DefaultRouter()
 router.register(r'challenges', ChallengeViewSet)
@@ -90,6 +97,12 @@ urlpatterns = [
     path('privacy-policy/', pages.privacy_policy, name='privacy_policy'),
     path('terms-of-service/', pages.terms_of_service, name='terms_of_service'),
     path('challenge-rules/', pages.challenge_rules, name='challenge_rules'),
+    
+    # Sitemaps
+    path('sitemap.xml', conditional_page(cache_until_next_publish(CRAWLER_CACHE_TTL)(sitemap_views.index)),
+         {'sitemaps': sitemaps, 'sitemap_url_name': 'sitemap_section'}, name='sitemap'),
+    path('sitemap-<section>.xml', conditional_page(cache_until_next_publish(CRAWLER_CACHE_TTL)(sitemap_views.sitemap)),
+         {'sitemaps': sitemaps}, name='sitemap_section'),
 ]
 
 # Serve media files in development